@@ -3,24 +3,89 @@ import io
 import os
 from abc import abstractmethod, ABCMeta
 
-import numpy
 import numpy as np
 import pandas as pd
-from sklearn.datasets import make_blobs
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 import matplotlib.pyplot as plt
 from sklearn.metrics import silhouette_score
 import uuid
-import pickle
 
 from sklearn.mixture import GaussianMixture
+from sklearn.preprocessing import StandardScaler
+from joblib import Parallel, delayed, effective_n_jobs
 import dataframe_image as dfi
 
-from core.crs_converter import convert_coordinates
+from analysis_module.fonts import register_fonts
+from analysis_module.model_registry import model_registry
+from core.crs_converter import convert_coordinates_array
 
+from core.metrics import stage_timer
 from utils.logging_module import logger
 
 BASE_PATH = "./output/clustering/"
+register_fonts()
+
+
+def _get_gmm_information_criteria(X: np.ndarray, n_components: int, random_state=None):
+    """
+    k 하나에 대해 GMM을 학습하고 (BIC, AIC)를 반환한다.
+    joblib worker에서 실행되므로 모듈 레벨 함수로 둔다.
+    """
+    gmm = GaussianMixture(n_components=n_components, random_state=random_state).fit(X)
+    return gmm.bic(X), gmm.aic(X)
+
+
+def _fit_gmm_once(X: np.ndarray, n_components: int, max_iter: int, reg_covar: float, random_state: int):
+    """
+    초기값 하나로 GMM을 학습하고 (모델, 레이블)을 반환한다.
+    레이블은 fit_predict의 마지막 E-step에서 나오므로 predict를 다시 돌리지 않는다.
+    """
+    gmm = GaussianMixture(
+        n_components=n_components,
+        n_init=1,
+        max_iter=max_iter,
+        reg_covar=reg_covar,
+        random_state=random_state
+    )
+    labels = gmm.fit_predict(X)
+    return gmm, labels
+
+
+def _get_kmeans_estimator(n_clusters: int, minibatch: bool, random_state, n_init=3, max_iter=300):
+    if minibatch:
+        return MiniBatchKMeans(n_clusters=n_clusters, n_init=n_init, max_iter=max_iter, batch_size=4096,
+                               random_state=random_state)
+    return KMeans(n_clusters=n_clusters, n_init=n_init, max_iter=max_iter, random_state=random_state)
+
+
+def _get_kmeans_scores(X: np.ndarray, n_clusters: int, minibatch: bool, random_state, sample_size=None):
+    """
+    k 하나에 대해 KMeans를 학습하고 (WCSS, silhouette)를 반환한다.
+    silhouette은 sample_size가 주어졌을 때만 표본으로 계산한다.
+    """
+    model = _get_kmeans_estimator(n_clusters, minibatch, random_state).fit(X)
+    silhouette = None
+    if sample_size:
+        silhouette = silhouette_score(X, model.labels_, sample_size=sample_size, random_state=random_state)
+    return model.inertia_, silhouette
+
+
+def get_elbow_index(k_list: list, wcss: list) -> int:
+    """
+    kneedle 방식의 elbow. k와 WCSS를 [0, 1]로 정규화한 뒤 처음과 마지막 점을 잇는 직선에서
+    가장 멀리 떨어진(곡선이 가장 많이 꺾인) 점의 위치를 반환한다.
+    """
+    if len(wcss) < 3:
+        return 0
+    x = np.asarray(k_list, dtype=float)
+    y = np.asarray(wcss, dtype=float)
+    x = (x - x[0]) / (x[-1] - x[0])
+    y_range = y.max() - y.min()
+    if y_range == 0:
+        return 0
+    y = (y - y.min()) / y_range
+    # 감소하는 볼록 곡선이므로 직선(1 - x)과 곡선의 차이가 가장 큰 곳이 elbow
+    return int(np.argmax((1 - x) - y))
 
 
 class BaseModule(metaclass=ABCMeta):
@@ -41,15 +106,25 @@ class BaseModule(metaclass=ABCMeta):
     def predict(self, data):
         pass
 
-    def save_model(self) -> None:
+    def get_model_artifact(self) -> dict:
+        """
+        모델 저장소에 저장할 estimator와 컬럼 정보. 학습 데이터는 포함하지 않는다.
+        """
+        return {
+            "model_type": "clustering",
+            "estimator": self.model,
+            "scaler": getattr(self, "scaler", None),
+            "feature_columns": getattr(self, "feature_columns", None),
+            "feature_weights": getattr(self, "feature_weights", None),
+            "name_dict": self.name_dict
+        }
+
+    def save_model(self) -> str:
 
         if not self.model:
             raise AttributeError("model is not fitted yet")
 
-        self._mkdir()
-
-        with open(self.directory + "/model.pickle", "wb") as fw:
-            pickle.dump(self, fw)
+        return model_registry.save(self.get_model_artifact())
 
     def _mkdir(self) -> None:
 
@@ -66,14 +141,29 @@ class BaseClusteringModule(BaseModule):
     def __init__(self, data, dat_no_dat_nm_dict: dict):
         super().__init__(data, dat_no_dat_nm_dict)
 
+        self.labels = []
+        self.optimal_k: int = 2
+        self.k_method: str = None
+        self.k_range: range = range(2, 10)
+        self.scaler: StandardScaler = None
+        self.X: np.ndarray = None
+        self.feature_columns: list = None
+        self.feature_weights: np.ndarray = None
+        self.random_state: int = 0
+        self.coordinates: np.ndarray = None
+        self.spatial_weight: float = 0
+
     @abstractmethod
     def set_optimal_k(self, method: str) -> None: pass
 
     @abstractmethod
-    def save_k_method_output_plot(self) -> None: pass
+    def get_k_method_result(self) -> dict: pass
+
+    @abstractmethod
+    def _draw_k_method_output_plot(self) -> None: pass
 
     @abstractmethod
-    def get_cluster_output_plot(self) -> None: pass
+    def save_k_method_output_plot(self) -> None: pass
 
     @abstractmethod
     def save_data_scatter_plot(self) -> None: pass
@@ -81,8 +171,163 @@ class BaseClusteringModule(BaseModule):
     @abstractmethod
     def fit(self, n_init=100, max_iter=300) -> None: pass
 
-    @abstractmethod
-    def predict(self, data): pass
+    def set_k_range(self, start, end) -> None:
+        if start < 2:
+            raise ValueError("start must be larger than 1")
+        self.k_range = range(start, end)
+
+    def set_coordinates(self, coordinates: np.ndarray, spatial_weight: float = 0) -> None:
+        """
+        각 행의 지역 중심점 좌표(TARGET_CRS, n x 2)를 지정한다.
+        spatial_weight > 0이면 표준화된 좌표에 가중치를 곱해 군집 변수로 함께 쓴다.
+        """
+        if len(coordinates) != len(self.data):
+            raise ValueError("coordinates must have the same length as data")
+        self.coordinates = np.asarray(coordinates, dtype=float)
+        self.spatial_weight = spatial_weight
+        self.X = None
+
+    def get_feature_matrix(self) -> np.ndarray:
+        """
+        분석 변수 컬럼(yr, stdg_nm, variable 제외)을 표준화한 행렬을 반환한다.
+        k 탐색에 쓰이는 모든 worker가 같은 행렬을 공유하도록 한 번만 만든다.
+        """
+        if self.X is None:
+            self.feature_columns = self.data.iloc[:, 3:].columns.to_list()
+            values = np.nan_to_num(self.data.iloc[:, 3:].to_numpy(dtype=float))
+            self.feature_weights = np.ones(len(self.feature_columns))
+
+            if self.coordinates is not None and self.spatial_weight > 0:
+                self.feature_columns = self.feature_columns + ["x_coord", "y_coord"]
+                values = np.column_stack([values, self.coordinates])
+                self.feature_weights = np.append(self.feature_weights, [self.spatial_weight] * 2)
+
+            self.scaler = StandardScaler()
+            # 중심점이 없는 지역은 표준화 후 0(평균 위치)으로 둔다
+            self.X = np.nan_to_num(self.scaler.fit_transform(values)) * self.feature_weights
+        return self.X
+
+    def predict(self, data) -> np.ndarray:
+        """
+        학습에 쓴 변수 컬럼을 가진 DataFrame(또는 같은 순서의 행렬)에 군집 레이블을 배정한다.
+        """
+        if not self.model:
+            raise AttributeError("model is not fitted yet")
+
+        if isinstance(data, pd.DataFrame):
+            data = data.loc[:, self.feature_columns].fillna(0).to_numpy(dtype=float)
+        return self.model.predict(self.scaler.transform(data) * self.feature_weights)
+
+    def get_k_method_output_plot(self) -> str:
+        self._draw_k_method_output_plot()
+        buffer = io.BytesIO()
+        with stage_timer("plot_export"):
+            plt.savefig(buffer, format="png", dpi=300)
+        plt.close()
+        buffer.seek(0)
+        with stage_timer("base64"):
+            base64_image = base64.b64encode(buffer.read()).decode()
+        logger.info("k method plot saved successfully")
+        return base64_image
+
+    def get_cluster_output_plot(self) -> str:
+        plt.clf()
+        if not self.model:
+            raise AttributeError("model is not fitted yet")
+
+        if not len(self.data):
+            raise AttributeError("data must be initialized")
+
+        for label in range(self.optimal_k):
+            plt.scatter(self.data.iloc[self.labels == label, 3], self.data.iloc[self.labels == label, 4],
+                        label=f'Cluster {label + 1}')
+        plt.legend()
+        buffer = io.BytesIO()
+        with stage_timer("plot_export"):
+            plt.savefig(buffer, format="png", dpi=300)
+        buffer.seek(0)
+        with stage_timer("base64"):
+            base64_image = base64.b64encode(buffer.read()).decode()
+        logger.info("clustering output plot saved successfully")
+        return base64_image
+
+    def get_clustering_result(self):
+        """
+        clustering 된 결과를 반환한다
+        index(지역코드), label(클러스터링 레이블)의 헤더로 구성
+        """
+        # columns = ["yr", "stdg_nm", "variable", "labels"]
+        # selected_data = self.data[columns]
+        # json_dict = selected_data.to_dict(orient='records')
+
+        # 기획 변경. label별 count를 집계하는 걸로
+        labels, counts = np.unique(np.asarray(self.labels), return_counts=True)
+        result_df = pd.DataFrame({'labels': labels, 'count': counts})
+        result_df.index = [''] * len(result_df)
+
+        buffer = io.BytesIO()
+        with stage_timer("table_export"):
+            dfi.export(result_df, buffer)
+        buffer.seek(0)
+        with stage_timer("base64"):
+            base64_table = base64.b64encode(buffer.read()).decode()
+        logger.info("clustering result table saved successfully")
+        return base64_table
+
+    def get_spatial_result(self, crs, output_format: str = "records", precision: int = None):
+        """
+        군집 결과를 좌표와 함께 반환한다. 좌표 변환과 반올림은 배열 단위로 한 번에 한다.
+        set_coordinates로 지역 중심점이 지정되어 있으면 그 좌표(TARGET_CRS)를 쓰고 중심점이 없는 행은 뺀다.
+        지정되지 않았으면 3, 4번째 컬럼 값을 crs 좌표로 보고 변환한다.
+        output_format
+            records  : [{'x_coord', 'y_coord', 'label'}, ...]
+            columnar : {'x': [...], 'y': [...], 'label': [...]}
+            geojson  : Point Feature들의 FeatureCollection
+            arrow    : x, y, label 컬럼을 가진 Arrow IPC stream 바이트
+        """
+        if not self.model:
+            raise AttributeError("model is not fitted yet")
+
+        labels = np.asarray(self.labels, dtype=np.int32)
+        if self.coordinates is not None:
+            found = ~np.isnan(self.coordinates).any(axis=1)
+            x, y, labels = self.coordinates[found, 0], self.coordinates[found, 1], labels[found]
+        else:
+            x, y = convert_coordinates_array(self.data.iloc[:, 3], self.data.iloc[:, 4], crs)
+        if precision is not None:
+            x = np.round(x, precision)
+            y = np.round(y, precision)
+
+        if output_format == "records":
+            return [{'x_coord': _x, 'y_coord': _y, 'label': _label}
+                    for _x, _y, _label in zip(x.tolist(), y.tolist(), labels.tolist())]
+
+        if output_format == "columnar":
+            return {"x": x.tolist(), "y": y.tolist(), "label": labels.tolist()}
+
+        if output_format == "geojson":
+            return {
+                "type": "FeatureCollection",
+                "features": [
+                    {"type": "Feature", "geometry": {"type": "Point", "coordinates": [_x, _y]},
+                     "properties": {"label": _label}}
+                    for _x, _y, _label in zip(x.tolist(), y.tolist(), labels.tolist())
+                ]
+            }
+
+        if output_format == "arrow":
+            import pyarrow as pa
+
+            table = pa.table({"x": x, "y": y, "label": labels})
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes()
+
+        raise ValueError("not supported output format : " + output_format)
+
+    def get_spatial_result_as_json(self, crs):
+        return self.get_spatial_result(crs, output_format="records")
 
 
 class GMMModule(BaseClusteringModule):
@@ -91,10 +336,6 @@ class GMMModule(BaseClusteringModule):
     def __init__(self, data: pd.DataFrame, dat_no_dat_nm_dict: dict):
         super().__init__(data, dat_no_dat_nm_dict)
 
-        self.labels = []
-        self.optimal_k: int = 2
-        self.k_method: str = None
-        self.k_range: range = range(2, 10)
         self.bic_scores = []
         self.aic_scores = []
 
@@ -106,12 +347,11 @@ class GMMModule(BaseClusteringModule):
         k : {k}
         """.format(uuid=self.uuid, k_method=self.k_method, k=self.optimal_k)
 
-    def set_k_range(self, start, end) -> None:
-        if start < 2:
-            raise ValueError("start must be larger than 1")
-        self.k_range = range(start, end)
-
-    def set_optimal_k(self, method: str = "AIC", fixed_size=2) -> None:
+    def set_optimal_k(self, method: str = "AIC", fixed_size=2, n_jobs=-1, patience=2) -> None:
+        """
+        k_range의 후보 k들을 n_jobs개 프로세스에서 병렬로 학습해 BIC/AIC가 최소인 k를 고른다.
+        후보는 worker 수만큼 묶어서 평가하고, 최소값 이후로 patience개 이상 점수가 나빠지면 탐색을 멈춘다.
+        """
 
         if method == "fixed":
             self.optimal_k = fixed_size
@@ -120,47 +360,69 @@ class GMMModule(BaseClusteringModule):
         if method and method not in self.optimal_k_methods:
             raise ValueError("not supported method")
 
-        for n in self.k_range:
-            gmm = GaussianMixture(n_components=n)
-            gmm.fit(self.data)
-            self.bic_scores.append(gmm.bic(self.data))
-            self.aic_scores.append(gmm.aic(self.data))
+        X = self.get_feature_matrix()
+        k_list = [k for k in self.k_range if k <= len(X)]
+        if not k_list:
+            raise ValueError("not enough data for k_range")
+
+        batch_size = effective_n_jobs(n_jobs)
+        self.bic_scores = []
+        self.aic_scores = []
+
+        with Parallel(n_jobs=n_jobs) as parallel:
+            for start in range(0, len(k_list), batch_size):
+                scores = parallel(delayed(_get_gmm_information_criteria)(X, k, self.random_state)
+                                  for k in k_list[start:start + batch_size])
+                for bic, aic in scores:
+                    self.bic_scores.append(bic)
+                    self.aic_scores.append(aic)
+
+                criterion = self.bic_scores if method == "BIC" else self.aic_scores
+                if len(criterion) - 1 - int(np.argmin(criterion)) >= patience:
+                    break
+
+        # 조기 종료 시 실제로 평가한 k까지만 남긴다
+        self.k_range = range(k_list[0], k_list[0] + len(self.bic_scores))
 
         if method == "BIC":
             self.optimal_k = list(self.k_range)[np.argmin(self.bic_scores)]
         elif method == "AIC":
             self.optimal_k = list(self.k_range)[np.argmin(self.aic_scores)]
+        self.k_method = method
 
         logger.info("optimal k is set as : " + str(self.optimal_k))
 
-    def fit(self, n_init=10, max_iter=100, reg_covar=0.000001) -> None:
-        # print(self.data.iloc[:, 3:])
+    def get_k_method_result(self) -> dict:
+        return {
+            "k": int(self.optimal_k),
+            "method": self.k_method,
+            "k_range": list(self.k_range),
+            "bic": [float(score) for score in self.bic_scores],
+            "aic": [float(score) for score in self.aic_scores]
+        }
+
+    def fit(self, n_init=10, max_iter=100, reg_covar=0.000001, n_jobs=-1) -> None:
+        """
+        표준화된 변수로 n_init번의 재시작을 worker pool에 나눠 학습하고 log-likelihood가 가장 큰 모델을 남긴다.
+        재시작마다의 seed는 random_state에서 파생되므로 같은 입력이면 같은 모델이 나온다.
+        """
         if not len(self.data):
             raise AttributeError("data must be initialized")
-        self.data = self.data.fillna(0)
-        self.model = GaussianMixture(
-            n_components=self.optimal_k,
-            n_init=n_init,
-            max_iter=max_iter,
-            reg_covar=reg_covar
-        ).fit(self.data.iloc[:, 3:])
-        # ).fit(self.data)
-        self.labels = self.model.predict(self.data.iloc[:, 3:])  # Get cluster labels
-        # self.labels = self.model.predict(self.data)  # Get cluster labels
-        self.data["labels"] = self.labels
+        X = self.get_feature_matrix()
 
-        logger.info("model is successfully fitted")
+        seeds = np.random.RandomState(self.random_state).randint(np.iinfo(np.int32).max, size=n_init)
+        fitted = Parallel(n_jobs=min(n_init, effective_n_jobs(n_jobs)))(
+            delayed(_fit_gmm_once)(X, self.optimal_k, max_iter, reg_covar, seed) for seed in seeds
+        )
+        self.model, self.labels = max(fitted, key=lambda result: result[0].lower_bound_)
 
-    def predict(self, data):
-        return NotImplemented
+        logger.info("model is successfully fitted")
 
-    def save_k_method_output_plot(self) -> None:
+    def _draw_k_method_output_plot(self) -> None:
+        if not self.bic_scores:
+            raise AttributeError("optimal k is not searched yet")
 
         plt.clf()
-        self._mkdir()
-        if not self.data.any():
-            raise AttributeError("data must be initialized")
-
         plt.figure(figsize=(10, 6))
         plt.plot(self.k_range, self.bic_scores, label='BIC')
         plt.plot(self.k_range, self.aic_scores, label='AIC')
@@ -178,26 +440,12 @@ class GMMModule(BaseClusteringModule):
                     marker='o', label='Min BIC')
         plt.scatter(list(self.k_range)[np.argmin(self.aic_scores)], self.aic_scores[min_aic_idx], color='red',
                     marker='o', label='Min AIC')
-        plt.savefig(self.directory + '/aic_bic_scores.jpg')
-
-    def get_cluster_output_plot(self) -> None:
-        plt.clf()
-        if not self.model:
-            raise AttributeError("model is not fitted yet")
-
-        if not len(self.data):
-            raise AttributeError("data must be initialized")
 
-        for label in range(self.optimal_k):
-            plt.scatter(self.data.iloc[self.labels == label, 3], self.data.iloc[self.labels == label, 4],
-                        label=f'Cluster {label + 1}')
-        plt.legend()
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format="png", dpi=300)
-        buffer.seek(0)
-        base64_image = base64.b64encode(buffer.read()).decode()
-        logger.info("clustering output plot saved successfully")
-        return base64_image
+    def save_k_method_output_plot(self) -> None:
+        self._mkdir()
+        self._draw_k_method_output_plot()
+        plt.savefig(self.directory + '/aic_bic_scores.jpg')
+        plt.close()
 
     def save_data_scatter_plot(self) -> None:
         plt.clf()
@@ -209,45 +457,23 @@ class GMMModule(BaseClusteringModule):
         plt.savefig(self.directory + '/data_scatter_plot.jpg')
         logger.info("data scatter plot saved successfully")
 
-    def get_clustering_result(self):
-        """
-        clustering 된 결과를 반환한다
-        index(지역코드), label(클러스터링 레이블)의 헤더로 구성
-        """
-        # columns = ["yr", "stdg_nm", "variable", "labels"]
-        # selected_data = self.data[columns]
-        # json_dict = selected_data.to_dict(orient='records')
-
-        # 기획 변경. label별 count를 집계하는 걸로
-        result_df = self.data.groupby('labels').size().reset_index(name='count')
-        result_df.index = [''] * len(result_df)
-
-        buffer = io.BytesIO()
-        dfi.export(result_df, buffer)
-        buffer.seek(0)
-        base64_table = base64.b64encode(buffer.read()).decode()
-        logger.info("clustering result table saved successfully")
-        return base64_table
-
-    def get_spatial_result_as_json(self, crs):
-        output = []
-        for index, row in self.data.iterrows():
-            converted_x, converted_y = convert_coordinates(row.iloc[3], row.iloc[4], crs)
-            output.append({'x_coord': converted_x, 'y_coord': converted_y, 'label': row['labels']})
-        return output
-
 
 class KMeansModule(BaseClusteringModule):
+    """
+    KMeans 군집분석
+    데이터가 minibatch_threshold 행을 넘거나 minibatch=True면 MiniBatchKMeans로 학습한다.
+    silhouette 기반 k 선택은 전체 거리행렬(O(n^2)) 대신 silhouette_sample_size 행의 무작위 표본으로 계산한다.
+    """
     optimal_k_methods = {"wcss", "silhouette"}
+    minibatch_threshold = 10000
+    silhouette_sample_size = 5000
 
-    def __init__(self, data: numpy.array):
-        super().__init__(data)
+    def __init__(self, data: pd.DataFrame, dat_no_dat_nm_dict: dict, minibatch: bool = None):
+        super().__init__(data, dat_no_dat_nm_dict)
 
-        self.optimal_k: int = 2
-        self.k_method: str = None
+        self.minibatch: bool = minibatch
         self.silhouette_scores: list = []
         self.wcss: list = []
-        self.k_range: range = range(2, 10)
 
     def __str__(self):
         return """
@@ -255,62 +481,74 @@ class KMeansModule(BaseClusteringModule):
         uuid : {uuid}
         k_method : {k_method}
         k : {k}
-        """.format(uuid=self.uuid, k_method=self.k_method, k=self.optimal_k)
+        minibatch : {minibatch}
+        """.format(uuid=self.uuid, k_method=self.k_method, k=self.optimal_k, minibatch=self.use_minibatch)
 
-    def set_k_range(self, start, end) -> None:
-        if start < 2:
-            raise ValueError("start must be larger than 1")
-        self.k_range = range(start, end)
+    @property
+    def use_minibatch(self) -> bool:
+        if self.minibatch is not None:
+            return self.minibatch
+        return len(self.data) > self.minibatch_threshold
 
-    def set_optimal_k(self, method: str = "silhouette", fixed_size=2) -> None:
+    def set_optimal_k(self, method: str = "silhouette", fixed_size=2, n_jobs=-1) -> None:
 
         if method and method not in self.optimal_k_methods:
             raise ValueError("not supported method")
 
+        if method not in self.optimal_k_methods:
+            self.optimal_k = fixed_size
+            self.k_method = None
+            return
+
+        X = self.get_feature_matrix()
+        k_list = [k for k in self.k_range if k < len(X)]
+        if not k_list:
+            raise ValueError("not enough data for k_range")
+
+        sample_size = min(len(X), self.silhouette_sample_size) if method == "silhouette" else None
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_get_kmeans_scores)(X, k, self.use_minibatch, self.random_state, sample_size) for k in k_list
+        )
+        self.k_range = range(k_list[0], k_list[-1] + 1)
+        self.wcss = [wcss for wcss, _ in scores]
+        self.silhouette_scores = [silhouette for _, silhouette in scores]
+
         if method == "silhouette":
-            for _k in self.k_range:
-                kmeans = KMeans(n_clusters=_k, n_init=30, max_iter=30).fit(self.data)
-                self.silhouette_scores.append(silhouette_score(self.data, kmeans.labels_))
-            self.optimal_k = self.k_range[np.argmax(self.silhouette_scores)]
-            self.k_method = method
+            self.optimal_k = k_list[int(np.argmax(self.silhouette_scores))]
 
         elif method == "wcss":
-            for _k in self.k_range:
-                kmeans = KMeans(n_clusters=_k, n_init=30, max_iter=30).fit(self.data)
-                self.wcss.append(kmeans.inertia_)
-            elbow_index = np.argmin(np.diff(self.wcss)) + 1
-            self.optimal_k = self.wcss[elbow_index]
-            self.k_method = method
-
-        else:
-            self.optimal_k = fixed_size
-            self.k_method = None
+            self.optimal_k = k_list[get_elbow_index(k_list, self.wcss)]
 
+        self.k_method = method
         logger.info("optimal k is set as : " + str(self.optimal_k))
 
-    def fit(self, n_init=100, max_iter=300) -> None:
+    def get_k_method_result(self) -> dict:
+        result = {
+            "k": int(self.optimal_k),
+            "method": self.k_method,
+            "k_range": list(self.k_range),
+            "wcss": [float(score) for score in self.wcss]
+        }
+        if self.k_method == "silhouette":
+            result["silhouette"] = [float(score) for score in self.silhouette_scores]
+        return result
 
-        if not self.data.any():
+    def fit(self, n_init=10, max_iter=300) -> None:
+        if not len(self.data):
             raise AttributeError("data must be initialized")
+        X = self.get_feature_matrix()
 
-        self.model = KMeans(
-            n_clusters=self.optimal_k,
-            n_init=n_init,
-            max_iter=max_iter
-        ).fit(self.data)
+        self.model = _get_kmeans_estimator(self.optimal_k, self.use_minibatch, self.random_state,
+                                           n_init=n_init, max_iter=max_iter).fit(X)
+        self.labels = self.model.labels_
 
         logger.info("model is successfully fitted")
 
-    def predict(self, data):
-        return NotImplemented
-
-    def save_k_method_output_plot(self) -> None:
+    def _draw_k_method_output_plot(self) -> None:
+        if not self.wcss:
+            raise AttributeError("optimal k is not searched yet")
 
         plt.clf()
-        self._mkdir()
-        if not self.data.any():
-            raise AttributeError("data must be initialized")
-
         if self.k_method == "silhouette":
             plt.bar(self.k_range, self.silhouette_scores)
             plt.xlabel('Number of clusters (k)')
@@ -318,49 +556,32 @@ class KMeansModule(BaseClusteringModule):
             plt.title('Silhouette Scores for Different Number of Clusters')
             max_index = np.argmax(self.silhouette_scores)
             plt.bar(self.k_range[max_index], self.silhouette_scores[max_index], color='red')
-            plt.savefig(self.directory + "/silhouette_scores.jpg")
-            logger.info("silhouette scores plot saved successfully")
 
-        elif self.k_method == "wcss":
+        else:
             plt.plot(self.k_range, self.wcss, marker='o')
             plt.xlabel('Number of Clusters (k)')
             plt.ylabel('WCSS')
             plt.title('Elbow Point Plot')
             plt.axvline(x=self.optimal_k, color='r', linestyle='--', label='Elbow Point')
             plt.legend()
-            plt.savefig(self.directory + "/wcss.jpg")
-            logger.info("elbow point plot saved successfully")
 
-        else:
+    def save_k_method_output_plot(self) -> None:
+        if not self.k_method:
             logger.warning("no screenshot to save")
-
-    def get_cluster_output_plot(self) -> None:
-        plt.clf()
-        if not self.model:
-            raise AttributeError("model is not fitted yet")
-
-        if not self.data.any():
-            raise AttributeError("data must be initialized")
-
-        labels = self.model.labels_
-
-        for label in range(self.optimal_k):
-            plt.scatter(self.data[labels == label, 0], self.data[labels == label, 1], label=f'Cluster {label + 1}')
-
-        plt.legend()
+            return
 
         self._mkdir()
-        plt.savefig(self.directory + '/cluster_output.jpg')
-        logger.info("clustering output plot saved successfully")
+        self._draw_k_method_output_plot()
+        plt.savefig(self.directory + ("/silhouette_scores.jpg" if self.k_method == "silhouette" else "/wcss.jpg"))
+        plt.close()
+        logger.info(self.k_method + " plot saved successfully")
 
     def save_data_scatter_plot(self) -> None:
         plt.clf()
-        if not self.data.any():
+        if not len(self.data):
             raise AttributeError("data must be initialized")
 
         self._mkdir()
-        plt.scatter(self.data[:, 0], self.data[:, 1])
+        plt.scatter(self.data.iloc[:, 3], self.data.iloc[:, 4])
         plt.savefig(self.directory + '/data_scatter_plot.jpg')
         logger.info("data scatter plot saved successfully")
-
-
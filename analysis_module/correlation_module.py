@@ -10,22 +10,16 @@ import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 from typing_extensions import Union, List, Literal
+from core.metrics import stage_timer
 from utils.logging_module import logger
+from analysis_module.descriptive_statistics import compute_descriptive_statistics, get_descriptive_statistics_table
 import seaborn as sns
 import dataframe_image as dfi
-from scipy.stats import pearsonr
-from matplotlib import font_manager
-
-
+from scipy.stats import pearsonr, t as t_distribution
+from analysis_module.fonts import register_fonts
 
 BASE_PATH = "./output/regression/"
-import matplotlib.font_manager
-font_list = matplotlib.font_manager.findSystemFonts(fontpaths=None, fontext='ttf')
-[matplotlib.font_manager.FontProperties(fname=font).get_name() for font in font_list if 'Nanum' in font]
-import matplotlib.pyplot as plt
-plt.rc('font', family='NanumGothicCoding')
-import matplotlib as mpl
-mpl.rcParams['axes.unicode_minus'] = False
+register_fonts()
 
 
 class CorrelationModule:
@@ -37,7 +31,8 @@ class CorrelationModule:
         if isinstance(data, np.ndarray):
             data = pd.DataFrame(data=data)
         self.X: pd.DataFrame = data
-        self.X = self.X.fillna(0)
+        if self.X.isna().to_numpy().any():
+            self.X = self.X.fillna(0)
         self.selected_columns: List[str] = self.X.columns
         self.directory: str = None
         self.name_dict: dict = dat_no_dat_nm_dict
@@ -99,9 +94,11 @@ class CorrelationModule:
                         result_df.at[(self.name_dict[col1], 'pearsonr'), self.name_dict[col2]] = f"{pearsonr_value:.4f}*"
 
         buffer = io.BytesIO()
-        dfi.export(result_df, buffer)
+        with stage_timer("table_export"):
+            dfi.export(result_df, buffer)
         buffer.seek(0)
-        base64_table = base64.b64encode(buffer.read()).decode()
+        with stage_timer("base64"):
+            base64_table = base64.b64encode(buffer.read()).decode()
 
         logger.info("get_correlation_matrix converted to base64 successfully")
         return base64_table
@@ -119,9 +116,11 @@ class CorrelationModule:
         plt.yticks(fontsize=3, rotation=20)
 
         buffer = io.BytesIO()
-        plt.savefig(buffer, format="png", dpi=300)
+        with stage_timer("plot_export"):
+            plt.savefig(buffer, format="png", dpi=300)
         buffer.seek(0)
-        base64_image = base64.b64encode(buffer.read()).decode()
+        with stage_timer("base64"):
+            base64_image = base64.b64encode(buffer.read()).decode()
         logger.info("heatmap plot saved successfully")
 
         return base64_image
@@ -141,9 +140,11 @@ class CorrelationModule:
                 ax.set_ylabel(self.name_dict[ax.get_ylabel()], fontsize=3, rotation=20, labelpad=30)
 
         buffer = io.BytesIO()
-        plt.savefig(buffer, format="png", dpi=300)
+        with stage_timer("plot_export"):
+            plt.savefig(buffer, format="png", dpi=300)
         buffer.seek(0)
-        base64_image = base64.b64encode(buffer.read()).decode()
+        with stage_timer("base64"):
+            base64_image = base64.b64encode(buffer.read()).decode()
         plt.close()
 
         logger.info("pair plot saved successfully")
@@ -151,22 +152,14 @@ class CorrelationModule:
         return base64_image
 
     def get_descriptive_statistics_table(self):
+        """
+        분석에 쓴 데이터(결측을 0으로 채운 표본)의 기술통계 표
+        """
         if self.X.empty:
             raise AttributeError("data must be initialized")
 
-        statistics = self.X.describe()
-        statistics = statistics.rename(columns=self.name_dict)
-        statistics = statistics.T
-        statistics = statistics.applymap(lambda x: "{:.0f}".format(x) if isinstance(x, (int, float)) else x)
-        statistics.columns = ['빈도', '평균', '표준편차', '최소값', '25%', '50%', '75%', '최대값']
-
-        buffer = io.BytesIO()
-        dfi.export(statistics, buffer)
-        buffer.seek(0)
-        base64_table = base64.b64encode(buffer.read()).decode()
-
-        logger.info("descriptive statistics table converted to base64 successfully")
-        return base64_table
+        statistics = compute_descriptive_statistics(self.X)
+        return get_descriptive_statistics_table(statistics, self.name_dict, decimals=0)
 
     def _mkdir(self):
         if not os.path.exists(BASE_PATH):
@@ -177,3 +170,34 @@ class CorrelationModule:
             os.mkdir(self.directory)
 
 
+def get_correlation_from_moments(moments: pd.DataFrame, columns: List[str],
+                                 test_side: Literal["two-sided", "greater"] = "two-sided") -> dict:
+    """
+    변수 쌍별 충분통계량(n, sum_a, sum_b, sum_aa, sum_bb, sum_ab)으로 상관계수, p값, 공분산, 관측치 수 행렬을 만든다.
+    원자료 없이 pearsonr과 같은 값을 낸다. (두 변수가 모두 있는 관측치 기준)
+    """
+    both = pd.concat([moments,
+                      moments.rename(columns={"dat_no_a": "dat_no_b", "dat_no_b": "dat_no_a", "sum_a": "sum_b",
+                                              "sum_b": "sum_a", "sum_aa": "sum_bb", "sum_bb": "sum_aa"})])
+    both = both.drop_duplicates(subset=["dat_no_a", "dat_no_b"])
+
+    n = both["n"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sxy = both["sum_ab"].to_numpy() - both["sum_a"].to_numpy() * both["sum_b"].to_numpy() / n
+        sxx = both["sum_aa"].to_numpy() - both["sum_a"].to_numpy() ** 2 / n
+        syy = both["sum_bb"].to_numpy() - both["sum_b"].to_numpy() ** 2 / n
+        r = np.clip(sxy / np.sqrt(sxx * syy), -1, 1)
+        covariance = sxy / (n - 1)
+        t_value = r * np.sqrt((n - 2) / (1 - r ** 2))
+
+    if test_side == "greater":
+        p_value = t_distribution.sf(t_value, n - 2)
+    else:
+        p_value = 2 * t_distribution.sf(np.abs(t_value), n - 2)
+    p_value = np.where(np.abs(r) == 1, 0, p_value)
+
+    result = {}
+    for name, value in (("correlation", r), ("pvalue", p_value), ("covariance", covariance), ("n", n)):
+        matrix = pd.Series(value, index=pd.MultiIndex.from_arrays([both["dat_no_a"], both["dat_no_b"]])).unstack()
+        result[name] = matrix.reindex(index=columns, columns=columns)
+    return result
@@ -0,0 +1,56 @@
+import base64
+import io
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from core.metrics import stage_timer
+from utils.logging_module import logger
+
+STATISTICS_COLUMNS = ["count", "mean", "std", "min", "q25", "q50", "q75", "max"]
+STATISTICS_COLUMN_NAMES = ['빈도', '평균', '표준편차', '최소값', '25%', '50%', '75%', '최대값']
+
+
+def compute_descriptive_statistics(values: pd.DataFrame) -> pd.DataFrame:
+    """
+    (관측치 x 변수) DataFrame의 변수별 기술통계 (변수 x STATISTICS_COLUMNS)
+    DataFrame.describe()와 같은 값이며 결측은 제외한다.
+    """
+    X = values.to_numpy(dtype=float).reshape(len(values), -1)
+    with warnings.catch_warnings():
+        # 값이 모두 결측인 변수는 nan으로 둔다
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        quantiles = np.nanquantile(X, [0.25, 0.5, 0.75], axis=0)
+        statistics = np.column_stack([
+            (~np.isnan(X)).sum(axis=0),
+            np.nanmean(X, axis=0),
+            np.nanstd(X, axis=0, ddof=1),
+            np.nanmin(X, axis=0),
+            quantiles[0],
+            quantiles[1],
+            quantiles[2],
+            np.nanmax(X, axis=0)
+        ])
+    return pd.DataFrame(statistics, index=values.columns, columns=STATISTICS_COLUMNS)
+
+
+def get_descriptive_statistics_table(statistics: pd.DataFrame, name_dict: dict, decimals: int) -> str:
+    """
+    변수별 기술통계를 소수점 decimals자리 문자열로 한 번에 바꿔 base64 표 이미지로 반환한다.
+    """
+    import dataframe_image as dfi
+
+    formatted = pd.DataFrame(np.char.mod(f"%.{decimals}f", statistics.loc[:, STATISTICS_COLUMNS].to_numpy(dtype=float)),
+                             index=statistics.index.map(lambda dat_no: name_dict.get(dat_no, dat_no)),
+                             columns=STATISTICS_COLUMN_NAMES)
+
+    buffer = io.BytesIO()
+    with stage_timer("table_export"):
+        dfi.export(formatted, buffer)
+    buffer.seek(0)
+    with stage_timer("base64"):
+        base64_table = base64.b64encode(buffer.read()).decode()
+
+    logger.info("descriptive statistics table converted to base64 successfully")
+    return base64_table
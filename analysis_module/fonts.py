@@ -0,0 +1,37 @@
+import os
+from functools import lru_cache
+from typing import List
+
+from core.config import settings
+from utils.logging_module import logger
+
+# static/font에 없는 글자는 Docker 이미지에 설치된 나눔 폰트, 기본 폰트 순으로 찾는다
+FALLBACK_FONT_FAMILIES = ["NanumGothicCoding", "DejaVu Sans"]
+
+
+@lru_cache(maxsize=1)
+def register_fonts() -> List[str]:
+    """
+    settings.FONT_PATH의 폰트 파일을 matplotlib에 한 번만 등록하고 기본 폰트로 지정한다.
+    시스템 전체 폰트를 검색하지 않는다. 등록한 폰트 이름 목록을 반환한다.
+    """
+    import matplotlib
+
+    matplotlib.use('Agg')
+    from matplotlib import font_manager
+
+    family_list = []
+    if os.path.isdir(settings.FONT_PATH):
+        for file_name in sorted(os.listdir(settings.FONT_PATH)):
+            if not file_name.lower().endswith((".ttf", ".otf")):
+                continue
+            path = os.path.join(settings.FONT_PATH, file_name)
+            font_manager.fontManager.addfont(path)
+            family_list.append(font_manager.FontProperties(fname=path).get_name())
+    else:
+        logger.warning("font directory does not exist : " + settings.FONT_PATH)
+
+    matplotlib.rcParams['font.family'] = list(dict.fromkeys(family_list + FALLBACK_FONT_FAMILIES))
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    logger.info("fonts registered : " + str(family_list))
+    return family_list
@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
+
+import joblib
+import numpy as np
+
+from core.config import settings
+from utils.logging_module import logger
+
+ARTIFACT_FILE_NAME = "model.joblib"
+META_FILE_NAME = "meta.json"
+
+
+class ModelRegistry:
+    """
+    학습된 모델을 재학습 없이 다시 쓰기 위한 저장소
+    모델마다 {base_path}/{model_id}/ 에 estimator와 컬럼 정보만 담은 joblib 파일(model.joblib)과
+    목록 조회용 메타정보(meta.json)를 저장하고, 불러온 모델은 최대 max_loaded개까지 메모리에 LRU로 둔다.
+    저장할 때마다 ttl_seconds가 지난 모델과 max_models개를 넘는 오래된 모델을 지운다.
+
+    artifact 형식
+        clustering : {"model_type", "estimator", "scaler", "feature_columns", "feature_weights", "name_dict"}
+        regression : {"model_type", "params"(k x m), "exog_names", "endog_names", "name_dict"}
+    """
+
+    def __init__(self, base_path: str, max_loaded: int, max_models: int, ttl_seconds: int):
+        self.base_path = base_path
+        self.max_loaded = max_loaded
+        self.max_models = max_models
+        self.ttl_seconds = ttl_seconds
+        self._loaded: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, artifact: dict) -> str:
+        model_id = str(uuid.uuid4())
+        directory = os.path.join(self.base_path, model_id)
+        os.makedirs(directory, exist_ok=True)
+
+        joblib.dump(artifact, os.path.join(directory, ARTIFACT_FILE_NAME), compress=3)
+
+        meta = {
+            "model_id": model_id,
+            "model_type": artifact["model_type"],
+            "feature_columns": list(artifact.get("feature_columns") or artifact.get("exog_names")[1:]),
+            "target_columns": list(artifact.get("endog_names", [])),
+            "created_at": datetime.now().isoformat()
+        }
+        with open(os.path.join(directory, META_FILE_NAME), "w", encoding="utf-8") as fw:
+            json.dump(meta, fw, ensure_ascii=False)
+
+        logger.info("model saved to registry : " + model_id)
+        self.delete_expired()
+        return model_id
+
+    def touch(self, model_id: str) -> bool:
+        """
+        모델의 수정 시각을 갱신해 정리 대상에서 미룬다. 모델이 없으면 False
+        """
+        try:
+            os.utime(os.path.join(self.base_path, str(uuid.UUID(model_id))))
+        except (ValueError, OSError):
+            return False
+        return True
+
+    def delete_expired(self) -> None:
+        entries = []
+        for model_id in os.listdir(self.base_path):
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.base_path, model_id)), model_id))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+
+        expired_before = time.time() - self.ttl_seconds
+        for i, (modified_at, model_id) in enumerate(entries):
+            if i < self.max_models and modified_at >= expired_before:
+                continue
+            shutil.rmtree(os.path.join(self.base_path, model_id), ignore_errors=True)
+            with self._lock:
+                self._loaded.pop(model_id, None)
+            logger.info("model deleted from registry : " + model_id)
+
+    def list(self) -> List[dict]:
+        if not os.path.exists(self.base_path):
+            return []
+
+        result = []
+        for model_id in os.listdir(self.base_path):
+            meta_path = os.path.join(self.base_path, model_id, META_FILE_NAME)
+            if os.path.exists(meta_path):
+                with open(meta_path, encoding="utf-8") as fr:
+                    result.append(json.load(fr))
+        return sorted(result, key=lambda meta: meta["created_at"], reverse=True)
+
+    def load(self, model_id: str) -> dict:
+        with self._lock:
+            if model_id in self._loaded:
+                self._loaded.move_to_end(model_id)
+                return self._loaded[model_id]
+
+        # model_id가 경로를 벗어나지 않도록 uuid 형식만 허용한다
+        try:
+            path = os.path.join(self.base_path, str(uuid.UUID(model_id)), ARTIFACT_FILE_NAME)
+        except ValueError:
+            raise KeyError(model_id)
+        if not os.path.exists(path):
+            raise KeyError(model_id)
+        artifact = joblib.load(path)
+
+        with self._lock:
+            self._loaded[model_id] = artifact
+            self._loaded.move_to_end(model_id)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return artifact
+
+    def predict(self, model_id: str, rows: List[Dict[str, float]]) -> Dict[str, list]:
+        """
+        {dat_no: 값} 형태의 행들을 한 번에 행렬로 만들어 군집을 배정하거나 종속변수 값을 예측한다.
+        학습 때와 같이 없는 값은 0으로 채우고, 모델에 없는 변수가 있으면 ValueError
+        """
+        artifact = self.load(model_id)
+        feature_columns = artifact.get("feature_columns") or artifact["exog_names"][1:]
+        unknown_columns = sorted({column for row in rows for column in row} - set(feature_columns))
+        if unknown_columns:
+            raise ValueError("model does not use columns : " + ", ".join(unknown_columns))
+        X = np.array([[row.get(column, 0) or 0 for column in feature_columns] for row in rows], dtype=float)
+        X = X.reshape(len(rows), len(feature_columns))
+
+        if artifact["model_type"] == "regression":
+            predictions = np.column_stack([np.ones(len(X)), X]) @ artifact["params"]
+            return {name: predictions[:, i].tolist() for i, name in enumerate(artifact["endog_names"])}
+
+        if artifact.get("scaler") is not None:
+            X = artifact["scaler"].transform(X)
+        if artifact.get("feature_weights") is not None:
+            X = X * artifact["feature_weights"]
+        return {"labels": artifact["estimator"].predict(X).tolist()}
+
+
+model_registry = ModelRegistry(settings.MODEL_REGISTRY_PATH, settings.MODEL_REGISTRY_MAX_LOADED,
+                               settings.MODEL_REGISTRY_MAX_MODELS, settings.MODEL_REGISTRY_TTL_SECONDS)
@@ -2,153 +2,356 @@ import base64
 import io
 import os
 import uuid
-from typing import List
+from datetime import datetime
+from typing import List, Union, Dict
 
+import numpy as np
 import pandas as pd
-from statsmodels.stats.anova import anova_lm
+from scipy import stats
+from scipy.linalg import solve_triangular
 from statsmodels.stats.outliers_influence import variance_inflation_factor
+from statsmodels.stats.stattools import omni_normtest, jarque_bera, durbin_watson
 
+from analysis_module.model_registry import model_registry
+from core.metrics import stage_timer
 from utils.logging_module import logger
-import statsmodels.api as sm
-from statsmodels.formula.api import ols
+from analysis_module.descriptive_statistics import compute_descriptive_statistics, get_descriptive_statistics_table
 import dataframe_image as dfi
 
 BASE_PATH = "./output/regression/"
 
 
+class OLSResult:
+    """
+    하나의 종속변수에 대한 OLS 추정 결과
+    statsmodels RegressionResults 중 요약표/분산분석표에 쓰이는 값만 가진다.
+    """
+
+    def __init__(self, endog_name: str, exog_names: List[str], params: np.ndarray, bse: np.ndarray,
+                 resid: np.ndarray, effects: np.ndarray, nobs: int, df_model: int, df_resid: int,
+                 ssr: float, centered_tss: float):
+        self.endog_name = endog_name
+        self.exog_names = exog_names
+        self.params = params
+        self.bse = bse
+        self.resid = resid
+        self.effects = effects
+        self.nobs = nobs
+        self.df_model = df_model
+        self.df_resid = df_resid
+        self.ssr = ssr
+        self.centered_tss = centered_tss
+
+        self.scale = ssr / df_resid
+        self.rsquared = 1 - ssr / centered_tss
+        self.rsquared_adj = 1 - (nobs - 1) / df_resid * (1 - self.rsquared)
+        self.fvalue = ((centered_tss - ssr) / df_model) / self.scale
+        self.f_pvalue = stats.f.sf(self.fvalue, df_model, df_resid)
+        self.llf = -nobs / 2 * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1)
+        self.aic = -2 * self.llf + 2 * (df_model + 1)
+        self.bic = -2 * self.llf + np.log(nobs) * (df_model + 1)
+
+        self.tvalues = params / bse
+        self.pvalues = 2 * stats.t.sf(np.abs(self.tvalues), df_resid)
+        q = stats.t.ppf(0.975, df_resid)
+        self.conf_int = np.column_stack([params - q * bse, params + q * bse])
+
+
+class OLSEngine:
+    """
+    formula 없이 numpy QR 분해로 OLS를 추정한다.
+    설계행렬(상수항 포함)은 한 번만 분해하고, 여러 종속변수를 한 번에 푼다.
+    """
+
+    def __init__(self, exog: np.ndarray, exog_names: List[str]):
+        self.exog = np.asarray(exog, dtype=float)
+        self.exog_names = exog_names
+        self.nobs, self.k = self.exog.shape
+
+        self.q, self.r = np.linalg.qr(self.exog)
+        diag = np.abs(np.diag(self.r))
+        tol = diag.max() * max(self.exog.shape) * np.finfo(float).eps
+        # 관측치가 변수보다 적으면 reduced QR의 R이 정사각이 아니므로 pinv로 추정한다
+        self.full_rank = self.nobs >= self.k and bool((diag > tol).all())
+        self.term_df = np.zeros(self.k, dtype=int)
+        self.term_df[:len(diag)] = diag > tol
+
+        if self.full_rank:
+            self.rank = self.k
+            self._pinv = None
+            r_inv = solve_triangular(self.r, np.eye(self.k))
+            self.normalized_cov = r_inv @ r_inv.T
+        else:
+            # 공선성이 있으면 statsmodels와 동일하게 pinv로 추정한다
+            logger.warning("design matrix is rank deficient, falling back to pinv")
+            self.rank = int(np.linalg.matrix_rank(self.exog))
+            self._pinv = np.linalg.pinv(self.exog)
+            self.normalized_cov = self._pinv @ self._pinv.T
+
+        self._vif = None
+
+    @property
+    def condition_number(self) -> float:
+        eigvals = np.linalg.eigvalsh(self.exog.T @ self.exog)
+        return float(np.sqrt(eigvals.max() / eigvals.min()))
+
+    @property
+    def vif(self) -> np.ndarray:
+        if self._vif is None:
+            self._vif = np.array([variance_inflation_factor(self.exog, i) for i in range(self.k)])
+        return self._vif
+
+    def fit(self, endog: np.ndarray, endog_names: List[str]) -> Dict[str, OLSResult]:
+        """
+        endog (nobs x m)의 각 열을 종속변수로 보고 한 번에 추정한다.
+        """
+        endog = np.asarray(endog, dtype=float).reshape(self.nobs, -1)
+
+        effects = np.zeros((self.k, endog.shape[1]))
+        effects[:self.q.shape[1]] = self.q.T @ endog
+        if self.full_rank:
+            params = solve_triangular(self.r, effects)
+        else:
+            params = self._pinv @ endog
+
+        resid = endog - self.exog @ params
+        ssr = (resid ** 2).sum(axis=0)
+        centered_tss = ((endog - endog.mean(axis=0)) ** 2).sum(axis=0)
+        df_model = self.rank - 1
+        df_resid = self.nobs - self.rank
+        bse = np.sqrt(np.diag(self.normalized_cov)[:, None] * (ssr / df_resid))
+
+        results = {}
+        for i, name in enumerate(endog_names):
+            results[name] = OLSResult(
+                endog_name=name,
+                exog_names=self.exog_names,
+                params=params[:, i],
+                bse=bse[:, i],
+                resid=resid[:, i],
+                effects=effects[:, i],
+                nobs=self.nobs,
+                df_model=df_model,
+                df_resid=df_resid,
+                ssr=ssr[i],
+                centered_tss=centered_tss[i]
+            )
+        return results
+
+
 class RegressionModule:
 
-    def __init__(self, data: pd.DataFrame, target_column_id: str, dat_no_dat_nm_dict: dict) -> object:
+    def __init__(self, data: pd.DataFrame, target_column_id: Union[str, List[str]], dat_no_dat_nm_dict: dict) -> object:
 
         self.uuid = uuid.uuid4()
         logger.info("class uuid : " + str(self.uuid))
+        # 결측은 설계행렬을 만들 때 0으로 채우고 DataFrame은 복사하지 않는다
         self.data = data
-        self.data = self.data.fillna(0)
 
-        self.y_column_id: str = target_column_id
-        self.X_column_id_list: List[str] = self.data.iloc[:, 3:].columns.to_list()
-
-        self.X_column_id_list.remove(self.y_column_id)
+        if isinstance(target_column_id, str):
+            target_column_id = [target_column_id]
+        self.y_column_id_list: List[str] = target_column_id
+        self.y_column_id: str = target_column_id[0]
+        self.X_column_id_list: List[str] = [column for column in self.data.iloc[:, 3:].columns.to_list()
+                                            if column not in self.y_column_id_list]
         self.directory: str = None
-        self.model = None
+        self.engine: OLSEngine = None
+        self.models: Dict[str, OLSResult] = {}
         self.name_dict: dict = dat_no_dat_nm_dict
 
+    @property
+    def model(self) -> OLSResult:
+        return self.models.get(self.y_column_id)
+
+    @property
+    def params(self) -> np.ndarray:
+        """
+        계수 행렬 (상수항 포함 독립변수 수 x 종속변수 수)
+        """
+        return np.column_stack([self.models[column].params for column in self.y_column_id_list])
+
     def save_descriptive_statistics_table(self):
+        """
+        분석에 쓴 데이터(결측을 0으로 채운 표본)의 기술통계 표
+        """
         if self.data.empty:
             raise AttributeError("data must be initialized")
 
-        statistics = self.data.describe()
-        statistics = statistics.rename(columns=self.name_dict)
-        statistics = statistics.T
-        statistics = statistics.iloc[1:, :]
-        statistics = statistics.applymap(lambda x: "{:.3f}".format(x) if isinstance(x, (int, float)) else x)
-        statistics.columns = ['빈도', '평균', '표준편차', '최소값', '25%', '50%', '75%', '최대값']
-
-        buffer = io.BytesIO()
-        dfi.export(statistics, buffer)
-        buffer.seek(0)
-        base64_table = base64.b64encode(buffer.read()).decode()
-
-        logger.info("descriptive statistics table converted to base64 successfully")
-        return base64_table
+        statistics = compute_descriptive_statistics(self.data.iloc[:, 3:].fillna(0))
+        return get_descriptive_statistics_table(statistics, self.name_dict, decimals=3)
 
     def fit(self):
-        formula = self.y_column_id + " ~ " + " + ".join(self.X_column_id_list)
-        model = ols(formula, data=self.data.iloc[:, 3:])
-        self.model = model.fit()
-
-    def get_result_summary_table0(self) -> str:
-        if not self.model:
+        """
+        독립변수 설계행렬을 한 번 QR 분해하고 모든 종속변수를 한 번에 추정한다.
+        """
+        exog = np.nan_to_num(self.data.loc[:, self.X_column_id_list].to_numpy(dtype=float))
+        exog = np.column_stack([np.ones(len(exog)), exog])
+        endog = np.nan_to_num(self.data.loc[:, self.y_column_id_list].to_numpy(dtype=float))
+
+        self.engine = OLSEngine(exog, ["Intercept"] + self.X_column_id_list)
+        self.models = self.engine.fit(endog, self.y_column_id_list)
+        logger.info("model is successfully fitted for " + str(len(self.models)) + " dependent variable(s)")
+
+    def _get_model(self, dependent_variable: str = None) -> OLSResult:
+        if not self.models:
             raise AttributeError("A model hasn't been fitted yet")
-
-        summary_df = pd.read_html(self.model.summary().tables[0].as_html())[0]
-        summary_df.iat[7, 2] = '추정값의 표준오차'
-        summary_df.iat[7, 3] = (self.model.resid ** 2).mean() ** 0.5
-        summary_df.iat[8, 2] = ""
-        summary_df.iat[8, 3] = ""
-
-        summary_df.iat[0, 1] = self.name_dict[summary_df.iat[0, 1]]
+        return self.models[dependent_variable or self.y_column_id]
+
+    def _get_variable_names(self, names: List[str]) -> List[str]:
+        return ["(상수)" if name == "Intercept" else self.name_dict.get(name, name) for name in names]
+
+    def get_result_summary_table0(self, dependent_variable: str = None) -> str:
+        model = self._get_model(dependent_variable)
+
+        now = datetime.now()
+        summary_df = pd.DataFrame([
+            ["Dep. Variable:", self.name_dict.get(model.endog_name, model.endog_name),
+             "R-squared:", "%#8.3f" % model.rsquared],
+            ["Model:", "OLS", "Adj. R-squared:", "%#8.3f" % model.rsquared_adj],
+            ["Method:", "Least Squares", "F-statistic:", "%#8.4g" % model.fvalue],
+            ["Date:", now.strftime("%a, %d %b %Y"), "Prob (F-statistic):", "%#6.3g" % model.f_pvalue],
+            ["Time:", now.strftime("%H:%M:%S"), "Log-Likelihood:", "%#8.5g" % model.llf],
+            ["No. Observations:", model.nobs, "AIC:", "%#8.4g" % model.aic],
+            ["Df Residuals:", model.df_resid, "BIC:", "%#8.4g" % model.bic],
+            ["Df Model:", model.df_model, "추정값의 표준오차", (model.resid ** 2).mean() ** 0.5],
+            ["Covariance Type:", "nonrobust", "", ""],
+        ])
 
         summary_df.index = [''] * len(summary_df)
         summary_df.columns = ['속성', '값', '속성', '값']
 
         buffer = io.BytesIO()
-        dfi.export(summary_df, buffer)
+        with stage_timer("table_export"):
+            dfi.export(summary_df, buffer)
         buffer.seek(0)
-        base64_table = base64.b64encode(buffer.read()).decode()
+        with stage_timer("base64"):
+            base64_table = base64.b64encode(buffer.read()).decode()
 
         logger.info("summary table converted to base64 successfully")
 
         return base64_table
 
-    def get_result_summary_table1(self) -> str:
-        if not self.model:
-            raise AttributeError("A model hasn't been fitted yet")
-
-        summary_df = pd.read_html(self.model.summary().tables[1].as_html())[0]
-        summary_df = summary_df.iloc[1:, :]
-        summary_df.columns = ['변수명', '비표준화계수(B)', '표준오차', '자유도', 'P>[t]', '[0.025', '0.975]']
+    def get_result_summary_table1(self, dependent_variable: str = None) -> str:
+        model = self._get_model(dependent_variable)
 
-        name_dict = self.name_dict
-        name_dict["Intercept"] = "(상수)"
-        summary_df['변수명'] = summary_df['변수명'].replace(name_dict)
+        summary_df = pd.DataFrame({
+            '변수명': self._get_variable_names(model.exog_names),
+            '비표준화계수(B)': np.round(model.params, 4),
+            '표준오차': np.round(model.bse, 3),
+            '자유도': np.round(model.tvalues, 3),
+            'P>[t]': np.round(model.pvalues, 3),
+            '[0.025': np.round(model.conf_int[:, 0], 3),
+            '0.975]': np.round(model.conf_int[:, 1], 3),
+        })
 
         summary_df.index = [''] * len(summary_df)
 
-        X = sm.add_constant(self.data.loc[:, self.X_column_id_list])
-        summary_df['표준화계수'] = list(map(float, summary_df['비표준화계수(B)'].values)) / X.std(axis=0).values
-
+        with np.errstate(divide="ignore"):
+            summary_df['표준화계수'] = summary_df['비표준화계수(B)'].values / self.engine.exog.std(axis=0, ddof=1)
 
         # 다중 공선성 컬럼 추가
-        summary_df['VIF'] = [variance_inflation_factor(self.model.model.exog, i) for i in
-                             range(self.model.model.exog.shape[1])]
+        summary_df['VIF'] = self.engine.vif
         # 공차 컬럼 추가. 공차는 그냥 VIF의 inverse라고 함.
         summary_df['공차'] = 1 / summary_df['VIF']
 
         buffer = io.BytesIO()
-        dfi.export(summary_df, buffer)
+        with stage_timer("table_export"):
+            dfi.export(summary_df, buffer)
         buffer.seek(0)
-        base64_table = base64.b64encode(buffer.read()).decode()
+        with stage_timer("base64"):
+            base64_table = base64.b64encode(buffer.read()).decode()
 
         logger.info("summary table converted to base64 successfully")
 
         return base64_table
 
-    def get_result_summary_table2(self) -> str:
-        if not self.model:
-            raise AttributeError("A model hasn't been fitted yet")
+    def get_result_summary_table2(self, dependent_variable: str = None) -> str:
+        model = self._get_model(dependent_variable)
+
+        omni, omnipv = omni_normtest(model.resid)
+        jb, jbpv, skew, kurtosis = jarque_bera(model.resid)
 
-        summary_df = pd.read_html(self.model.summary().tables[2].as_html())[0]
+        summary_df = pd.DataFrame([
+            ["Omnibus:", "%#6.3f" % omni, "Durbin-Watson:", "%#8.3f" % durbin_watson(model.resid)],
+            ["Prob(Omnibus):", "%#6.3f" % omnipv, "Jarque-Bera (JB):", "%#8.3f" % jb],
+            ["Skew:", "%#6.3f" % skew, "Prob(JB):", "%#8.3g" % jbpv],
+            ["Kurtosis:", "%#6.3f" % kurtosis, "Cond. No.", "%#8.3g" % self.engine.condition_number],
+        ])
         summary_df.index = [''] * len(summary_df)
         summary_df.columns = ['속성', '값', '속성', '값']
 
         buffer = io.BytesIO()
-        dfi.export(summary_df, buffer)
+        with stage_timer("table_export"):
+            dfi.export(summary_df, buffer)
         buffer.seek(0)
-        base64_table = base64.b64encode(buffer.read()).decode()
+        with stage_timer("base64"):
+            base64_table = base64.b64encode(buffer.read()).decode()
 
         logger.info("summary table converted to base64 successfully")
 
         return base64_table
 
-    def get_anova_lm(self):
-        if not self.model:
-            raise AttributeError("A model hasn't been fitted yet")
+    def get_anova_lm(self, dependent_variable: str = None):
+        model = self._get_model(dependent_variable)
+
+        # type I 제곱합은 QR effects(Q'y)의 제곱으로 바로 구할 수 있다 (상수항 제외)
+        term_df = self.engine.term_df[1:]
+        sum_sq = model.effects[1:] ** 2 * term_df
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_sq = sum_sq / term_df
+            f_value = mean_sq / model.scale
+        pr_f = stats.f.sf(f_value, term_df, model.df_resid)
+
+        anova_table = pd.DataFrame({
+            "df": np.append(term_df.astype(float), model.df_resid),
+            "sum_sq": np.append(sum_sq, model.ssr),
+            "mean_sq": np.append(mean_sq, model.scale),
+            "F": np.append(f_value, np.nan),
+            "PR(>F)": np.append(pr_f, np.nan),
+        }, index=model.exog_names[1:] + ["Residual"])
 
-        anova_table = anova_lm(self.model)
         anova_table = anova_table.rename(
             columns={"df": "자유도", "sum_sq": "제곱합", "mean_sq": "평균제곱", "F": "F-통계량"},
             index=self.name_dict
         )
         buffer = io.BytesIO()
-        dfi.export(anova_table, buffer)
+        with stage_timer("table_export"):
+            dfi.export(anova_table, buffer)
         buffer.seek(0)
-        base64_table = base64.b64encode(buffer.read()).decode()
+        with stage_timer("base64"):
+            base64_table = base64.b64encode(buffer.read()).decode()
 
         return base64_table
 
-    def predict(self, x):
-        pass
+    def predict(self, x) -> pd.DataFrame:
+        """
+        독립변수 컬럼을 가진 DataFrame(또는 같은 순서의 행렬)으로 모든 종속변수 값을 한 번에 예측한다.
+        """
+        if not self.models:
+            raise AttributeError("A model hasn't been fitted yet")
+
+        if isinstance(x, pd.DataFrame):
+            x = x.loc[:, self.X_column_id_list].fillna(0).to_numpy(dtype=float)
+        x = np.column_stack([np.ones(len(x)), x])
+        return pd.DataFrame(x @ self.params, columns=self.y_column_id_list)
+
+    def get_model_artifact(self) -> dict:
+        """
+        모델 저장소에 저장할 계수 행렬과 컬럼 정보. 학습 데이터는 포함하지 않는다.
+        """
+        return {
+            "model_type": "regression",
+            "params": self.params,
+            "exog_names": self.engine.exog_names,
+            "endog_names": self.y_column_id_list,
+            "name_dict": self.name_dict
+        }
+
+    def save_model(self) -> str:
+        if not self.models:
+            raise AttributeError("A model hasn't been fitted yet")
+
+        return model_registry.save(self.get_model_artifact())
 
     def _mkdir(self):
         if not os.path.exists(BASE_PATH):
@@ -157,5 +360,3 @@ class RegressionModule:
         if not self.directory:
             self.directory = BASE_PATH + str(self.uuid)
             os.mkdir(self.directory)
-
-
@@ -0,0 +1,164 @@
+import base64
+import io
+import uuid
+from typing import List
+
+import numpy as np
+import pandas as pd
+import dataframe_image as dfi
+from scipy import sparse
+
+from core.metrics import stage_timer
+from utils.logging_module import logger
+
+LISA_CLUSTER_NAMES = {1: "HH", 2: "LH", 3: "LL", 4: "HL"}
+
+
+class SpatialAutocorrelationModule:
+    """
+    전역 Moran's I와 국지 Moran's I(LISA)를 계산한다.
+    가중치 행렬 W는 행 표준화된 kNN 희소행렬이며, 여러 변수를 (지역 x 변수) 행렬로 묶어
+    순열 검정까지 행렬 연산 한 번에 처리한다.
+    """
+
+    def __init__(self, n_neighbors: int, permutations: int = 99, random_state: int = 0, significance: float = 0.05):
+        self.uuid = uuid.uuid4()
+        logger.info("class uuid : " + str(self.uuid))
+        self.W: sparse.csr_matrix = None
+        self.n_neighbors: int = n_neighbors
+        self.permutations: int = permutations
+        self.significance: float = significance
+        self.rng = np.random.default_rng(random_state)
+
+    @staticmethod
+    def _standardize(values: np.ndarray) -> np.ndarray:
+        z = values - values.mean(axis=0)
+        std = z.std(axis=0)
+        std[std == 0] = 1
+        return z / std
+
+    @staticmethod
+    def _pseudo_p_value(n_greater: np.ndarray, n_less: np.ndarray, permutations: int) -> np.ndarray:
+        # 관측값 이상(n_greater), 이하(n_less)인 순열 수 중 더 극단적인 쪽으로 p값을 구한다
+        # 같은 값(tie)은 양쪽에 모두 세므로 극단값으로 보지 않는다
+        return (np.minimum(n_greater, n_less) + 1) / (permutations + 1)
+
+    def get_global_morans_i(self, values: np.ndarray) -> pd.DataFrame:
+        """
+        values (지역 n x 변수 m)의 변수별 전역 Moran's I와 순열 검정 결과
+        분산이 0인 변수(모든 지역의 값이 같음)는 Moran's I를 정의할 수 없으므로 moran_i, z_sim, p_sim이 nan이다.
+        """
+        n = values.shape[0]
+        z = self._standardize(values)
+        s0 = self.W.sum()
+        sum_sq = (z * z).sum(axis=0)
+        valid = sum_sq > 0
+        sum_sq[~valid] = 1
+        observed = (n / s0) * (z * (self.W @ z)).sum(axis=0) / sum_sq
+
+        # 순열은 (n x m*chunk) 행렬로 묶어 희소행렬 곱 한 번에 계산한다
+        simulated = []
+        chunk = max(1, 1000 // max(1, values.shape[1]))
+        for start in range(0, self.permutations, chunk):
+            size = min(chunk, self.permutations - start)
+            order = np.argsort(self.rng.random((size, n)), axis=1)
+            permuted = np.concatenate([z[perm] for perm in order], axis=1)
+            lag = self.W @ permuted
+            numerator = (permuted * lag).sum(axis=0).reshape(size, -1)
+            simulated.append((n / s0) * numerator / sum_sq)
+        simulated = np.vstack(simulated)
+
+        std = simulated.std(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z_sim = np.where(std > 0, (observed - simulated.mean(axis=0)) / std, np.nan)
+        p_sim = self._pseudo_p_value((simulated >= observed).sum(axis=0), (simulated <= observed).sum(axis=0),
+                                     self.permutations)
+        return pd.DataFrame({
+            "moran_i": np.where(valid, observed, np.nan),
+            "expected_i": -1 / (n - 1),
+            "z_sim": np.where(valid, z_sim, np.nan),
+            "p_sim": np.where(valid, p_sim, np.nan)
+        })
+
+    def _draw_neighbors(self, size: int, n: int, k: int) -> np.ndarray:
+        """
+        순열 size번 x 지역 n개마다 자기 자신을 제외한 n-1개 지역 중 서로 다른 k개를 비복원으로 뽑은 (size, n, k) 위치
+        Floyd 알고리즘을 지역, 순열 전체에 대해 한 번에 돌린다.
+        """
+        selected = np.empty((size, n, k), dtype=np.int64)
+        for c, j in enumerate(range(n - 1 - k, n - 1)):
+            candidate = self.rng.integers(0, j + 1, size=(size, n))
+            duplicated = (selected[:, :, :c] == candidate[:, :, None]).any(axis=2)
+            selected[:, :, c] = np.where(duplicated, j, candidate)
+        selected += selected >= np.arange(n)[None, :, None]
+        return selected
+
+    def get_local_morans_i(self, values: np.ndarray):
+        """
+        values (지역 n x 변수 m)의 지역별 LISA 값, 조건부 순열 p값, 군집 유형(HH, LH, LL, HL, NS)
+        kNN 가중치는 행마다 이웃 n_neighbors개에 1/k씩이므로 순열 lag는 무작위 이웃 값의 평균이다.
+        분산이 0인 변수는 모든 지역의 p값이 nan, 군집 유형이 NS다.
+        """
+        n = values.shape[0]
+        z = self._standardize(values)
+        lag = self.W @ z
+        local_i = z * lag
+        valid = (z * z).sum(axis=0) > 0
+
+        k = self.n_neighbors
+        n_greater, n_less = np.zeros(z.shape), np.zeros(z.shape)
+        chunk = max(1, 10 ** 7 // max(1, n * k * z.shape[1]))
+        for start in range(0, self.permutations, chunk):
+            size = min(chunk, self.permutations - start)
+            neighbors = self._draw_neighbors(size, n, k)
+            simulated = z[None, :, None, :] * z[neighbors].mean(axis=2, keepdims=True)
+            n_greater += (simulated[:, :, 0, :] >= local_i).sum(axis=0)
+            n_less += (simulated[:, :, 0, :] <= local_i).sum(axis=0)
+        p_sim = self._pseudo_p_value(n_greater, n_less, self.permutations)
+        p_sim[:, ~valid] = np.nan
+
+        quadrant = np.where(z > 0, np.where(lag > 0, 1, 4), np.where(lag > 0, 2, 3))
+        cluster = np.where(p_sim < self.significance, quadrant, 0)
+        return local_i, p_sim, cluster
+
+    def run(self, data: pd.DataFrame, value_columns: List[str], weights: sparse.csr_matrix):
+        """
+        data는 한 단면(연도, 기간)에서 value_columns 값이 모두 있는 지역별 행이며 weights와 같은 순서로 정렬되어 있어야 한다.
+        전역 결과 DataFrame과 LISA 결과 DataFrame을 반환한다.
+        """
+        self.W = weights
+        self.n_neighbors = int(weights.getnnz(axis=1).max())
+        values = data.loc[:, value_columns].to_numpy(dtype=float)
+        if np.isnan(values).any():
+            raise ValueError("values must not contain missing values")
+
+        global_df = self.get_global_morans_i(values)
+        global_df.insert(0, "dat_no", value_columns)
+
+        local_i, p_sim, cluster = self.get_local_morans_i(values)
+        local_df = pd.DataFrame({
+            "stdg_cd": np.repeat(data["stdg_cd"].to_numpy(), len(value_columns)),
+            "dat_no": np.tile(value_columns, len(data)),
+            "local_i": local_i.ravel(),
+            "p_sim": p_sim.ravel(),
+            "cluster": pd.Series(cluster.ravel()).map(LISA_CLUSTER_NAMES).fillna("NS").to_numpy()
+        })
+        return global_df, local_df
+
+    @staticmethod
+    def get_global_result_table(global_df: pd.DataFrame, name_dict: dict) -> str:
+        table = global_df.copy()
+        table["dat_no"] = table["dat_no"].map(lambda dat_no: name_dict.get(dat_no, dat_no))
+        table = table.rename(columns={"yr": "연도", "variable": "기간", "dat_no": "변수명", "moran_i": "Moran's I",
+                                      "expected_i": "E[I]", "z_sim": "z", "p_sim": "p값"})
+        table.index = [''] * len(table)
+
+        buffer = io.BytesIO()
+        with stage_timer("table_export"):
+            dfi.export(table.round(4), buffer)
+        buffer.seek(0)
+        with stage_timer("base64"):
+            base64_table = base64.b64encode(buffer.read()).decode()
+
+        logger.info("moran's i table converted to base64 successfully")
+        return base64_table
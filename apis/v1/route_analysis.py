@@ -1,32 +1,143 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, Response, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from schemas.analysis import *
 from db.session import get_db
-from db.repository.analysis import create_correlation_analysis, create_regression_analysis, create_clustering_analysis, create_spatial_clustering_analysis
+from db.repository.analysis import create_correlation_analysis, create_regression_analysis, create_clustering_analysis, create_spatial_clustering_analysis, \
+    create_spatial_autocorrelation_analysis, create_correlation_summary_analysis, iter_analysis_events, iter_correlation_analysis, iter_regression_analysis
+from db.repository.job import submit_analysis_job, retrieve_analysis_job, retrieve_analysis_job_queue, wait_analysis_job
+from analysis_module.model_registry import model_registry
 
 router = APIRouter()
 
 
 @router.post("/correlation", response_model=ShowAnalysis, status_code=status.HTTP_201_CREATED)
-def create_correlation(analysis_data: CreateCorrelation, db: Session = Depends(get_db)):
+def create_correlation(analysis_data: CreateCorrelation, response: Response, db: Session = Depends(get_db)):
     analysis_result = create_correlation_analysis(analysis_data=analysis_data, db=db)
+    response.headers["X-Cache"] = analysis_result.cache or "bypass"
     return analysis_result
 
 
 @router.post("/regression", response_model=ShowAnalysis, status_code=status.HTTP_201_CREATED)
-def create_regression(analysis_data: CreateRegression, db: Session = Depends(get_db)):
+def create_regression(analysis_data: CreateRegression, response: Response, db: Session = Depends(get_db)):
     analysis_result = create_regression_analysis(analysis_data=analysis_data, db=db)
+    response.headers["X-Cache"] = analysis_result.cache or "bypass"
     return analysis_result
 
 
+@router.post("/correlation/summary", response_model=ShowAnalysis, status_code=status.HTTP_201_CREATED)
+def create_correlation_summary(analysis_data: CreateCorrelationSummary, db: Session = Depends(get_db)):
+    """
+    연도 범위의 상관계수, 공분산을 연도별 충분통계량 합산으로 계산한다. (표와 그림 없이 json)
+    """
+    return create_correlation_summary_analysis(analysis_data=analysis_data, db=db)
+
+
+@router.post("/correlation/stream", status_code=status.HTTP_200_OK)
+def stream_correlation(analysis_data: CreateCorrelation, db: Session = Depends(get_db)):
+    """
+    상관분석 결과물을 완성되는 순서대로 Server-Sent Events로 보낸다.
+    """
+    events = iter_analysis_events("correlation", iter_correlation_analysis, analysis_data, db)
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post("/regression/stream", status_code=status.HTTP_200_OK)
+def stream_regression(analysis_data: CreateRegression, db: Session = Depends(get_db)):
+    """
+    회귀분석 결과물을 완성되는 순서대로 Server-Sent Events로 보낸다.
+    """
+    events = iter_analysis_events("regression", iter_regression_analysis, analysis_data, db)
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @router.post("/clustering", response_model=ShowAnalysis, status_code=status.HTTP_201_CREATED)
-def create_clustering(analysis_data: CreateClustering, db: Session = Depends(get_db)):
+def create_clustering(analysis_data: CreateClustering, response: Response, db: Session = Depends(get_db)):
     analysis_result = create_clustering_analysis(analysis_data=analysis_data, db=db)
+    response.headers["X-Cache"] = analysis_result.cache or "bypass"
     return analysis_result
 
 
 @router.post("/clustering/spatial", response_model=ShowAnalysis, status_code=status.HTTP_201_CREATED)
-def create_spatial_clustering(analysis_data: CreateSpatialClustering, db: Session = Depends(get_db)):
+def create_spatial_clustering(analysis_data: CreateSpatialClustering, response: Response, db: Session = Depends(get_db)):
     analysis_result = create_spatial_clustering_analysis(analysis_data=analysis_data, db=db)
+    response.headers["X-Cache"] = analysis_result.cache or "bypass"
     return analysis_result
 
+
+@router.post("/spatial-autocorrelation", response_model=ShowAnalysis, status_code=status.HTTP_201_CREATED)
+def create_spatial_autocorrelation(analysis_data: CreateSpatialAutocorrelation, response: Response,
+                                   db: Session = Depends(get_db)):
+    """
+    지역 단위 변수들의 전역 Moran's I와 LISA 군집을 계산한다.
+    """
+    analysis_result = create_spatial_autocorrelation_analysis(analysis_data=analysis_data, db=db)
+    response.headers["X-Cache"] = analysis_result.cache or "bypass"
+    return analysis_result
+
+
+@router.post("/jobs/correlation", response_model=ShowAnalysisJob, status_code=status.HTTP_202_ACCEPTED)
+def submit_correlation_job(analysis_data: CreateCorrelation):
+    return submit_analysis_job("correlation", analysis_data)
+
+
+@router.post("/jobs/regression", response_model=ShowAnalysisJob, status_code=status.HTTP_202_ACCEPTED)
+def submit_regression_job(analysis_data: CreateRegression):
+    return submit_analysis_job("regression", analysis_data)
+
+
+@router.post("/jobs/clustering", response_model=ShowAnalysisJob, status_code=status.HTTP_202_ACCEPTED)
+def submit_clustering_job(analysis_data: CreateClustering):
+    return submit_analysis_job("clustering", analysis_data)
+
+
+@router.post("/jobs/clustering/spatial", response_model=ShowAnalysisJob, status_code=status.HTTP_202_ACCEPTED)
+def submit_spatial_clustering_job(analysis_data: CreateSpatialClustering):
+    return submit_analysis_job("spatial_clustering", analysis_data)
+
+
+@router.post("/jobs/spatial-autocorrelation", response_model=ShowAnalysisJob, status_code=status.HTTP_202_ACCEPTED)
+def submit_spatial_autocorrelation_job(analysis_data: CreateSpatialAutocorrelation):
+    return submit_analysis_job("spatial_autocorrelation", analysis_data)
+
+
+@router.get("/jobs", response_model=ShowAnalysisJobQueue, status_code=status.HTTP_200_OK)
+def get_analysis_job_queue():
+    """
+    비동기 분석 작업 대기열 현황을 반환한다.
+    """
+    return retrieve_analysis_job_queue()
+
+
+@router.get("/jobs/{job_id}", response_model=ShowAnalysisJob, status_code=status.HTTP_200_OK)
+async def get_analysis_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    """
+    비동기 분석 작업의 상태와 결과를 반환한다.
+    :param wait: 작업이 끝날 때까지 최대 wait초 기다린다
+    """
+    if wait:
+        await wait_analysis_job(job_id, wait)
+    return await run_in_threadpool(retrieve_analysis_job, job_id)
+
+
+@router.get("/models", response_model=List[ShowModel], status_code=status.HTTP_200_OK)
+def get_model_list():
+    """
+    모델 저장소에 저장된 모델 목록을 반환한다.
+    """
+    return model_registry.list()
+
+
+@router.post("/models/{model_id}/predict", response_model=ShowPrediction, status_code=status.HTTP_200_OK)
+def predict_model(model_id: str, predict_data: PredictModel):
+    """
+    저장된 모델로 여러 행의 군집을 배정하거나 종속변수 값을 한 번에 예측한다.
+    """
+    try:
+        predictions = model_registry.predict(model_id, predict_data.rows)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"model with ID {model_id} does not exist")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return ShowPrediction(model_id=model_id, predictions=predictions)
@@ -1,10 +1,14 @@
 from enum import Enum
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from schemas.data import *
 from db.repository.data import *
+from db.repository.ingest import ingest_user_statis
+from db.repository.export import get_export_table, iter_export_bytes, get_export_file_name, EXPORT_MEDIA_TYPES
 from db.session import get_db
+from db.query_stats import query_statistics
 from core.crs_converter import ALLOWED_CRS
 
 router = APIRouter()
@@ -100,3 +104,67 @@ def get_epsg_list():
 @router.get("/stdg-list", status_code=status.HTTP_200_OK)
 def get_stdg_list(db: Session = Depends(get_db)):
     return retrieve_stdg_data(db)
+
+
+@router.get("/region/{stdg_cd}/nearest", response_model=ShowNearbyRegion, status_code=status.HTTP_200_OK)
+def get_nearest_region(stdg_cd: str, k: int = Query(5, ge=1, le=100)):
+    """
+    같은 행정 단위에서 중심점이 가장 가까운 지역 k개를 거리(m) 순으로 반환한다.
+    """
+    return retrieve_nearest_region(stdg_cd, k)
+
+
+@router.post("/region/nearest", response_model=List[ShowNearbyRegion], status_code=status.HTTP_200_OK)
+def find_nearest_region(find_data: FindNearestRegion):
+    """
+    좌표마다 가장 가까운 지역 k개를 거리(m) 순으로 반환한다.
+    """
+    return retrieve_nearest_region_by_point(find_data)
+
+
+@router.post("/region/within", response_model=List[ShowNearbyRegion], status_code=status.HTTP_200_OK)
+def find_region_within(find_data: FindRegionWithin):
+    """
+    좌표마다 반경 radius_km 안의 지역을 거리(m) 순으로 반환한다.
+    """
+    return retrieve_region_within(find_data)
+
+
+@router.post("/user-statis", response_model=ShowUserStatisIngest, status_code=status.HTTP_201_CREATED)
+def upload_user_statis(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    사용자 통계 파일(csv, xlsx, xls, parquet)을 ggs_user_statis에 적재한다.
+    yr, stdg_cd, dat_no와 기간 컬럼(jan ~ dec, qu_1 ~ qu_4, ht_1, ht_2, yr_vl)을 가지며,
+    업로드된 (dat_no, yr)의 기존 데이터는 새 데이터로 바뀐다.
+    """
+    return ingest_user_statis(file.file, file.filename, db)
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+def export_data(variable_list: List[str] = Query(...),
+                period_unit: Literal["year", "month", "quarter", "half"] = Query(...),
+                year_from: Optional[str] = None,
+                year_to: Optional[str] = None,
+                region_level: Optional[Literal["sido", "sgg", "emd"]] = None,
+                format: Literal["parquet", "arrow"] = "parquet",
+                db: Session = Depends(get_db)):
+    """
+    분석에 쓰는 (yr, stdg_cd, stdg_nm, variable) x dat_no 데이터를 Parquet 또는 Arrow IPC stream으로 내려받는다.
+    record batch 단위로 zstd 압축해 스트리밍하며 지역 컬럼은 dictionary 인코딩된다.
+    """
+    table = get_export_table(variable_list, period_unit, db, year_from, year_to, region_level)
+    file_name = get_export_file_name(variable_list, period_unit, format)
+    return StreamingResponse(iter_export_bytes(table, format), media_type=EXPORT_MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="{file_name}"'})
+
+
+@router.get("/query-stats", response_model=List[ShowQueryStatistic], status_code=status.HTTP_200_OK)
+def get_query_statistics(limit: int = Query(20, ge=1, le=500),
+                         order_by: Literal["total_seconds", "max_seconds", "calls", "mean_seconds"] = "total_seconds"):
+    """
+    이 worker에서 실행된 SQL 문을 fingerprint별로 묶어 누적 실행 시간 등의 순서로 반환한다.
+    SLOW_QUERY_SECONDS 이상 걸린 문은 마지막 실행 계획이 함께 들어간다.
+    통계는 worker 프로세스마다 따로 모으고 합치지 않으므로 요청을 받은 worker에 따라 결과가 달라진다.
+    전체 worker의 합계는 /metrics를 본다.
+    """
+    return query_statistics.top(limit, order_by)
@@ -0,0 +1,260 @@
+"""
+대시보드 트래픽을 흉내 낸 부하 테스트 (Locust)
+
+카탈로그 조회 -> 필터 조회 -> 차트 데이터 여러 번, 가끔 상관/회귀/군집 분석 순서로 요청한다.
+종료 시 route별 처리량, p50/p95/p99, 에러율과 서버 프로세스의 CPU/RSS를 출력하고 SLO를 넘은 항목이 있으면
+종료 코드 1로 끝난다.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.synthetic_data --scale small --database-url ...
+    uvicorn main:app --port 11100
+    locust -f benchmarks/locustfile.py --headless -u 50 -r 5 -t 5m --host http://localhost:11100 \\
+        --server-process-name uvicorn --slo-report benchmarks/results/load.json
+"""
+import json
+import random
+import time
+from typing import Dict, List
+
+import gevent
+import psutil
+from locust import HttpUser, between, events, task
+
+# route별 SLO. --slo-file(JSON, 같은 형식)로 덮어쓸 수 있다
+DEFAULT_SLO = {
+    "GET /data/variable": {"p95_ms": 500, "p99_ms": 1000},
+    "GET /data/filter-list/[id]": {"p95_ms": 300, "p99_ms": 800},
+    "GET /data/variable/[id]/chart-data": {"p95_ms": 300, "p99_ms": 800},
+    "GET /data/stdg-list": {"p95_ms": 200, "p99_ms": 500},
+    "POST /analysis/correlation": {"p95_ms": 10000, "p99_ms": 20000},
+    "POST /analysis/regression": {"p95_ms": 10000, "p99_ms": 20000},
+    "POST /analysis/clustering": {"p95_ms": 15000, "p99_ms": 30000},
+}
+DEFAULT_MAX_ERROR_RATE = 0.01
+
+# 부하 발생기 프로세스 안에서 모든 사용자가 공유하는 변수 목록, 서버 자원 사용량 표본
+_variable_list: List[str] = []
+_resource_samples: List[Dict[str, float]] = []
+
+
+@events.init_command_line_parser.add_listener
+def _add_arguments(parser):
+    parser.add_argument("--server-process-name", default="", help="CPU/RSS를 측정할 서버 프로세스 이름 (예: uvicorn, gunicorn)")
+    parser.add_argument("--slo-file", default="", help="route별 SLO JSON 파일")
+    parser.add_argument("--slo-report", default="", help="결과 JSON 저장 경로")
+    parser.add_argument("--max-error-rate", type=float, default=DEFAULT_MAX_ERROR_RATE)
+
+
+def _find_server_processes(name: str) -> List[psutil.Process]:
+    processes = []
+    for process in psutil.process_iter(["name", "cmdline"]):
+        cmdline = " ".join(process.info["cmdline"] or [])
+        if name in (process.info["name"] or "") or (name in cmdline and "locust" not in cmdline):
+            processes.append(process)
+    return processes
+
+
+def _sample_resources(name: str, interval: float = 1.0):
+    """
+    서버 프로세스(worker 포함) 전체의 CPU(%)와 RSS(MB)를 interval초마다 기록한다.
+    """
+    processes = _find_server_processes(name)
+    for process in processes:
+        process.cpu_percent(None)
+    while True:
+        gevent.sleep(interval)
+        cpu, rss = 0.0, 0
+        for process in list(processes):
+            try:
+                cpu += process.cpu_percent(None)
+                rss += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                processes.remove(process)
+        # 재시작된 worker도 측정한다
+        for process in _find_server_processes(name):
+            if process.pid not in {known.pid for known in processes}:
+                process.cpu_percent(None)
+                processes.append(process)
+        _resource_samples.append({"time": time.time(), "cpu_percent": cpu, "rss_mb": rss / 2 ** 20,
+                                  "processes": len(processes)})
+
+
+@events.test_start.add_listener
+def _on_test_start(environment, **kwargs):
+    name = environment.parsed_options.server_process_name if environment.parsed_options else ""
+    if name:
+        gevent.spawn(_sample_resources, name)
+
+
+def _iter_catalog_variables(catalog: dict):
+    for depth1 in catalog.get("data", []):
+        for depth2 in depth1.get("children", []):
+            for variable in depth2.get("children", []):
+                yield variable["value"]
+
+
+class DashboardUser(HttpUser):
+    """
+    대시보드 화면 하나를 여는 사용자. 페이지를 열 때 카탈로그를 읽고 이후 차트를 주로 조회한다.
+    """
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        self.year_list = {}
+        self.load_catalog()
+
+    @task(2)
+    def load_catalog(self):
+        with self.client.get("/data/variable", params={"region": "all", "period_unit": "year"},
+                             name="/data/variable", catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f"status {response.status_code}")
+                return
+            variable_list = list(_iter_catalog_variables(response.json()))
+            if variable_list and not _variable_list:
+                _variable_list.extend(variable_list)
+
+    def _get_year(self, dat_no: str):
+        if dat_no not in self.year_list:
+            response = self.client.get(f"/data/filter-list/{dat_no}", name="/data/filter-list/[id]")
+            year_list = response.json().get("year_list") if response.status_code == 200 else None
+            self.year_list[dat_no] = year_list or []
+        return random.choice(self.year_list[dat_no]) if self.year_list[dat_no] else None
+
+    @task(3)
+    def load_filter(self):
+        if _variable_list:
+            dat_no = random.choice(_variable_list)
+            self.year_list.pop(dat_no, None)
+            self._get_year(dat_no)
+
+    @task(12)
+    def load_chart_data(self):
+        if not _variable_list:
+            return
+        dat_no = random.choice(_variable_list)
+        year = self._get_year(dat_no)
+        if year is None:
+            return
+        self.client.get(f"/data/variable/{dat_no}/chart-data",
+                        params={"year": year, "period_unit": "year", "detail_period": "all",
+                                "chart_type": random.choice(["bar", "pie", "histogram"])},
+                        name="/data/variable/[id]/chart-data")
+
+    @task(1)
+    def load_stdg_list(self):
+        self.client.get("/data/stdg-list", name="/data/stdg-list")
+
+    def _sample_variables(self, n: int) -> List[str]:
+        return random.sample(_variable_list, min(n, len(_variable_list)))
+
+    @task(1)
+    def run_correlation(self):
+        if len(_variable_list) >= 2:
+            self.client.post("/analysis/correlation", name="/analysis/correlation", json={
+                "variable_list": self._sample_variables(random.randint(2, 4)), "period_unit": "year",
+                "test_side": "two-sided", "valid_pvalue_accent": True})
+
+    @task(1)
+    def run_regression(self):
+        if len(_variable_list) >= 3:
+            variable_list = self._sample_variables(random.randint(3, 5))
+            self.client.post("/analysis/regression", name="/analysis/regression", json={
+                "dependent_variable": variable_list[0], "independent_variable_list": variable_list[1:],
+                "period_unit": "year"})
+
+    @task(1)
+    def run_clustering(self):
+        if len(_variable_list) >= 2:
+            self.client.post("/analysis/clustering", name="/analysis/clustering", json={
+                "variable_list": self._sample_variables(random.randint(2, 3)), "period_unit": "year",
+                "n_point": random.choice(["auto", 3, 4])})
+
+
+def _get_slo(options) -> Dict[str, dict]:
+    slo = {name: dict(target) for name, target in DEFAULT_SLO.items()}
+    if options and options.slo_file:
+        with open(options.slo_file, encoding="utf-8") as fr:
+            for name, target in json.load(fr).items():
+                slo.setdefault(name, {}).update(target)
+    return slo
+
+
+def get_load_report(environment) -> dict:
+    """
+    route별 처리량, 응답 시간 분위수, 에러율과 서버 자원 사용량을 모으고 SLO 위반을 표시한다.
+    """
+    options = environment.parsed_options
+    slo = _get_slo(options)
+    max_error_rate = options.max_error_rate if options else DEFAULT_MAX_ERROR_RATE
+
+    routes = []
+    for entry in sorted(environment.stats.entries.values(), key=lambda entry: (entry.name, entry.method)):
+        if not entry.num_requests:
+            continue
+        key = f"{entry.method} {entry.name}"
+        route = {
+            "route": key,
+            "requests": entry.num_requests,
+            "failures": entry.num_failures,
+            "rps": entry.total_rps,
+            "p50_ms": entry.get_response_time_percentile(0.5),
+            "p95_ms": entry.get_response_time_percentile(0.95),
+            "p99_ms": entry.get_response_time_percentile(0.99),
+            "error_rate": entry.num_failures / entry.num_requests,
+            "violations": []
+        }
+        for percentile in ("p95_ms", "p99_ms"):
+            target = slo.get(key, {}).get(percentile)
+            if target is not None and route[percentile] > target:
+                route["violations"].append(f"{percentile} {route[percentile]:.0f} > {target}")
+        if route["error_rate"] > slo.get(key, {}).get("error_rate", max_error_rate):
+            route["violations"].append(f"error_rate {route['error_rate']:.2%}")
+        routes.append(route)
+
+    total = environment.stats.total
+    resources = {}
+    if _resource_samples:
+        cpu = [sample["cpu_percent"] for sample in _resource_samples]
+        rss = [sample["rss_mb"] for sample in _resource_samples]
+        resources = {"cpu_percent_mean": sum(cpu) / len(cpu), "cpu_percent_max": max(cpu),
+                     "rss_mb_mean": sum(rss) / len(rss), "rss_mb_max": max(rss),
+                     "processes_max": max(sample["processes"] for sample in _resource_samples)}
+
+    return {
+        "requests": total.num_requests,
+        "failures": total.num_failures,
+        "rps": total.total_rps,
+        "error_rate": total.num_failures / total.num_requests if total.num_requests else 0.0,
+        "routes": routes,
+        "resources": resources,
+        "violations": sum(len(route["violations"]) for route in routes)
+    }
+
+
+def print_load_report(report: dict) -> None:
+    print("\n{:<42} {:>8} {:>7} {:>9} {:>9} {:>9} {:>7}".format(
+        "route", "requests", "rps", "p50(ms)", "p95(ms)", "p99(ms)", "error"))
+    for route in report["routes"]:
+        print("{:<42} {:>8} {:>7.1f} {:>9.0f} {:>9.0f} {:>9.0f} {:>7.2%}{}".format(
+            route["route"], route["requests"], route["rps"], route["p50_ms"], route["p95_ms"], route["p99_ms"],
+            route["error_rate"], "  SLO: " + ", ".join(route["violations"]) if route["violations"] else ""))
+    print("total {:.1f} rps, error rate {:.2%}".format(report["rps"], report["error_rate"]))
+    if report["resources"]:
+        print("server cpu mean {cpu_percent_mean:.0f}% / max {cpu_percent_max:.0f}%, "
+              "rss mean {rss_mb_mean:.0f}MB / max {rss_mb_max:.0f}MB".format(**report["resources"]))
+
+
+@events.quitting.add_listener
+def _on_quitting(environment, **kwargs):
+    report = get_load_report(environment)
+    print_load_report(report)
+
+    options = environment.parsed_options
+    if options and options.slo_report:
+        with open(options.slo_report, "w", encoding="utf-8") as fw:
+            json.dump(report, fw, indent=2, ensure_ascii=False)
+
+    if report["violations"]:
+        print(f"SLO violations : {report['violations']}")
+        environment.process_exit_code = 1
@@ -0,0 +1,381 @@
+"""
+성능 벤치마크
+
+합성 데이터로 hot path 함수들을 측정하고 결과를 benchmarks/results/{시각}-{commit}.json에 저장한다.
+--database를 주면 합성 데이터를 적재한 Postgres(POSTGRES_* 환경변수)로 repository 함수와 endpoint(TestClient)도 측정한다.
+
+    python -m benchmarks.synthetic_data --scale small --database-url postgresql://user:pw@localhost/gb_stat_bench
+    python -m benchmarks.run_benchmarks --scale small --database
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+# 결과 캐시를 끄고 모델 저장소는 임시 폴더를 써서 측정마다 같은 일을 하게 한다
+os.environ.setdefault("ANALYSIS_CACHE_ENABLED", "false")
+os.environ.setdefault("MODEL_REGISTRY_PATH", tempfile.mkdtemp(prefix="benchmark_models_"))
+
+from benchmarks.synthetic_data import SCALES, generate, PD_SE_CODES
+
+RESULT_PATH = os.path.join(os.path.dirname(__file__), "results")
+
+# (이름, DB 필요 여부, context를 받아 측정할 함수를 반환하는 함수)
+BENCHMARKS: List[tuple] = []
+
+
+def benchmark(name: str, database: bool = False):
+    def decorator(func):
+        BENCHMARKS.append((name, database, func))
+        return func
+
+    return decorator
+
+
+def _get_year_variables(context: dict, n: int) -> List[str]:
+    data_info = context["frames"]["ggs_data_info"]
+    return data_info.loc[data_info["pd_se"] == PD_SE_CODES["year"], "dat_no"].head(n).tolist()
+
+
+def _get_pivoted_df(context: dict, n: int):
+    from db.repository.data import build_pivoted_df
+
+    statis = context["frames"]["ggs_statis"]
+    statis = statis[statis["dat_no"].isin(_get_year_variables(context, n))]
+    regions = context["frames"]["ggs_stdg"].set_index("stdg_cd")["stdg_nm"]
+    keys = {
+        "yr": statis["yr"].to_numpy(),
+        "stdg_cd": statis["stdg_cd"].to_numpy(),
+        "stdg_nm": regions.loc[statis["stdg_cd"]].to_numpy(),
+        "dat_no": statis["dat_no"].to_numpy(),
+    }
+    return keys, statis[["yr_vl"]].to_numpy(), build_pivoted_df
+
+
+def _get_name_dict(context: dict) -> Dict[str, str]:
+    data_info = context["frames"]["ggs_data_info"]
+    return dict(zip(data_info["dat_no"], data_info["dat_nm"]))
+
+
+@benchmark("data.get_histogram_data")
+def bench_histogram(context):
+    from db.repository.data import get_histogram_data
+
+    statis = context["frames"]["ggs_statis"]
+    values = statis["yr_vl"].dropna().astype(int).tolist()[:100000]
+    return lambda: get_histogram_data(values)
+
+
+@benchmark("data.build_pivoted_df")
+def bench_build_pivoted_df(context):
+    keys, values, build_pivoted_df = _get_pivoted_df(context, 10)
+    return lambda: build_pivoted_df(keys, values, ["yr_vl"])
+
+
+@benchmark("correlation.matrix")
+def bench_correlation(context):
+    from analysis_module.correlation_module import CorrelationModule
+
+    keys, values, build_pivoted_df = _get_pivoted_df(context, 10)
+    pivoted_df = build_pivoted_df(keys, values, ["yr_vl"])
+    name_dict = _get_name_dict(context)
+    return lambda: CorrelationModule(pivoted_df.iloc[:, 3:], name_dict).get_correlation_matrix(test_side="two-sided")
+
+
+@benchmark("regression.fit")
+def bench_regression(context):
+    from analysis_module.regression_module import RegressionModule
+
+    keys, values, build_pivoted_df = _get_pivoted_df(context, 10)
+    pivoted_df = build_pivoted_df(keys, values, ["yr_vl"])
+    name_dict = _get_name_dict(context)
+    return lambda: RegressionModule(pivoted_df, [pivoted_df.columns[3]], name_dict).fit()
+
+
+@benchmark("gmm.fit")
+def bench_gmm_fit(context):
+    from analysis_module.clustering_module import GMMModule
+
+    keys, values, build_pivoted_df = _get_pivoted_df(context, 5)
+    pivoted_df = build_pivoted_df(keys, values, ["yr_vl"])
+    name_dict = _get_name_dict(context)
+
+    def run():
+        module = GMMModule(pivoted_df, name_dict)
+        module.optimal_k = 4
+        module.fit()
+
+    return run
+
+
+@benchmark("gmm.set_optimal_k")
+def bench_gmm_k(context):
+    from analysis_module.clustering_module import GMMModule
+
+    keys, values, build_pivoted_df = _get_pivoted_df(context, 5)
+    pivoted_df = build_pivoted_df(keys, values, ["yr_vl"])
+    name_dict = _get_name_dict(context)
+
+    def run():
+        module = GMMModule(pivoted_df, name_dict)
+        module.set_k_range(2, 8)
+        module.set_optimal_k(method="BIC")
+
+    return run
+
+
+@benchmark("crs.convert_coordinates")
+def bench_convert_coordinates(context):
+    from core.crs_converter import convert_coordinates
+
+    regions = context["frames"]["ggs_stdg"].head(1000)
+    points = list(zip(regions["x"], regions["y"]))
+    return lambda: [convert_coordinates(x, y, "EPSG:5179") for x, y in points]
+
+
+@benchmark("crs.convert_coordinates_array")
+def bench_convert_coordinates_array(context):
+    from core.crs_converter import convert_coordinates_array
+
+    regions = context["frames"]["ggs_stdg"]
+    return lambda: convert_coordinates_array(regions["x"].to_numpy(), regions["y"].to_numpy(), "EPSG:5179")
+
+
+@benchmark("db.get_pivoted_df", database=True)
+def bench_get_pivoted_df(context):
+    from db.repository.data import get_pivoted_df
+
+    variable_list = _get_year_variables(context, 10)
+    return lambda: get_pivoted_df(variable_list, "year", context["db"])
+
+
+@benchmark("db.retrieve_chart_data", database=True)
+def bench_retrieve_chart_data(context):
+    from db.repository.data import retrieve_chart_data
+
+    dat_no = _get_year_variables(context, 1)[0]
+    year = str(context["scale"].year_to)
+    return lambda: retrieve_chart_data(dat_no, year, "year", "all", None, None, context["db"])
+
+
+@benchmark("db.retrieve_variable_list", database=True)
+def bench_retrieve_variable_list(context):
+    from db.repository.data import retrieve_variable_list
+
+    return lambda: retrieve_variable_list("all", "year", context["db"])
+
+
+def _endpoint(method: str, path: str, body_factory: Callable[[dict], dict] = None, params_factory=None):
+    def setup(context):
+        client = context["client"]
+        body = body_factory(context) if body_factory else None
+        params = params_factory(context) if params_factory else None
+
+        def run():
+            response = client.request(method, path, json=body, params=params)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path} : {response.status_code} {response.text[:200]}")
+
+        return run
+
+    return setup
+
+
+def _chart_data_endpoint(context):
+    dat_no = _get_year_variables(context, 1)[0]
+    return _endpoint("GET", f"/data/variable/{dat_no}/chart-data", params_factory=lambda c: {
+        "year": str(c["scale"].year_to), "period_unit": "year", "detail_period": "all", "chart_type": "bar"})(context)
+
+
+ENDPOINT_BENCHMARKS = [
+    ("endpoint.variable_list", _endpoint("GET", "/data/variable",
+                                         params_factory=lambda c: {"region": "all", "period_unit": "year"})),
+    ("endpoint.chart_data", _chart_data_endpoint),
+    ("endpoint.correlation", _endpoint("POST", "/analysis/correlation", lambda c: {
+        "variable_list": _get_year_variables(c, 4), "period_unit": "year", "test_side": "two-sided",
+        "valid_pvalue_accent": True})),
+    ("endpoint.regression", _endpoint("POST", "/analysis/regression", lambda c: {
+        "dependent_variable": _get_year_variables(c, 4)[0], "independent_variable_list": _get_year_variables(c, 4)[1:],
+        "period_unit": "year"})),
+    ("endpoint.clustering", _endpoint("POST", "/analysis/clustering", lambda c: {
+        "variable_list": _get_year_variables(c, 3), "period_unit": "year", "n_point": 4})),
+]
+BENCHMARKS.extend((name, True, setup) for name, setup in ENDPOINT_BENCHMARKS)
+
+
+def measure(func: Callable, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return {
+        "repeat": repeat,
+        "min": durations[0],
+        "median": statistics.median(durations),
+        "mean": statistics.mean(durations),
+        "p95": durations[min(len(durations) - 1, int(round(0.95 * (len(durations) - 1))))],
+        "stdev": statistics.stdev(durations) if len(durations) > 1 else 0.0,
+    }
+
+
+def get_environment() -> dict:
+    def git(*args):
+        try:
+            return subprocess.check_output(["git", *args], cwd=os.path.dirname(__file__), text=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    versions = {}
+    for package in ("numpy", "pandas", "scipy", "sklearn", "sqlalchemy", "pyproj"):
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            versions[package] = None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def get_import_profile(repeat: int = 3, top: int = 15) -> dict:
+    """
+    새 프로세스에서 `import main`에 걸리는 시간(worker 시작 비용)과
+    -X importtime 기준 누적 시간이 큰 모듈을 측정한다.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, "-c", "import main"]
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=root, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+
+    # "import time: self [us] | cumulative | imported package" 형식
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=root, check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3 or not line.startswith("import time:"):
+            continue
+        try:
+            cumulative = int(fields[1])
+        except ValueError:
+            continue
+        modules.append({"module": fields[2].strip(), "cumulative_ms": cumulative / 1000})
+    modules.sort(key=lambda module: module["cumulative_ms"], reverse=True)
+
+    return {"import_main_seconds": statistics.median(durations), "top_modules": modules[:top]}
+
+
+def run(args) -> dict:
+    scale = SCALES[args.scale]
+    context = {"scale": scale, "frames": generate(scale, args.seed)}
+    session = None
+    if args.database:
+        from fastapi.testclient import TestClient
+        from db.session import SessionLocal
+        from main import app
+
+        session = SessionLocal()
+        context["db"] = session
+        context["client"] = TestClient(app)
+
+    results = {}
+    try:
+        for name, database, setup in BENCHMARKS:
+            if (database and not args.database) or (args.filter and args.filter not in name):
+                continue
+            try:
+                results[name] = measure(setup(context), args.repeat, args.warmup)
+                print("{:<35} median {:>10.2f} ms   p95 {:>10.2f} ms".format(
+                    name, results[name]["median"] * 1000, results[name]["p95"] * 1000))
+            except Exception as e:
+                results[name] = {"error": repr(e)}
+                print("{:<35} error {}".format(name, e))
+    finally:
+        if session is not None:
+            session.close()
+
+    report = {"environment": get_environment(), "scale": args.scale, "seed": args.seed, "results": results}
+    if args.import_profile:
+        try:
+            report["import_profile"] = get_import_profile()
+            print("{:<35} {:>10.2f} ms".format("import main", report["import_profile"]["import_main_seconds"] * 1000))
+        except (OSError, subprocess.CalledProcessError) as e:
+            print("{:<35} error {}".format("import main", e))
+    return report
+
+
+def save(report: dict) -> str:
+    os.makedirs(RESULT_PATH, exist_ok=True)
+    file_name = "{}-{}.json".format(time.strftime("%Y%m%d-%H%M%S"), report["environment"]["commit"] or "unknown")
+    path = os.path.join(RESULT_PATH, file_name)
+    with open(path, "w", encoding="utf-8") as fw:
+        json.dump(report, fw, indent=2, ensure_ascii=False)
+    return path
+
+
+def compare(base_path: str, target_path: str, threshold: float) -> bool:
+    """
+    두 결과 파일의 median을 비교해 출력한다. threshold배 이상 느려진 항목이 있으면 False
+    """
+    with open(base_path, encoding="utf-8") as fr:
+        base = json.load(fr)
+    with open(target_path, encoding="utf-8") as fr:
+        target = json.load(fr)
+
+    print("{} ({}) -> {} ({})".format(base["environment"]["commit"], base["scale"],
+                                      target["environment"]["commit"], target["scale"]))
+    passed = True
+    for name in sorted(set(base["results"]) | set(target["results"])):
+        before, after = base["results"].get(name, {}), target["results"].get(name, {})
+        if "median" not in before or "median" not in after:
+            print("{:<35} {}".format(name, "missing" if not before or not after else "error"))
+            continue
+        ratio = after["median"] / before["median"]
+        mark = ""
+        if ratio >= threshold:
+            mark, passed = "  REGRESSION", False
+        print("{:<35} {:>10.2f} ms -> {:>10.2f} ms  x{:.2f}{}".format(
+            name, before["median"] * 1000, after["median"] * 1000, ratio, mark))
+    return passed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="gb-stat 성능 벤치마크")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--filter", default=None, help="이름에 이 문자열이 들어간 항목만 실행")
+    parser.add_argument("--database", action="store_true", help="Postgres가 필요한 repository/endpoint 항목도 실행")
+    parser.add_argument("--import-profile", action="store_true", help="새 프로세스의 import main 시간과 느린 모듈도 측정")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "TARGET"))
+    parser.add_argument("--threshold", type=float, default=1.2, help="--compare에서 회귀로 볼 median 배율")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(args.compare[0], args.compare[1], args.threshold) else 1)
+
+    report = run(args)
+    if not args.no_save:
+        print("saved : " + save(report))
@@ -0,0 +1,265 @@
+"""
+벤치마크용 합성 데이터 생성기
+
+ggs_stdg(시도 -> 시군구 -> 읍면동), ggs_cmmn, ggs_data_info, ggs_statis를 원하는 규모로 만들어
+로컬 Postgres에 적재하고, 지역 중심점 파일(REGION_GEOMETRY_PATH 형식)도 함께 저장한다.
+
+    python -m benchmarks.synthetic_data --scale small --database-url postgresql://user:pw@localhost/gb_stat_bench
+"""
+import argparse
+import io
+import os
+from dataclasses import dataclass, replace
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+MONTH_COLUMNS = ["jan", "feb", "mar", "apr", "may", "jun", "july", "aug", "sep", "oct", "nov", "dec"]
+QUARTER_COLUMNS = ["qu_1", "qu_2", "qu_3", "qu_4"]
+HALF_COLUMNS = ["ht_1", "ht_2"]
+PERIOD_COLUMNS = MONTH_COLUMNS + QUARTER_COLUMNS + HALF_COLUMNS + ["yr_vl"]
+
+# data.get_period_unit_list의 pd_se 코드
+PD_SE_CODES = {"month": "M030001", "quarter": "M030002", "half": "M030003", "year": "M030004"}
+CATEGORY_CODES = ["M010001", "M010002", "M010003", "M010004"]
+
+
+@dataclass
+class SyntheticScale:
+    n_sido: int
+    n_sgg_per_sido: int
+    n_emd_per_sgg: int
+    year_from: int
+    year_to: int
+    n_variables: int
+
+
+SCALES = {
+    "tiny": SyntheticScale(1, 5, 5, 2020, 2022, 8),
+    "small": SyntheticScale(1, 23, 15, 2015, 2023, 40),
+    "medium": SyntheticScale(2, 23, 20, 2010, 2023, 150),
+    "large": SyntheticScale(17, 15, 20, 2014, 2023, 60),
+}
+
+DDL = [
+    """
+    create table if not exists ggs_stdg (
+        stdg_cd varchar(10) primary key,
+        stdg_nm varchar(200),
+        stdg_ctpv_up_cd varchar(10),
+        stdg_sgg_up_cd varchar(10)
+    )
+    """,
+    """
+    create table if not exists ggs_cmmn (
+        cmmn_cd varchar(7) primary key,
+        lclsf_cmmn_cd varchar(7) not null,
+        cmmn_cd_nm varchar(200),
+        indct_orr numeric(10),
+        etc_cn_1 varchar(2000), etc_cn_2 varchar(2000), etc_cn_3 varchar(2000), etc_cn_4 varchar(2000),
+        etc_cn_5 varchar(2000),
+        cmmn_cd_rmrk varchar(4000),
+        use_yn varchar(1),
+        frst_reg_dt timestamp,
+        last_mdfcn_dt timestamp
+    )
+    """,
+    """
+    create table if not exists ggs_data_info (
+        dat_no varchar(10) primary key,
+        clsf_cd varchar(7), dat_nm varchar(50), rgn_se varchar(7), pd_se varchar(7),
+        rel_dat_list_nm varchar(200), rel_tbl_nm varchar(200), rel_fild_nm varchar(100), dat_src varchar(200),
+        updt_cyle varchar(50), dat_scop_bgng varchar(50), dat_scop_end varchar(50), rmk text,
+        indct_orr numeric(10), use_yn boolean, dat_last_reg_ymd varchar(8),
+        frst_reg_dt timestamp, last_mdfcn_dt timestamp
+    )
+    """,
+    "create table if not exists ggs_user_data_info (like ggs_data_info including all)",
+    """
+    create table if not exists ggs_statis (
+        yr varchar(4), stdg_cd varchar(10), dat_no varchar(7),
+        {periods},
+        frst_reg_dt timestamp, last_mdfcn_dt timestamp,
+        primary key (yr, stdg_cd, dat_no)
+    )
+    """.format(periods=", ".join(column + " numeric(15)" for column in PERIOD_COLUMNS)),
+    "create table if not exists ggs_user_statis (like ggs_statis including all)",
+    "create index if not exists ggs_statis_dat_no on ggs_statis (dat_no)",
+]
+
+
+def generate_regions(scale: SyntheticScale, seed: int = 0) -> pd.DataFrame:
+    """
+    시도(XX00000000) -> 시군구(XXYYY00000) -> 읍면동(XXYYYZZZ00) 계층의 지역 코드와 EPSG:5179 중심점
+    """
+    rng = np.random.RandomState(seed)
+    rows = []
+    for i in range(scale.n_sido):
+        sido_cd = "{:02d}00000000".format(47 - i if i < 47 else i)
+        sido_x, sido_y = rng.uniform(950000, 1150000), rng.uniform(1700000, 2000000)
+        rows.append((sido_cd, f"합성시도{i + 1}", None, None, sido_x, sido_y))
+        for j in range(scale.n_sgg_per_sido):
+            sgg_cd = sido_cd[:2] + "{:03d}".format(110 + j * 10) + "00000"
+            sgg_x, sgg_y = sido_x + rng.normal(0, 40000), sido_y + rng.normal(0, 40000)
+            rows.append((sgg_cd, f"합성시도{i + 1} 시군구{j + 1}", sido_cd, None, sgg_x, sgg_y))
+            for k in range(scale.n_emd_per_sgg):
+                emd_cd = sgg_cd[:5] + "{:03d}".format(250 + k) + "00"
+                rows.append((emd_cd, f"합성시도{i + 1} 시군구{j + 1} 읍면동{k + 1}", sido_cd, sgg_cd,
+                             sgg_x + rng.normal(0, 5000), sgg_y + rng.normal(0, 5000)))
+    return pd.DataFrame(rows, columns=["stdg_cd", "stdg_nm", "stdg_ctpv_up_cd", "stdg_sgg_up_cd", "x", "y"])
+
+
+def generate_cmmn() -> pd.DataFrame:
+    rows = [(code, "M010000", f"합성분류{i + 1}", i + 1, "Y") for i, code in enumerate(CATEGORY_CODES)]
+    rows += [(code, "M030000", name, i + 1, "Y") for i, (name, code) in enumerate(PD_SE_CODES.items())]
+    rows += [("M040001", "M040000", "시도", 1, "Y"), ("M040003", "M040000", "시군구", 2, "Y"),
+             ("M040004", "M040000", "읍면동", 3, "Y")]
+    return pd.DataFrame(rows, columns=["cmmn_cd", "lclsf_cmmn_cd", "cmmn_cd_nm", "indct_orr", "use_yn"])
+
+
+def generate_data_info(scale: SyntheticScale, seed: int = 0) -> pd.DataFrame:
+    """
+    변수 목록. 기간 단위는 year, half, quarter, month 순으로 돌아가며 배정한다.
+    """
+    rng = np.random.RandomState(seed)
+    period_units = list(PD_SE_CODES)
+    rows = []
+    for i in range(scale.n_variables):
+        period_unit = period_units[::-1][i % len(period_units)]
+        rows.append({
+            "dat_no": "S{:06d}".format(i + 1),
+            "clsf_cd": CATEGORY_CODES[i % len(CATEGORY_CODES)],
+            "dat_nm": f"합성변수{i + 1}",
+            "rgn_se": "M040004",
+            "pd_se": PD_SE_CODES[period_unit],
+            "rel_dat_list_nm": f"합성목록{i // 5 + 1}",
+            "dat_src": rng.choice(["통계청", "경상북도"]),
+            "updt_cyle": period_unit,
+            "dat_scop_bgng": str(scale.year_from),
+            "dat_scop_end": str(scale.year_to),
+            "indct_orr": i + 1,
+            "use_yn": True,
+            "dat_last_reg_ymd": "20240101",
+        })
+    return pd.DataFrame(rows)
+
+
+def generate_statis(regions: pd.DataFrame, data_info: pd.DataFrame, scale: SyntheticScale,
+                    seed: int = 0) -> pd.DataFrame:
+    """
+    (연도 x 지역 x 변수) 행. 변수끼리 상관이 생기도록 지역/연도 공통 요인에 변수별 계수와 잡음을 더한다.
+    월 값을 만들고 분기, 반기, 연 값은 월 합계로 채운다. 변수의 기간 단위보다 세부 기간은 비워 둔다.
+    """
+    rng = np.random.RandomState(seed)
+    years = np.arange(scale.year_from, scale.year_to + 1)
+    n_region, n_year, n_variable = len(regions), len(years), len(data_info)
+
+    region_factor = rng.lognormal(0, 0.5, size=n_region)
+    year_factor = 1 + 0.03 * (years - years[0])
+    loading = rng.uniform(0.5, 2.0, size=n_variable)
+    base = rng.lognormal(7, 1, size=n_variable)
+    season = 1 + 0.2 * np.sin(np.linspace(0, 2 * np.pi, 12, endpoint=False))
+
+    # (연도, 지역, 변수, 월)
+    level = base * (region_factor[None, :, None] ** loading) * year_factor[:, None, None]
+    month = level[..., None] * season * rng.lognormal(0, 0.1, size=(n_year, n_region, n_variable, 12))
+    month = np.round(month.reshape(-1, 12))
+    quarter = month.reshape(-1, 4, 3).sum(axis=2)
+    half = month.reshape(-1, 2, 6).sum(axis=2)
+    values = np.column_stack([month, quarter, half, month.sum(axis=1)])
+
+    pd_se = np.tile(data_info["pd_se"].to_numpy(), n_year * n_region)
+    values[pd_se != PD_SE_CODES["month"], :12] = np.nan
+    values[~np.isin(pd_se, [PD_SE_CODES["month"], PD_SE_CODES["quarter"]]), 12:16] = np.nan
+    values[np.isin(pd_se, [PD_SE_CODES["year"]]), 16:18] = np.nan
+
+    # 실제 데이터처럼 일부 지역/연도는 비어 있다
+    values[rng.rand(len(values)) < 0.02] = np.nan
+
+    statis = pd.DataFrame(values, columns=PERIOD_COLUMNS)
+    statis.insert(0, "dat_no", np.tile(data_info["dat_no"].to_numpy(), n_year * n_region))
+    statis.insert(0, "stdg_cd", np.tile(np.repeat(regions["stdg_cd"].to_numpy(), n_variable), n_year))
+    statis.insert(0, "yr", np.repeat(years.astype(str), n_region * n_variable))
+    return statis
+
+
+def generate(scale: SyntheticScale, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    regions = generate_regions(scale, seed)
+    data_info = generate_data_info(scale, seed)
+    return {
+        "ggs_stdg": regions,
+        "ggs_cmmn": generate_cmmn(),
+        "ggs_data_info": data_info,
+        "ggs_statis": generate_statis(regions, data_info, scale, seed),
+    }
+
+
+def _copy_frame(cursor, table_name: str, df: pd.DataFrame, chunk_size: int = 100000) -> None:
+    copy_query = "COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '')".format(table_name, ", ".join(df.columns))
+    for start in range(0, len(df), chunk_size):
+        buffer = io.StringIO()
+        df.iloc[start:start + chunk_size].to_csv(buffer, index=False, header=False, float_format="%.0f")
+        buffer.seek(0)
+        cursor.copy_expert(copy_query, buffer)
+
+
+def load(frames: Dict[str, pd.DataFrame], database_url: str) -> None:
+    """
+    테이블이 없으면 만들고 기존 데이터를 비운 뒤 COPY로 적재한다.
+    """
+    from sqlalchemy import create_engine
+
+    engine = create_engine(database_url)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for ddl in DDL:
+            cursor.execute(ddl)
+        cursor.execute("truncate ggs_stdg, ggs_cmmn, ggs_data_info, ggs_user_data_info, ggs_statis, ggs_user_statis")
+
+        now = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+        for table_name, df in frames.items():
+            if table_name == "ggs_stdg":
+                df = df.drop(columns=["x", "y"])
+            else:
+                df = df.assign(frst_reg_dt=now, last_mdfcn_dt=now)
+            _copy_frame(cursor, table_name, df)
+        cursor.execute("analyze")
+        connection.commit()
+    finally:
+        connection.close()
+        engine.dispose()
+
+
+def save_region_centroids(regions: pd.DataFrame, path: str) -> None:
+    """
+    core.region_geometry가 읽는 (stdg_cd, x, y) parquet 파일
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    regions.loc[:, ["stdg_cd", "x", "y"]].to_parquet(path, index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="합성 ggs_statis 데이터 생성")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--n-variables", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=os.getenv("BENCHMARK_DATABASE_URL"))
+    parser.add_argument("--region-output", default=None, help="지역 중심점 parquet 저장 경로")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    if args.n_variables:
+        scale = replace(scale, n_variables=args.n_variables)
+
+    frames = generate(scale, args.seed)
+    print({table_name: len(df) for table_name, df in frames.items()})
+
+    if args.region_output:
+        save_region_centroids(frames["ggs_stdg"], args.region_output)
+    if args.database_url:
+        load(frames, args.database_url)
+        print("loaded into " + args.database_url.rsplit("@", 1)[-1])
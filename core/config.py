@@ -17,6 +17,53 @@ class Settings:
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", 5432)  # default postgres port is 5432
     POSTGRES_DB: str = os.getenv("POSTGRES_DB")
     DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    DB_FETCH_CHUNK_SIZE: int = int(os.getenv("DB_FETCH_CHUNK_SIZE", 50000))
+
+    ANALYSIS_CACHE_ENABLED: bool = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+    ANALYSIS_CACHE_PATH: str = os.getenv("ANALYSIS_CACHE_PATH", "./cache/analysis_cache.sqlite3")
+    ANALYSIS_CACHE_MAX_BYTES: int = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+    ANALYSIS_JOB_DB_PATH: str = os.getenv("ANALYSIS_JOB_DB_PATH", "./cache/analysis_job.sqlite3")
+    ANALYSIS_JOB_WORKERS: int = int(os.getenv("ANALYSIS_JOB_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+    ANALYSIS_JOB_MAX_QUEUE: int = int(os.getenv("ANALYSIS_JOB_MAX_QUEUE", 100))
+    ANALYSIS_JOB_TTL_SECONDS: int = int(os.getenv("ANALYSIS_JOB_TTL_SECONDS", 60 * 60))
+
+    ANALYSIS_MOMENT_DB_PATH: str = os.getenv("ANALYSIS_MOMENT_DB_PATH", "./cache/analysis_moment.sqlite3")
+
+    ANALYSIS_FRAME_DTYPE: str = os.getenv("ANALYSIS_FRAME_DTYPE", "float64")  # float32로 바꾸면 메모리가 절반
+    ANALYSIS_MAX_FRAME_BYTES: int = int(os.getenv("ANALYSIS_MAX_FRAME_BYTES", 1024 * 1024 * 1024))
+
+    SNAPSHOT_ENABLED: bool = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+    SNAPSHOT_PATH: str = os.getenv("SNAPSHOT_PATH", "./cache/snapshot/")
+
+    SERVER_BIND: str = os.getenv("SERVER_BIND", "0.0.0.0:11100")
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", 0))  # 0이면 사용 가능한 CPU 수로 정한다
+    SERVER_MAX_WORKERS: int = int(os.getenv("SERVER_MAX_WORKERS", 8))
+    SERVER_PRELOAD: bool = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+    SERVER_TIMEOUT_SECONDS: int = int(os.getenv("SERVER_TIMEOUT_SECONDS", 120))
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", 60))
+    SERVER_KEEPALIVE_SECONDS: int = int(os.getenv("SERVER_KEEPALIVE_SECONDS", 5))
+    WORKER_MAX_REQUESTS: int = int(os.getenv("WORKER_MAX_REQUESTS", 1000))
+    WORKER_MAX_REQUESTS_JITTER: int = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", 100))
+    WORKER_MAX_RSS_MB: int = int(os.getenv("WORKER_MAX_RSS_MB", 1536))  # 0이면 RSS로 재시작하지 않는다
+    WORKER_RSS_CHECK_SECONDS: float = float(os.getenv("WORKER_RSS_CHECK_SECONDS", 10))
+    PROMETHEUS_MULTIPROC_DIR: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/gb_stat_metrics/")
+
+    FONT_PATH: str = os.getenv("FONT_PATH", "./static/font/")
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    QUERY_STATS_ENABLED: bool = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+    QUERY_STATS_MAX_STATEMENTS: int = int(os.getenv("QUERY_STATS_MAX_STATEMENTS", 500))
+    SLOW_QUERY_SECONDS: float = float(os.getenv("SLOW_QUERY_SECONDS", 1.0))
+
+    MODEL_REGISTRY_PATH: str = os.getenv("MODEL_REGISTRY_PATH", "./output/models/")
+    MODEL_REGISTRY_MAX_LOADED: int = int(os.getenv("MODEL_REGISTRY_MAX_LOADED", 32))
+    MODEL_REGISTRY_MAX_MODELS: int = int(os.getenv("MODEL_REGISTRY_MAX_MODELS", 1000))
+    MODEL_REGISTRY_TTL_SECONDS: int = int(os.getenv("MODEL_REGISTRY_TTL_SECONDS", 7 * 24 * 60 * 60))
+
+    REGION_GEOMETRY_PATH: str = os.getenv("REGION_GEOMETRY_PATH", "./static/geometry/region_centroid.parquet")
+    REGION_GEOMETRY_CRS: str = os.getenv("REGION_GEOMETRY_CRS", "EPSG:5179")
 
 
 class SettingsDeploy:
@@ -29,6 +76,53 @@ class SettingsDeploy:
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", 6543)  # default postgres port is 5432
     POSTGRES_DB: str = os.getenv("POSTGRES_DB")
     DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    DB_FETCH_CHUNK_SIZE: int = int(os.getenv("DB_FETCH_CHUNK_SIZE", 50000))
+
+    ANALYSIS_CACHE_ENABLED: bool = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+    ANALYSIS_CACHE_PATH: str = os.getenv("ANALYSIS_CACHE_PATH", "./cache/analysis_cache.sqlite3")
+    ANALYSIS_CACHE_MAX_BYTES: int = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+    ANALYSIS_JOB_DB_PATH: str = os.getenv("ANALYSIS_JOB_DB_PATH", "./cache/analysis_job.sqlite3")
+    ANALYSIS_JOB_WORKERS: int = int(os.getenv("ANALYSIS_JOB_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+    ANALYSIS_JOB_MAX_QUEUE: int = int(os.getenv("ANALYSIS_JOB_MAX_QUEUE", 100))
+    ANALYSIS_JOB_TTL_SECONDS: int = int(os.getenv("ANALYSIS_JOB_TTL_SECONDS", 60 * 60))
+
+    ANALYSIS_MOMENT_DB_PATH: str = os.getenv("ANALYSIS_MOMENT_DB_PATH", "./cache/analysis_moment.sqlite3")
+
+    ANALYSIS_FRAME_DTYPE: str = os.getenv("ANALYSIS_FRAME_DTYPE", "float64")  # float32로 바꾸면 메모리가 절반
+    ANALYSIS_MAX_FRAME_BYTES: int = int(os.getenv("ANALYSIS_MAX_FRAME_BYTES", 1024 * 1024 * 1024))
+
+    SNAPSHOT_ENABLED: bool = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+    SNAPSHOT_PATH: str = os.getenv("SNAPSHOT_PATH", "./cache/snapshot/")
+
+    SERVER_BIND: str = os.getenv("SERVER_BIND", "0.0.0.0:11100")
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", 0))  # 0이면 사용 가능한 CPU 수로 정한다
+    SERVER_MAX_WORKERS: int = int(os.getenv("SERVER_MAX_WORKERS", 8))
+    SERVER_PRELOAD: bool = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+    SERVER_TIMEOUT_SECONDS: int = int(os.getenv("SERVER_TIMEOUT_SECONDS", 120))
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", 60))
+    SERVER_KEEPALIVE_SECONDS: int = int(os.getenv("SERVER_KEEPALIVE_SECONDS", 5))
+    WORKER_MAX_REQUESTS: int = int(os.getenv("WORKER_MAX_REQUESTS", 1000))
+    WORKER_MAX_REQUESTS_JITTER: int = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", 100))
+    WORKER_MAX_RSS_MB: int = int(os.getenv("WORKER_MAX_RSS_MB", 1536))  # 0이면 RSS로 재시작하지 않는다
+    WORKER_RSS_CHECK_SECONDS: float = float(os.getenv("WORKER_RSS_CHECK_SECONDS", 10))
+    PROMETHEUS_MULTIPROC_DIR: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/gb_stat_metrics/")
+
+    FONT_PATH: str = os.getenv("FONT_PATH", "./static/font/")
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    QUERY_STATS_ENABLED: bool = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+    QUERY_STATS_MAX_STATEMENTS: int = int(os.getenv("QUERY_STATS_MAX_STATEMENTS", 500))
+    SLOW_QUERY_SECONDS: float = float(os.getenv("SLOW_QUERY_SECONDS", 1.0))
+
+    MODEL_REGISTRY_PATH: str = os.getenv("MODEL_REGISTRY_PATH", "./output/models/")
+    MODEL_REGISTRY_MAX_LOADED: int = int(os.getenv("MODEL_REGISTRY_MAX_LOADED", 32))
+    MODEL_REGISTRY_MAX_MODELS: int = int(os.getenv("MODEL_REGISTRY_MAX_MODELS", 1000))
+    MODEL_REGISTRY_TTL_SECONDS: int = int(os.getenv("MODEL_REGISTRY_TTL_SECONDS", 7 * 24 * 60 * 60))
+
+    REGION_GEOMETRY_PATH: str = os.getenv("REGION_GEOMETRY_PATH", "./static/geometry/region_centroid.parquet")
+    REGION_GEOMETRY_CRS: str = os.getenv("REGION_GEOMETRY_CRS", "EPSG:5179")
 
 
 settings = SettingsDeploy()
@@ -1,4 +1,6 @@
-import pyproj
+from functools import lru_cache
+
+import numpy as np
 
 # 허용 하는 좌표계
 ALLOWED_CRS = {
@@ -36,11 +38,34 @@ def convert_coordinates(given_x: float, given_y: float, given_crs: str):
     if given_crs not in ALLOWED_CRS:
         raise Exception("지원하지 않는 좌표계입니다 : {}".format(given_crs))
 
-    transformer = pyproj.Transformer.from_crs(given_crs, TARGET_CRS, always_xy=True)
+    transformer = get_transformer(given_crs)
     converted_x, converted_y = transformer.transform(given_x, given_y)
     return converted_x, converted_y
 
 
+@lru_cache(maxsize=None)
+def get_transformer(given_crs: str) -> "pyproj.Transformer":
+    """
+    좌표계별 Transformer는 만드는 비용이 크므로 한 번만 만들어 재사용한다
+    pyproj는 처음 변환할 때 불러온다.
+    """
+    import pyproj
+
+    return pyproj.Transformer.from_crs(given_crs, TARGET_CRS, always_xy=True)
+
+
+def convert_coordinates_array(given_x, given_y, given_crs: str):
+    """
+    좌표 배열을 한 번에 변환하는 메소드
+    """
+    if given_crs not in ALLOWED_CRS:
+        raise Exception("지원하지 않는 좌표계입니다 : {}".format(given_crs))
+
+    converted_x, converted_y = get_transformer(given_crs).transform(np.asarray(given_x, dtype=float),
+                                                                    np.asarray(given_y, dtype=float))
+    return converted_x, converted_y
+
+
 if __name__ == '__main__':
     x = 197205.189
     y = 549620.285
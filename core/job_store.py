@@ -0,0 +1,125 @@
+import fcntl
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+from core.config import settings
+
+
+class AnalysisJobStore:
+    """
+    비동기 분석 작업의 상태와 결과를 sqlite 파일에 저장한다.
+    작업을 제출한 서버 프로세스와 실행하는 worker 프로세스가 같은 파일을 보므로
+    어느 서버 worker로 polling 요청이 와도 같은 상태를 반환한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("""
+                create table if not exists analysis_job (
+                    job_id text primary key,
+                    analysis_type text not null,
+                    status text not null,
+                    submitted_at real not null,
+                    started_at real,
+                    finished_at real,
+                    error text,
+                    result text
+                )
+            """)
+            conn.execute("create index if not exists analysis_job_status on analysis_job (status)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, query: str, params: tuple = ()):
+        conn = self._connect()
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    def create(self, analysis_type: str) -> str:
+        job_id = str(uuid.uuid4())
+        self._execute(
+            "insert into analysis_job (job_id, analysis_type, status, submitted_at) values (?, ?, 'queued', ?)",
+            (job_id, analysis_type, time.time())
+        )
+        return job_id
+
+    def set_running(self, job_id: str) -> None:
+        self._execute("update analysis_job set status = 'running', started_at = ? where job_id = ?",
+                      (time.time(), job_id))
+
+    def set_done(self, job_id: str, result: str) -> None:
+        self._execute("update analysis_job set status = 'done', finished_at = ?, result = ? where job_id = ?",
+                      (time.time(), result, job_id))
+
+    def set_failed(self, job_id: str, error: str) -> None:
+        self._execute("update analysis_job set status = 'failed', finished_at = ?, error = ? where job_id = ?",
+                      (time.time(), error, job_id))
+
+    def set_failed_if_unfinished(self, job_id: str, error: str) -> None:
+        # 작업 프로세스가 결과를 기록하지 못하고 끝난 경우(프로세스 종료, 취소)에만 실패로 바꾼다
+        self._execute("update analysis_job set status = 'failed', finished_at = ?, error = ? "
+                      "where job_id = ? and status in ('queued', 'running')",
+                      (time.time(), error, job_id))
+
+    def get(self, job_id: str) -> Optional[sqlite3.Row]:
+        rows = self._execute("select * from analysis_job where job_id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def get_status(self, job_id: str) -> Optional[str]:
+        rows = self._execute("select status from analysis_job where job_id = ?", (job_id,))
+        return rows[0][0] if rows else None
+
+    def count_by_status(self) -> dict:
+        rows = self._execute("select status, count(*) from analysis_job group by status")
+        return {row[0]: row[1] for row in rows}
+
+    def delete_expired(self, ttl_seconds: int) -> None:
+        # 서버 재시작 등으로 끝나지 못한 작업도 제출 후 ttl이 지나면 함께 정리한다
+        self._execute("delete from analysis_job where coalesce(finished_at, submitted_at) < ?",
+                      (time.time() - ttl_seconds,))
+
+    @contextmanager
+    def acquire_slot(self, slots: int, poll_seconds: float = 0.2):
+        """
+        같은 호스트에서 동시에 실행되는 작업을 slots개로 제한한다.
+        {path}.slot{i} 파일 중 하나에 배타 잠금을 걸 때까지 기다리며, 프로세스가 죽으면 잠금도 풀린다.
+        """
+        handles = [open(f"{self.path}.slot{i}", "a") for i in range(slots)]
+        try:
+            while True:
+                for handle in handles:
+                    try:
+                        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+                    return
+                time.sleep(poll_seconds)
+        finally:
+            for handle in handles:
+                handle.close()
+
+
+analysis_job_store = AnalysisJobStore(settings.ANALYSIS_JOB_DB_PATH)
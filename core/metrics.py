@@ -0,0 +1,143 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, REGISTRY, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+
+from core.config import settings
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+ANALYSIS_STAGE_SECONDS = Histogram("analysis_stage_seconds", "분석 단계별 소요 시간",
+                                   ["analysis_type", "stage"], buckets=STAGE_BUCKETS)
+HTTP_REQUEST_SECONDS = Histogram("http_request_seconds", "route별 요청 처리 시간",
+                                 ["method", "route", "status"], buckets=STAGE_BUCKETS)
+
+# 요청 하나에서 기록된 (단계, 초) 목록. TimingMiddleware가 요청마다 새 list를 넣는다
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+_analysis_type: ContextVar[str] = ContextVar("analysis_type", default="-")
+
+
+@contextmanager
+def analysis_context(analysis_type: str):
+    """
+    안쪽에서 기록되는 stage_timer의 analysis_type label을 정한다.
+    """
+    token = _analysis_type.set(analysis_type)
+    try:
+        yield
+    finally:
+        _analysis_type.reset(token)
+
+
+def iter_with_analysis_context(analysis_type: str, iterator: Iterator) -> Iterator:
+    """
+    StreamingResponse처럼 next()가 호출마다 다른 thread에서 실행되는 generator에 analysis_type label을 붙인다.
+    """
+    iterator = iter(iterator)
+    while True:
+        with analysis_context(analysis_type):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    블록의 소요 시간을 analysis_stage_seconds histogram과 현재 요청의 Server-Timing 목록에 기록한다.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        ANALYSIS_STAGE_SECONDS.labels(_analysis_type.get(), stage).observe(seconds)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, seconds))
+
+
+def get_server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    """
+    같은 단계는 합쳐서 "sql;dur=12.3, pivot;dur=4.5, total;dur=20.1" 형태로 만든다. 단위는 ms
+    """
+    durations = {}
+    for stage, seconds in timings:
+        durations[stage] = durations.get(stage, 0) + seconds
+    durations["total"] = total
+    return ", ".join("{};dur={:.1f}".format(stage, seconds * 1000) for stage, seconds in durations.items())
+
+
+def _get_route_path(scope) -> str:
+    # 경로 변수 값이 아닌 route 경로(/data/region/{stdg_cd}/nearest)를 label로 써서 label 수를 제한한다
+    app = scope.get("app")
+    for route in getattr(app, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class TimingMiddleware:
+    """
+    요청별 처리 시간을 http_request_seconds histogram에 기록하고,
+    응답 헤더가 나가기 전까지 기록된 단계별 시간을 Server-Timing 헤더로 붙인다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing",
+                                get_server_timing(timings, time.perf_counter() - start).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], _get_route_path(scope), str(status_code)) \
+                .observe(time.perf_counter() - start)
+
+
+def get_metrics(request: Request) -> Response:
+    """
+    Prometheus text 형식의 metric. PROMETHEUS_MULTIPROC_DIR가 있으면 모든 worker의 값을 합친다.
+    """
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def setup_metrics(app) -> None:
+    if not settings.METRICS_ENABLED:
+        return
+    app.add_middleware(TimingMiddleware)
+    app.add_route("/metrics", get_metrics, include_in_schema=False)
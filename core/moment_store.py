@@ -0,0 +1,183 @@
+import os
+import sqlite3
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from core.config import settings
+
+MOMENT_COLUMNS = ["n", "sum_a", "sum_b", "sum_aa", "sum_bb", "sum_ab"]
+
+
+class PairMomentStore:
+    """
+    변수 쌍(dat_no_a <= dat_no_b), 기간 단위, 연도별 충분통계량(개수, 합, 제곱합, 곱의 합) 저장소
+    두 변수가 모두 있는 관측치만 더하므로 연도 범위의 행을 합하면 그 범위의 상관계수, 공분산을 바로 구할 수 있다.
+    변수별 데이터 버전(last_mdfcn_dt)을 함께 저장해 바뀐 변수의 행만 다시 계산한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("""
+                create table if not exists pair_moment (
+                    dat_no_a text not null,
+                    dat_no_b text not null,
+                    period_unit text not null,
+                    yr text not null,
+                    n integer not null,
+                    sum_a real not null,
+                    sum_b real not null,
+                    sum_aa real not null,
+                    sum_bb real not null,
+                    sum_ab real not null,
+                    primary key (dat_no_a, dat_no_b, period_unit, yr)
+                )
+            """)
+            conn.execute("""
+                create table if not exists moment_version (
+                    dat_no text not null,
+                    period_unit text not null,
+                    version text not null,
+                    primary key (dat_no, period_unit)
+                )
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def get_versions(self, dat_no_list: List[str], period_unit: str) -> Dict[str, str]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "select dat_no, version from moment_version where period_unit = ? and dat_no in ({})".format(
+                    ",".join("?" * len(dat_no_list))),
+                (period_unit, *dat_no_list)
+            ).fetchall()
+            return dict(rows)
+        finally:
+            conn.close()
+
+    def get_partners(self, dat_no_list: List[str], period_unit: str) -> List[str]:
+        """
+        dat_no_list의 변수와 쌍으로 저장된 적이 있는 변수 목록 (dat_no_list 포함)
+        """
+        placeholder = ",".join("?" * len(dat_no_list))
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "select dat_no_a, dat_no_b from pair_moment where period_unit = ? "
+                "and (dat_no_a in ({0}) or dat_no_b in ({0})) group by dat_no_a, dat_no_b".format(placeholder),
+                (period_unit, *dat_no_list, *dat_no_list)
+            ).fetchall()
+        finally:
+            conn.close()
+        return sorted({dat_no for row in rows for dat_no in row})
+
+    def get_years(self, dat_no_list: List[str], period_unit: str) -> Dict[tuple, set]:
+        """
+        저장된 (dat_no_a, dat_no_b)별 연도 집합
+        """
+        result = {}
+        for dat_no_a, dat_no_b, yr in self._select(dat_no_list, period_unit, "dat_no_a, dat_no_b, yr"):
+            result.setdefault((dat_no_a, dat_no_b), set()).add(yr)
+        return result
+
+    def get_moments(self, dat_no_list: List[str], period_unit: str, year_from: str = None,
+                    year_to: str = None) -> pd.DataFrame:
+        """
+        연도 범위의 행을 변수 쌍별로 합한 DataFrame (dat_no_a, dat_no_b, n, sum_a, ...)
+        """
+        rows = self._select(dat_no_list, period_unit,
+                            "dat_no_a, dat_no_b, sum(n), sum(sum_a), sum(sum_b), sum(sum_aa), sum(sum_bb), sum(sum_ab)",
+                            year_from, year_to, group_by="dat_no_a, dat_no_b")
+        return pd.DataFrame(rows, columns=["dat_no_a", "dat_no_b"] + MOMENT_COLUMNS)
+
+    def _select(self, dat_no_list, period_unit, columns, year_from=None, year_to=None, group_by=None):
+        placeholder = ",".join("?" * len(dat_no_list))
+        query = "select {} from pair_moment where period_unit = ? and dat_no_a in ({}) and dat_no_b in ({})".format(
+            columns, placeholder, placeholder)
+        params = [period_unit, *dat_no_list, *dat_no_list]
+        if year_from is not None:
+            query += " and yr >= ?"
+            params.append(str(year_from))
+        if year_to is not None:
+            query += " and yr <= ?"
+            params.append(str(year_to))
+        if group_by is not None:
+            query += " group by " + group_by
+
+        conn = self._connect()
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    def put(self, period_unit: str, moments: pd.DataFrame, versions: Dict[str, str] = None,
+            replace_dat_no_list: List[str] = None) -> None:
+        """
+        연도별 충분통계량 행(dat_no_a, dat_no_b, yr, n, sum_a, ...)을 한 트랜잭션으로 저장한다.
+        replace_dat_no_list를 주면 해당 변수가 들어간 기존 행을 먼저 지운다. (데이터 버전이 바뀐 경우)
+        """
+        conn = self._connect()
+        try:
+            conn.execute("begin immediate")
+            for dat_no in replace_dat_no_list or []:
+                conn.execute("delete from pair_moment where period_unit = ? and (dat_no_a = ? or dat_no_b = ?)",
+                             (period_unit, dat_no, dat_no))
+            conn.executemany(
+                "insert or replace into pair_moment (dat_no_a, dat_no_b, period_unit, yr, {}) "
+                "values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)".format(", ".join(MOMENT_COLUMNS)),
+                [(row.dat_no_a, row.dat_no_b, period_unit, str(row.yr), int(row.n), float(row.sum_a),
+                  float(row.sum_b), float(row.sum_aa), float(row.sum_bb), float(row.sum_ab))
+                 for row in moments.itertuples(index=False)]
+            )
+            for dat_no, version in (versions or {}).items():
+                conn.execute("insert or replace into moment_version (dat_no, period_unit, version) values (?, ?, ?)",
+                             (dat_no, period_unit, version))
+            conn.execute("commit")
+        except sqlite3.Error:
+            conn.execute("rollback")
+            raise
+        finally:
+            conn.close()
+
+
+def get_pair_moments(values: pd.DataFrame) -> pd.DataFrame:
+    """
+    한 연도의 (관측치 x dat_no) DataFrame에서 변수 쌍별 충분통계량을 행렬곱으로 한 번에 구한다.
+    결측은 0으로 두고 존재 여부 행렬 M과 곱해 두 변수가 모두 있는 관측치만 더한다.
+    """
+    columns = list(values.columns)
+    mask = values.notna().to_numpy(dtype=float)
+    X = values.fillna(0).to_numpy(dtype=float)
+
+    n = mask.T @ mask
+    sum_a = X.T @ mask
+    sum_aa = (X * X).T @ mask
+    sum_ab = X.T @ X
+
+    a_index, b_index = np.triu_indices(len(columns))
+    return pd.DataFrame({
+        "dat_no_a": np.asarray(columns)[a_index],
+        "dat_no_b": np.asarray(columns)[b_index],
+        "n": n[a_index, b_index],
+        "sum_a": sum_a[a_index, b_index],
+        "sum_b": sum_a.T[a_index, b_index],
+        "sum_aa": sum_aa[a_index, b_index],
+        "sum_bb": sum_aa.T[a_index, b_index],
+        "sum_ab": sum_ab[a_index, b_index]
+    })
+
+
+pair_moment_store = PairMomentStore(settings.ANALYSIS_MOMENT_DB_PATH)
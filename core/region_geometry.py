@@ -0,0 +1,179 @@
+import os
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.config import settings
+from core.crs_converter import TARGET_CRS, convert_coordinates_array
+from utils.logging_module import logger
+
+
+REGION_LEVELS = ("sido", "sgg", "emd")
+
+
+def get_region_level(stdg_cd_list) -> np.ndarray:
+    """
+    법정동코드(10자리)의 행정 단위를 구한다.
+    시도는 뒤 8자리, 시군구는 뒤 5자리, 읍면동은 뒤 2자리가 0이다.
+    """
+    codes = pd.Series(np.asarray(stdg_cd_list).astype(str)).str.pad(10, side="right", fillchar="0")
+    return np.select([codes.str[2:] == "00000000", codes.str[5:] == "00000", codes.str[8:] == "00"],
+                     ["sido", "sgg", "emd"], default="ri")
+
+
+class RegionGeometryIndex:
+    """
+    stdg_cd(법정동코드)별 지역 중심점 좌표 테이블
+    서비스와 함께 배포되는 Parquet(stdg_cd, x, y 컬럼) 파일을 읽어
+    TARGET_CRS로 변환해 둔다. 프로세스당 한 번만 만들어 get_region_geometry_index()로 공유한다.
+    최근접/반경 검색을 위해 전체 지역과 행정 단위(sido, sgg, emd)별 cKDTree를 함께 만든다.
+    """
+
+    def __init__(self, codes: np.ndarray, x: np.ndarray, y: np.ndarray):
+        from scipy.spatial import cKDTree
+
+        self.codes = pd.Index(codes.astype(str))
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.levels = get_region_level(self.codes)
+
+        # level별 (전체 배열에서의 위치, 트리), None은 전체 지역
+        valid = ~(np.isnan(self.x) | np.isnan(self.y))
+        self.trees = {}
+        for level in (None,) + REGION_LEVELS:
+            positions = np.flatnonzero(valid if level is None else valid & (self.levels == level))
+            if len(positions):
+                self.trees[level] = (positions, cKDTree(np.column_stack([self.x[positions], self.y[positions]])))
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_file(cls, path: str, crs: str = TARGET_CRS) -> "RegionGeometryIndex":
+        df = pd.read_parquet(path, columns=["stdg_cd", "x", "y"])
+        x, y = df["x"].to_numpy(dtype=float), df["y"].to_numpy(dtype=float)
+        if crs != TARGET_CRS:
+            x, y = convert_coordinates_array(x, y, crs)
+        return cls(df["stdg_cd"].to_numpy(), x, y)
+
+    def get_centroids(self, stdg_cd_list) -> np.ndarray:
+        """
+        stdg_cd 배열에 대응하는 중심점 (n x 2) 배열을 반환한다. 없는 지역은 nan
+        """
+        positions = self.codes.get_indexer(pd.Index(np.asarray(stdg_cd_list).astype(str)))
+        centroids = np.full((len(positions), 2), np.nan)
+        found = positions >= 0
+        centroids[found, 0] = self.x[positions[found]]
+        centroids[found, 1] = self.y[positions[found]]
+        return centroids
+
+    def query_nearest(self, points: np.ndarray, k: int, region_level: str = None, exclude_self: bool = False):
+        """
+        points (n x 2, TARGET_CRS)마다 가장 가까운 지역 k개의 (stdg_cd 배열 n x k, 거리(m) 배열 n x k)
+        exclude_self면 거리가 0인 첫 번째 결과(지역 자신)를 빼고 k개를 채운다.
+        """
+        if region_level not in self.trees:
+            return np.empty((len(points), 0), dtype=object), np.empty((len(points), 0))
+
+        positions, tree = self.trees[region_level]
+        n_query = min(k + int(exclude_self), len(positions))
+        distances, neighbors = tree.query(points, k=n_query)
+        distances = distances.reshape(len(points), n_query)
+        neighbors = neighbors.reshape(len(points), n_query)
+        if exclude_self:
+            distances, neighbors = distances[:, 1:], neighbors[:, 1:]
+        return self.codes.to_numpy()[positions[neighbors]], distances
+
+    def query_radius(self, points: np.ndarray, radius: float, region_level: str = None):
+        """
+        points (n x 2, TARGET_CRS)마다 반경 radius(m) 안의 지역을 가까운 순으로 [(stdg_cd 배열, 거리 배열), ...]
+        """
+        if region_level not in self.trees:
+            return [(np.empty(0, dtype=object), np.empty(0)) for _ in range(len(points))]
+
+        positions, tree = self.trees[region_level]
+        result = []
+        for point, neighbors in zip(points, tree.query_ball_point(points, r=radius)):
+            neighbors = np.asarray(neighbors, dtype=int)
+            distances = np.hypot(tree.data[neighbors, 0] - point[0], tree.data[neighbors, 1] - point[1])
+            order = np.argsort(distances)
+            result.append((self.codes.to_numpy()[positions[neighbors[order]]], distances[order]))
+        return result
+
+
+@lru_cache(maxsize=1)
+def get_region_geometry_index() -> RegionGeometryIndex:
+    """
+    지역 중심점 테이블을 읽는다. 파일이 없으면 None
+    """
+    path = settings.REGION_GEOMETRY_PATH
+    if not path or not os.path.exists(path):
+        logger.warning("region geometry file does not exist : " + str(path))
+        return None
+
+    region_index = RegionGeometryIndex.from_file(path, settings.REGION_GEOMETRY_CRS)
+    logger.info("region geometry loaded : " + str(len(region_index)) + " regions")
+    return region_index
+
+
+@lru_cache(maxsize=32)
+def get_knn_weights(stdg_cd_tuple: Tuple[str, ...], k: int) -> "sparse.csr_matrix":
+    """
+    지역 중심점 사이의 k-최근접 이웃으로 행 표준화된 공간 가중치 행렬(n x n, 각 행에 1/k)을 만든다.
+    같은 지역 목록(보통 한 행정 단위 전체)이면 다시 만들지 않도록 프로세스 안에 캐시한다.
+    """
+    from scipy import sparse
+    from scipy.spatial import cKDTree
+
+    centroids = get_region_geometry_index().get_centroids(stdg_cd_tuple)
+    n = len(centroids)
+    if k >= n:
+        raise ValueError(f"k({k})는 지역 수({n})보다 작아야 합니다.")
+
+    # 자기 자신이 첫 번째 이웃으로 나오므로 k+1개를 찾고 첫 열을 버린다
+    _, neighbors = cKDTree(centroids).query(centroids, k=k + 1)
+    neighbors = neighbors[:, 1:]
+    weights = sparse.csr_matrix((np.full(n * k, 1 / k), (np.repeat(np.arange(n), k), neighbors.ravel())),
+                                shape=(n, n))
+    logger.info(f"knn weights built : {n} regions, k={k}")
+    return weights
+
+
+def build_region_centroids(boundary_path_list: List[str], output_path: str, code_column: str = "stdg_cd") -> int:
+    """
+    법정동 경계 파일(GeoPackage, Shapefile 등)들에서 지역 중심점 Parquet(stdg_cd, x, y)을 만든다.
+    이미지 빌드 때만 쓰므로 geopandas는 여기서만 불러온다. 만든 지역 수를 반환한다.
+    """
+    import geopandas as gpd
+
+    frames = []
+    for boundary_path in boundary_path_list:
+        gdf = gpd.read_file(boundary_path).to_crs(TARGET_CRS)
+        centroids = gdf.geometry.centroid
+        frames.append(pd.DataFrame({
+            # 경계 파일의 시도/시군구/읍면동 코드(2/5/8자리)를 10자리 법정동코드로 맞춘다
+            "stdg_cd": gdf[code_column].astype(str).str.ljust(10, "0"),
+            "x": centroids.x.to_numpy(),
+            "y": centroids.y.to_numpy()
+        }))
+    df = pd.concat(frames, ignore_index=True).drop_duplicates("stdg_cd")
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    df.to_parquet(output_path, index=False)
+    return len(df)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="법정동 경계 파일로 지역 중심점 Parquet 만들기")
+    parser.add_argument("boundary_path", nargs="+", help="시도, 시군구, 읍면동 경계 파일")
+    parser.add_argument("--output", default=settings.REGION_GEOMETRY_PATH)
+    parser.add_argument("--code-column", default="stdg_cd")
+    args = parser.parse_args()
+
+    print(f"{build_region_centroids(args.boundary_path, args.output, args.code_column)} regions -> {args.output}")
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import time
+import zlib
+from typing import Optional
+
+from core.config import settings
+from utils.logging_module import logger
+
+
+class AnalysisResultCache:
+    """
+    분석 결과를 sqlite 파일에 저장하는 content-addressed 캐시
+    같은 호스트의 모든 worker 프로세스가 하나의 파일을 공유하며, 전체 크기가 max_bytes를 넘으면
+    가장 오래 조회되지 않은 결과부터 지운다(LRU).
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("""
+                create table if not exists analysis_cache (
+                    key text primary key,
+                    value blob not null,
+                    size integer not null,
+                    last_access real not null
+                )
+            """)
+            conn.execute("create index if not exists analysis_cache_last_access on analysis_cache (last_access)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # fork된 worker에서 커넥션을 공유하지 않도록 호출할 때마다 새로 연다
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def get(self, key: str) -> Optional[bytes]:
+        conn = self._connect()
+        try:
+            row = conn.execute("select value from analysis_cache where key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("update analysis_cache set last_access = ? where key = ?", (time.time(), key))
+            return zlib.decompress(row[0])
+        finally:
+            conn.close()
+
+    def put(self, key: str, value: bytes) -> None:
+        compressed = zlib.compress(value)
+        if len(compressed) > self.max_bytes:
+            logger.warning("analysis result is larger than cache size, skip caching")
+            return
+
+        conn = self._connect()
+        try:
+            conn.execute("begin immediate")
+            conn.execute(
+                "insert or replace into analysis_cache (key, value, size, last_access) values (?, ?, ?, ?)",
+                (key, compressed, len(compressed), time.time())
+            )
+            self._evict(conn)
+            conn.execute("commit")
+        except sqlite3.Error:
+            conn.execute("rollback")
+            raise
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total_size = conn.execute("select coalesce(sum(size), 0) from analysis_cache").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in conn.execute("select key, size from analysis_cache order by last_access").fetchall():
+            if total_size <= self.max_bytes:
+                break
+            conn.execute("delete from analysis_cache where key = ?", (key,))
+            total_size -= size
+            evicted += 1
+        logger.info("analysis cache evicted " + str(evicted) + " entries")
+
+    def clear(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("delete from analysis_cache")
+        finally:
+            conn.close()
+
+
+analysis_result_cache = AnalysisResultCache(settings.ANALYSIS_CACHE_PATH, settings.ANALYSIS_CACHE_MAX_BYTES)
@@ -0,0 +1,73 @@
+import os
+import re
+import threading
+import uuid
+
+from core.config import settings
+from utils.logging_module import logger
+
+VERSION_METADATA_KEY = b"snapshot_version"
+
+
+class SnapshotStore:
+    """
+    변수(dat_no)별 통계 원자료를 Arrow IPC 파일({path}/{dat_no}.arrow)로 저장하고 memory map으로 읽는다.
+    파일 schema metadata에 데이터 버전을 넣어 두고, 버전이 다르면 없는 것으로 본다.
+    읽은 Table은 OS page cache를 공유하므로 worker 프로세스마다 메모리를 따로 쓰지 않는다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._opened = {}
+        self._lock = threading.Lock()
+
+    def _get_file_path(self, dat_no: str) -> str:
+        if not re.fullmatch(r"[0-9A-Za-z_]+", dat_no):
+            raise ValueError("invalid dat_no : " + dat_no)
+        return os.path.join(self.path, dat_no + ".arrow")
+
+    def open(self, dat_no: str, version: str):
+        """
+        버전이 일치하는 snapshot Table을 반환한다. 없거나 버전이 다르면 None
+        """
+        import pyarrow as pa
+
+        with self._lock:
+            opened = self._opened.get(dat_no)
+            if opened is not None and opened[0] == version:
+                return opened[1]
+
+        file_path = self._get_file_path(dat_no)
+        if not os.path.exists(file_path):
+            return None
+
+        table = pa.ipc.open_file(pa.memory_map(file_path, "r")).read_all()
+        if (table.schema.metadata or {}).get(VERSION_METADATA_KEY, b"").decode() != version:
+            return None
+
+        with self._lock:
+            self._opened[dat_no] = (version, table)
+        return table
+
+    def write(self, dat_no: str, version: str, table) -> None:
+        """
+        임시 파일에 쓴 뒤 rename해서 다른 worker가 쓰는 도중의 파일을 읽지 않게 한다.
+        """
+        import pyarrow as pa
+
+        os.makedirs(self.path, exist_ok=True)
+        file_path = self._get_file_path(dat_no)
+        temp_path = "{}.{}.tmp".format(file_path, uuid.uuid4())
+
+        table = table.replace_schema_metadata({VERSION_METADATA_KEY: version.encode()})
+        with pa.OSFile(temp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, file_path)
+
+        with self._lock:
+            self._opened.pop(dat_no, None)
+        logger.info(f"snapshot written : {dat_no} ({table.num_rows} rows)")
+
+
+snapshot_store = SnapshotStore(settings.SNAPSHOT_PATH)
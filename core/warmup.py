@@ -0,0 +1,58 @@
+import importlib
+import time
+
+from sqlalchemy import text
+
+from core.config import settings
+from core.crs_converter import ALLOWED_CRS, TARGET_CRS, get_transformer
+from core.region_geometry import get_region_geometry_index
+from utils.logging_module import logger
+
+# 분석 요청에서만 쓰는 무거운 모듈 (scikit-learn, statsmodels, matplotlib 등을 불러온다)
+ANALYSIS_MODULE_NAMES = [
+    "analysis_module.correlation_module",
+    "analysis_module.regression_module",
+    "analysis_module.clustering_module",
+    "analysis_module.spatial_autocorrelation_module",
+]
+
+
+def import_analysis_modules() -> None:
+    """
+    분석 모듈을 불러오고 폰트를 등록한다.
+    gunicorn preload처럼 fork 전에 호출하면 worker들이 불러온 모듈을 공유한다.
+    """
+    for module_name in ANALYSIS_MODULE_NAMES:
+        importlib.import_module(module_name)
+
+    from analysis_module.fonts import register_fonts
+    register_fonts()
+
+
+def _check_database() -> None:
+    from db.session import engine
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+
+
+def _run_step(name: str, func) -> None:
+    start = time.perf_counter()
+    try:
+        func()
+    except Exception as e:
+        logger.warning(f"warm-up {name} failed : {e}")
+        return
+    logger.info(f"warm-up {name} : {time.perf_counter() - start:.3f}s")
+
+
+def warm_up() -> None:
+    """
+    worker가 요청을 받기 전에 지역 중심점 테이블, 좌표 변환기, DB 연결을 준비하고
+    settings.WARMUP_ENABLED이면 분석 모듈까지 불러온다. 실패한 단계는 첫 요청 때 다시 시도된다.
+    """
+    _run_step("region geometry", get_region_geometry_index)
+    _run_step("crs transformer", lambda: [get_transformer(crs) for crs in ALLOWED_CRS if crs != TARGET_CRS])
+    _run_step("database", _check_database)
+    if settings.WARMUP_ENABLED:
+        _run_step("analysis modules", import_analysis_modules)
@@ -0,0 +1,147 @@
+import hashlib
+import re
+import threading
+import time
+from typing import List, Literal
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+from core.metrics import STAGE_BUCKETS
+from utils.logging_module import logger
+
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "SQL 문(fingerprint)별 실행 시간", ["fingerprint"],
+                             buckets=STAGE_BUCKETS)
+
+# 기록하는 문이 max_statements개를 넘은 뒤의 새 문은 metric label을 하나로 묶는다
+OTHER_FINGERPRINT_ID = "other"
+
+_COMMENT_PATTERN = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b")
+_LIST_PATTERN = re.compile(r"\?(?:\s*,\s*\?)+")
+_EXPLAINABLE_PATTERN = re.compile(r"^\s*(select|with|insert|update|delete)\b", re.I)
+
+
+def get_statement_fingerprint(statement: str) -> str:
+    """
+    주석, 공백, 리터럴, 바인드 파라미터를 정규화한 SQL 문
+    expanding bindparam으로 늘어난 IN 목록은 (?) 하나로 줄여서 변수 개수가 달라도 같은 문으로 본다.
+    """
+    statement = _COMMENT_PATTERN.sub(" ", statement)
+    statement = _LITERAL_PATTERN.sub("?", statement)
+    statement = _LIST_PATTERN.sub("?", statement)
+    return " ".join(statement.split()).lower()
+
+
+class QueryStatistics:
+    """
+    프로세스 안에서 SQL 문(fingerprint)별 호출 수, 누적/최대 실행 시간, 반환 행 수를 모은다.
+    max_statements개를 넘는 새 문은 기록하지 않고 OTHER_FINGERPRINT_ID를 반환한다.
+    """
+
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint: str, seconds: float, rows: int, plan: str = None) -> str:
+        fingerprint_id = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+        with self._lock:
+            statistic = self._statements.get(fingerprint_id)
+            if statistic is None:
+                if len(self._statements) >= self.max_statements:
+                    return OTHER_FINGERPRINT_ID
+                statistic = self._statements[fingerprint_id] = {
+                    "fingerprint_id": fingerprint_id, "statement": fingerprint, "calls": 0, "total_seconds": 0.0,
+                    "max_seconds": 0.0, "rows": 0, "slow_calls": 0, "last_slow_plan": None
+                }
+            statistic["calls"] += 1
+            statistic["total_seconds"] += seconds
+            statistic["max_seconds"] = max(statistic["max_seconds"], seconds)
+            statistic["rows"] += max(rows, 0)
+            if plan is not None:
+                statistic["slow_calls"] += 1
+                statistic["last_slow_plan"] = plan
+        return fingerprint_id
+
+    def top(self, limit: int = 20,
+            order_by: Literal["total_seconds", "max_seconds", "calls", "mean_seconds"] = "total_seconds") -> List[dict]:
+        with self._lock:
+            statistics = [dict(statistic, mean_seconds=statistic["total_seconds"] / statistic["calls"])
+                          for statistic in self._statements.values()]
+        return sorted(statistics, key=lambda statistic: statistic[order_by], reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+
+
+query_statistics = QueryStatistics(settings.QUERY_STATS_MAX_STATEMENTS)
+
+
+def _explain(cursor, statement: str, parameters) -> str:
+    # EXPLAIN(ANALYZE 없이)은 문을 실행하지 않는다. 요청의 트랜잭션 안에서 실행되므로 savepoint로 감싸
+    # 실패(statement_timeout, lock 등)해도 트랜잭션이 중단되지 않고 원래 요청에는 영향을 주지 않는다
+    if not _EXPLAINABLE_PATTERN.match(statement):
+        return None
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        # executemany
+        return None
+    in_transaction = not getattr(cursor.connection, "autocommit", False)
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            if in_transaction:
+                explain_cursor.execute("SAVEPOINT query_stats_explain")
+            try:
+                explain_cursor.execute("EXPLAIN " + statement, parameters)
+                plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+            except Exception:
+                if in_transaction:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT query_stats_explain")
+                    explain_cursor.execute("RELEASE SAVEPOINT query_stats_explain")
+                raise
+            if in_transaction:
+                explain_cursor.execute("RELEASE SAVEPOINT query_stats_explain")
+            return plan
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        logger.warning(f"slow query explain failed : {e}")
+        return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_list = conn.info.get("query_start_time")
+    if not start_list:
+        return
+    seconds = time.perf_counter() - start_list.pop()
+
+    fingerprint = get_statement_fingerprint(statement)
+    plan = None
+    if seconds >= settings.SLOW_QUERY_SECONDS:
+        # server-side cursor(yield_per)가 열려 있는 커넥션에서는 EXPLAIN을 실행하지 않는다
+        streaming = context is not None and context.execution_options.get("stream_results")
+        plan = "" if streaming else _explain(cursor, statement, parameters) or ""
+        logger.warning(f"slow query ({seconds:.3f}s, {cursor.rowcount} rows) : {fingerprint}\n{plan}")
+
+    fingerprint_id = query_statistics.record(fingerprint, seconds, cursor.rowcount, plan)
+    DB_QUERY_SECONDS.labels(fingerprint_id).observe(seconds)
+
+
+def install_query_hooks(engine: Engine) -> None:
+    """
+    engine의 모든 SQL 실행 시간과 행 수를 query_statistics에 기록하고,
+    settings.SLOW_QUERY_SECONDS 이상 걸린 문은 실행 계획과 함께 로그에 남긴다.
+    server-side cursor(yield_per)는 DECLARE까지의 시간만 측정되고 행 수는 -1이다.
+    """
+    if not settings.QUERY_STATS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
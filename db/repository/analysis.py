@@ -1,6 +1,10 @@
+import base64
+import functools
+import hashlib
+import json
 import os
 import uuid
-from typing import List, Literal
+from typing import List, Literal, Optional
 
 import pandas as pd
 from fastapi import Depends, HTTPException
@@ -8,17 +12,92 @@ from sqlalchemy import or_, inspect, text
 from sqlalchemy.orm import Session
 from starlette import status
 
+from analysis_module.model_registry import model_registry
+from core.config import settings
+from core.crs_converter import ALLOWED_CRS
+from core.metrics import analysis_context, iter_with_analysis_context, stage_timer
+from core.region_geometry import get_region_geometry_index, get_region_level, get_knn_weights
+from core.result_cache import analysis_result_cache
 from db.session import get_db
 from schemas.analysis import CreateCorrelation, CreateRegression, ShowAnalysis, CreateClustering, AnalysisResult, \
-    CreateSpatialClustering
-from analysis_module.regression_module import RegressionModule
-from analysis_module.correlation_module import CorrelationModule
-from analysis_module.clustering_module import GMMModule
+    CreateSpatialClustering, BaseAnalysisInput, CreateSpatialAutocorrelation, CreateCorrelationSummary
 from db.models.data import GgsStatis
-from db.repository.data import get_pivoted_df
+from db.repository.data import get_pivoted_df, get_data_version_stamp
+from db.repository.moment import get_range_pair_moments
+from utils.logging_module import logger
 
 
-def create_correlation_analysis(analysis_data: CreateCorrelation, db: Session):
+def get_analysis_cache_key(analysis_type: str, analysis_data: BaseAnalysisInput, db: Session) -> str:
+    """
+    분석 종류, 요청 파라미터, 관련 변수들의 데이터 버전으로 캐시 키를 만든다.
+    """
+    key_source = {
+        "type": analysis_type,
+        "version": settings.PROJECT_VERSION,
+        "request": analysis_data.model_dump(mode="json"),
+        "data_version": get_data_version_stamp(analysis_data.involved_variable_list, db)
+    }
+    return hashlib.sha256(json.dumps(key_source, sort_keys=True).encode()).hexdigest()
+
+
+def get_cached_analysis_result(key: str) -> Optional[ShowAnalysis]:
+    """
+    결과 캐시에서 분석 결과를 찾는다. 결과에 담긴 모델이 모델 저장소에서 지워졌으면 캐시 미스로 보고,
+    남아 있으면 저장소 정리 대상에서 미룬다.
+    """
+    cached = analysis_result_cache.get(key)
+    if cached is None:
+        return None
+    result = ShowAnalysis.model_validate_json(cached)
+    for analysis_result in result.data:
+        if analysis_result.title == "Model ID" and not model_registry.touch(analysis_result.result):
+            return None
+    return result
+
+
+def cached_analysis(analysis_type: str):
+    """
+    분석 결과를 결과 캐시에서 먼저 찾고, 없으면 분석 후 저장한다.
+    반환되는 ShowAnalysis.cache에 hit/miss가 기록된다. 안에서 기록되는 단계별 시간에는 analysis_type label이 붙는다.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(analysis_data: BaseAnalysisInput, db: Session) -> ShowAnalysis:
+            with analysis_context(analysis_type):
+                if not settings.ANALYSIS_CACHE_ENABLED:
+                    return func(analysis_data=analysis_data, db=db)
+
+                key = get_analysis_cache_key(analysis_type, analysis_data, db)
+                result = get_cached_analysis_result(key)
+                if result is not None:
+                    result.cache = "hit"
+                    return result
+
+                result = func(analysis_data=analysis_data, db=db)
+                analysis_result_cache.put(key, result.model_dump_json(exclude={"cache"}).encode())
+                result.cache = "miss"
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def collect_analysis_result(indexed_results) -> ShowAnalysis:
+    """
+    (순번, AnalysisResult) 목록을 순번대로 모아 ShowAnalysis로 만든다.
+    """
+    return ShowAnalysis(data=[result for _, result in sorted(indexed_results, key=lambda ele: ele[0])])
+
+
+def iter_correlation_analysis(analysis_data: CreateCorrelation, db: Session):
+    """
+    상관분석 결과물을 계산이 가벼운 순서(기술통계 -> 상관계수 -> 히트맵 -> 산점도행렬)로 하나씩 반환한다.
+    각 결과물은 ShowAnalysis 안에서의 순번과 함께 반환된다.
+    """
+    from analysis_module.correlation_module import CorrelationModule
+
     pivoted_df, dat_no_dat_nm_dict = get_pivoted_df(analysis_data.variable_list,
                                                     analysis_data.period_unit,
                                                     db)
@@ -27,75 +106,344 @@ def create_correlation_analysis(analysis_data: CreateCorrelation, db: Session):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="데이터가 크기가 0입니다. 다른 데이터를 선택해주세요.")
 
     correlation_module = CorrelationModule(pivoted_df.iloc[:, 3:], dat_no_dat_nm_dict)
-    corr_result = ShowAnalysis(data=[])
 
-    correlation_matrix = correlation_module.get_correlation_matrix(test_side=analysis_data.test_side)
-    pair_plot = correlation_module.save_pair_plot(),
-    heatmap_plot = correlation_module.save_heatmap_plot(),
     descriptive_statistics_table = correlation_module.get_descriptive_statistics_table()
+    yield 3, AnalysisResult(title="기술통계", result=descriptive_statistics_table, format="base64")
 
-    corr_result.data.append(AnalysisResult(title="산점도행렬", result=pair_plot[0], format="base64"))
-    corr_result.data.append(AnalysisResult(title="상관계수매트릭스", result=correlation_matrix, format="base64"))
-    corr_result.data.append(AnalysisResult(title="상관계수 히트맵", result=heatmap_plot[0], format="base64"))
-    corr_result.data.append(AnalysisResult(title="기술통계", result=descriptive_statistics_table, format="base64"))
-    return corr_result
+    correlation_matrix = correlation_module.get_correlation_matrix(test_side=analysis_data.test_side)
+    yield 1, AnalysisResult(title="상관계수매트릭스", result=correlation_matrix, format="base64")
 
+    heatmap_plot = correlation_module.save_heatmap_plot()
+    yield 2, AnalysisResult(title="상관계수 히트맵", result=heatmap_plot, format="base64")
+
+    pair_plot = correlation_module.save_pair_plot()
+    yield 0, AnalysisResult(title="산점도행렬", result=pair_plot, format="base64")
+
+
+@cached_analysis("correlation")
+def create_correlation_analysis(analysis_data: CreateCorrelation, db: Session):
+    return collect_analysis_result(iter_correlation_analysis(analysis_data, db))
+
+
+def create_correlation_summary_analysis(analysis_data: CreateCorrelationSummary, db: Session):
+    """
+    연도별 충분통계량 저장소에서 연도 범위를 합산해 상관계수, p값, 공분산, 관측치 수를 반환한다.
+    저장소에 없는 연도만 원자료에서 읽는다.
+    """
+    from analysis_module.correlation_module import get_correlation_from_moments
+
+    if len(analysis_data.variable_list) > 10:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="variable list의 최대 개수는 10개입니다.")
+
+    with analysis_context("correlation_summary"), stage_timer("moments"):
+        moments = get_range_pair_moments(analysis_data.variable_list, analysis_data.period_unit, db,
+                                         analysis_data.year_from, analysis_data.year_to)
+    if moments.empty or moments["n"].sum() == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="데이터가 크기가 0입니다. 다른 데이터를 선택해주세요.")
+
+    matrices = get_correlation_from_moments(moments, analysis_data.variable_list, analysis_data.test_side)
+
+    correlation_result = ShowAnalysis(data=[])
+    for title, name in (("상관계수", "correlation"), ("p값", "pvalue"), ("공분산", "covariance"), ("관측치 수", "n")):
+        matrix = matrices[name].astype(object).where(matrices[name].notna(), None)
+        correlation_result.data.append(AnalysisResult(title=title, result=matrix.to_dict(), format="json"))
+    return correlation_result
+
+
+def iter_regression_analysis(analysis_data: CreateRegression, db: Session):
+    """
+    회귀분석 결과물을 종속변수별로 가벼운 표부터 하나씩 반환하고, 기술통계는 마지막에 반환한다.
+    각 결과물은 ShowAnalysis 안에서의 순번과 함께 반환된다.
+    """
+    from analysis_module.regression_module import RegressionModule
+
+    dependent_variable_list = analysis_data.dependent_variable_list
+
+    if set(dependent_variable_list) & set(analysis_data.independent_variable_list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="종속변수와 독립변수가 중복됩니다.")
 
-def create_regression_analysis(analysis_data: CreateRegression, db: Session):
     pivoted_df, dat_no_dat_nm_dict = get_pivoted_df(
-        analysis_data.independent_variable_list + [analysis_data.dependent_variable],
+        analysis_data.independent_variable_list + dependent_variable_list,
         analysis_data.period_unit,
         db)
 
     if len(pivoted_df) == 0:
         raise HTTPException(status_code=404, detail="데이터가 크기가 0입니다. 다른 데이터를 선택해주세요.")
 
-    regression_module = RegressionModule(pivoted_df, analysis_data.dependent_variable, dat_no_dat_nm_dict)
-    regression_module.fit()
-    regression_summary_table0 = regression_module.get_result_summary_table0()
-    regression_summary_table1 = regression_module.get_result_summary_table1()
-    regression_summary_table2 = regression_module.get_result_summary_table2()
-    anova_table = regression_module.get_anova_lm()
+    regression_module = RegressionModule(pivoted_df, dependent_variable_list, dat_no_dat_nm_dict)
+    with stage_timer("fit"):
+        regression_module.fit()
+
+    for i, dependent_variable in enumerate(dependent_variable_list):
+        # 종속변수가 여러 개면 결과물 이름 앞에 종속변수명을 붙인다
+        prefix = ""
+        if len(dependent_variable_list) > 1:
+            prefix = dat_no_dat_nm_dict.get(dependent_variable, dependent_variable) + " "
+
+        anova_table = regression_module.get_anova_lm(dependent_variable)
+        yield i * 4 + 3, AnalysisResult(title=prefix + "분산분석표", result=anova_table, format="base64")
+
+        regression_summary_table0 = regression_module.get_result_summary_table0(dependent_variable)
+        yield i * 4, AnalysisResult(title=prefix + "모형요약표1", result=regression_summary_table0, format="base64")
+
+        regression_summary_table2 = regression_module.get_result_summary_table2(dependent_variable)
+        yield i * 4 + 2, AnalysisResult(title=prefix + "모형요약표3", result=regression_summary_table2, format="base64")
+
+        # VIF 계산이 들어가서 가장 무겁다
+        regression_summary_table1 = regression_module.get_result_summary_table1(dependent_variable)
+        yield i * 4 + 1, AnalysisResult(title=prefix + "모형요약표2", result=regression_summary_table1, format="base64")
+
     descriptive_statistics_table = regression_module.save_descriptive_statistics_table()
+    yield len(dependent_variable_list) * 4, AnalysisResult(title="기술통계", result=descriptive_statistics_table,
+                                                          format="base64")
+
+    yield len(dependent_variable_list) * 4 + 1, AnalysisResult(title="Model ID", result=regression_module.save_model(),
+                                                              format="json")
+
 
-    regression_result = ShowAnalysis(data=[])
-    regression_result.data.append(AnalysisResult(title="모형요약표1", result=regression_summary_table0, format="base64"))
-    regression_result.data.append(AnalysisResult(title="모형요약표2", result=regression_summary_table1, format="base64"))
-    regression_result.data.append(AnalysisResult(title="모형요약표3", result=regression_summary_table2, format="base64"))
-    regression_result.data.append(AnalysisResult(title="분산분석표", result=anova_table, format="base64"))
-    regression_result.data.append(AnalysisResult(title="기술통계", result=descriptive_statistics_table, format="base64"))
-    return regression_result
+@cached_analysis("regression")
+def create_regression_analysis(analysis_data: CreateRegression, db: Session):
+    return collect_analysis_result(iter_regression_analysis(analysis_data, db))
+
+
+def _format_sse(event: str, data: dict) -> str:
+    return "event: {}\ndata: {}\n\n".format(event, json.dumps(data, ensure_ascii=False))
+
+
+def iter_analysis_events(analysis_type: str, iter_analysis, analysis_data: BaseAnalysisInput, db: Session):
+    """
+    분석 결과물을 완성되는 즉시 Server-Sent Events 형식으로 반환한다.
+    result 이벤트에는 AnalysisResult와 ShowAnalysis 안에서의 순번(index)이 들어가고,
+    마지막에 캐시 적중 여부를 담은 done 이벤트(실패 시 error 이벤트)를 보낸다.
+    """
+    key = None
+    if settings.ANALYSIS_CACHE_ENABLED:
+        key = get_analysis_cache_key(analysis_type, analysis_data, db)
+        cached = get_cached_analysis_result(key)
+        if cached is not None:
+            for index, result in enumerate(cached.data):
+                yield _format_sse("result", {"index": index, **result.model_dump(mode="json")})
+            yield _format_sse("done", {"cache": "hit"})
+            return
+
+    indexed_results = []
+    try:
+        for index, result in iter_with_analysis_context(analysis_type, iter_analysis(analysis_data, db)):
+            indexed_results.append((index, result))
+            yield _format_sse("result", {"index": index, **result.model_dump(mode="json")})
+    except HTTPException as e:
+        yield _format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+        return
+    except Exception as e:
+        # 응답 헤더는 이미 보냈으므로 예외를 올리지 않고 error 이벤트로 알린다
+        logger.exception(f"{analysis_type} analysis stream failed")
+        yield _format_sse("error", {"status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                    "detail": f"{type(e).__name__}: {e}"})
+        return
+
+    if key:
+        analysis_result = collect_analysis_result(indexed_results)
+        analysis_result_cache.put(key, analysis_result.model_dump_json(exclude={"cache"}).encode())
+    yield _format_sse("done", {"cache": "miss" if key else None})
+
+
+CLUSTERING_MODULES = {
+    # algorithm: (clustering_module의 모듈 클래스 이름, 결과물 이름 접두어, auto일 때 기본 k_method, k 탐색 그래프 이름)
+    "gmm": ("GMMModule", "GMM", "BIC", "GMM BIC/AIC Plot"),
+    "kmeans": ("KMeansModule", "KMeans", "silhouette", "KMeans K Method Plot"),
+}
+
+
+def get_clustering_module(pivoted_df: pd.DataFrame, dat_no_dat_nm_dict: dict, analysis_data: CreateClustering,
+                          coordinates=None, spatial_weight: float = 0):
+    """
+    요청한 알고리즘의 군집분석 모듈을 만들고 군집 수(k)를 정한다.
+    n_point가 "auto"면 병렬 탐색으로 k를 정하고, 아니면 주어진 값을 그대로 쓴다.
+    coordinates(지역 중심점)를 주면 k 탐색 전에 모듈에 지정한다.
+    """
+    from analysis_module import clustering_module as clustering
 
+    class_name, _, default_k_method, _ = CLUSTERING_MODULES[analysis_data.algorithm]
+    module_class = getattr(clustering, class_name)
+    if module_class is clustering.KMeansModule:
+        clustering_module = module_class(pivoted_df, dat_no_dat_nm_dict, minibatch=analysis_data.minibatch)
+    else:
+        clustering_module = module_class(pivoted_df, dat_no_dat_nm_dict)
+    clustering_module.random_state = analysis_data.random_state
+    if coordinates is not None:
+        clustering_module.set_coordinates(coordinates, spatial_weight)
 
+    if analysis_data.n_point != "auto":
+        clustering_module.optimal_k = analysis_data.n_point
+        return clustering_module
+
+    k_method = analysis_data.k_method or default_k_method
+    if k_method not in module_class.optimal_k_methods:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"{analysis_data.algorithm}에서 지원하지 않는 k_method입니다 : {k_method}")
+
+    clustering_module.set_k_range(2, analysis_data.max_n_point + 1)
+    try:
+        clustering_module.set_optimal_k(method=k_method)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"최적 군집 수를 찾을 수 없습니다. - {e}")
+    return clustering_module
+
+
+@cached_analysis("clustering")
 def create_clustering_analysis(analysis_data: CreateClustering, db: Session):
     pivoted_df, dat_no_dat_nm_dict = get_pivoted_df(analysis_data.variable_list,
                                                     analysis_data.period_unit,
                                                     db)
-    gmm_module = GMMModule(pivoted_df, dat_no_dat_nm_dict)
-    gmm_module.optimal_k = analysis_data.n_point
-    gmm_module.fit()
+    with stage_timer("k_search"):
+        clustering_module = get_clustering_module(pivoted_df, dat_no_dat_nm_dict, analysis_data)
+    with stage_timer("fit"):
+        clustering_module.fit()
+    _, name, _, k_method_plot_title = CLUSTERING_MODULES[analysis_data.algorithm]
 
     clustering_result = ShowAnalysis(data=[])
     clustering_result.data.append(
-        AnalysisResult(title="GMM Clustering Table", result=gmm_module.get_clustering_result(), format="json"))
+        AnalysisResult(title=f"{name} Clustering Table", result=clustering_module.get_clustering_result(),
+                       format="json"))
+    clustering_result.data.append(
+        AnalysisResult(title=f"{name} Plot", result=clustering_module.get_cluster_output_plot(), format="base64"))
+
+    if analysis_data.n_point == "auto":
+        clustering_result.data.append(
+            AnalysisResult(title=f"{name} Optimal K", result=clustering_module.get_k_method_result(), format="json"))
+        clustering_result.data.append(
+            AnalysisResult(title=k_method_plot_title, result=clustering_module.get_k_method_output_plot(),
+                           format="base64"))
+
     clustering_result.data.append(
-        AnalysisResult(title="GMM Plot", result=gmm_module.get_cluster_output_plot(), format="base64"))
+        AnalysisResult(title="Model ID", result=clustering_module.save_model(), format="json"))
 
     return clustering_result
 
 
-def create_spatial_clustering_analysis(analysis_data: CreateClustering, db: Session):
+@cached_analysis("spatial_clustering")
+def create_spatial_clustering_analysis(analysis_data: CreateSpatialClustering, db: Session):
+    # 지역 중심점 파일이 없으면 예전처럼 첫 두 변수를 crs 좌표로 보고 공간 가중치 없이 군집한다
+    region_index = get_region_geometry_index()
+    if region_index is None:
+        if analysis_data.spatial_weight > 0:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="지역 경계 데이터가 준비되지 않아 spatial_weight를 쓸 수 없습니다.")
+        if len(analysis_data.variable_list) < 2 or analysis_data.crs not in ALLOWED_CRS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="지역 경계 데이터가 없으면 좌표 변수 2개와 지원하는 crs가 필요합니다.")
+
     pivoted_df, dat_no_dat_nm_dict = get_pivoted_df(analysis_data.variable_list,
                                                     analysis_data.period_unit,
-                                                    db)
-    gmm_module = GMMModule(pivoted_df, dat_no_dat_nm_dict)
-    gmm_module.optimal_k = analysis_data.n_point
-    gmm_module.fit()
-    result = gmm_module.get_spatial_result_as_json(analysis_data.crs)
+                                                    db,
+                                                    with_region_code=True)
+    stdg_cd_list = pivoted_df.pop('stdg_cd')
+    coordinates = region_index.get_centroids(stdg_cd_list) if region_index is not None else None
+
+    with stage_timer("k_search"):
+        clustering_module = get_clustering_module(pivoted_df, dat_no_dat_nm_dict, analysis_data,
+                                                  coordinates=coordinates,
+                                                  spatial_weight=analysis_data.spatial_weight)
+    with stage_timer("fit"):
+        clustering_module.fit()
+    result = clustering_module.get_spatial_result(analysis_data.crs,
+                                                  output_format=analysis_data.output_format,
+                                                  precision=analysis_data.coordinate_precision)
+    name = CLUSTERING_MODULES[analysis_data.algorithm][1]
+
+    result_format = "json"
+    if analysis_data.output_format == "geojson":
+        result_format = "geojson"
+    elif analysis_data.output_format == "arrow":
+        result = base64.b64encode(result).decode()
+        result_format = "arrow"
 
     clustering_result = ShowAnalysis(data=[])
     clustering_result.data.append(
-        AnalysisResult(title="Spatial Clustering Result", result=result, format="json")
+        AnalysisResult(title="Spatial Clustering Result", result=result, format=result_format)
     )
 
-    return clustering_result
\ No newline at end of file
+    if analysis_data.n_point == "auto":
+        clustering_result.data.append(
+            AnalysisResult(title=f"{name} Optimal K", result=clustering_module.get_k_method_result(), format="json"))
+
+    clustering_result.data.append(
+        AnalysisResult(title="Model ID", result=clustering_module.save_model(), format="json"))
+
+    return clustering_result
+
+
+def _replace_nan(df: pd.DataFrame) -> pd.DataFrame:
+    # 분산이 0인 변수의 nan은 JSON에서 null로 보낸다
+    return df.astype(object).where(df.notna(), None)
+
+
+@cached_analysis("spatial_autocorrelation")
+def create_spatial_autocorrelation_analysis(analysis_data: CreateSpatialAutocorrelation, db: Session):
+    from analysis_module.spatial_autocorrelation_module import SpatialAutocorrelationModule
+
+    region_index = get_region_geometry_index()
+    if region_index is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="지역 경계 데이터가 준비되지 않았습니다.")
+
+    pivoted_df, dat_no_dat_nm_dict = get_pivoted_df(analysis_data.variable_list,
+                                                    analysis_data.period_unit,
+                                                    db,
+                                                    with_region_code=True)
+    value_columns = list(pivoted_df.columns[4:])
+
+    # 요청한 행정 단위 중 중심점이 있는 지역만 남긴다
+    mask = get_region_level(pivoted_df['stdg_cd']) == analysis_data.region_level
+    mask &= ~pd.isna(region_index.get_centroids(pivoted_df['stdg_cd'])[:, 0])
+    if analysis_data.year_list:
+        mask &= pivoted_df['yr'].astype(str).isin(analysis_data.year_list).to_numpy()
+    pivoted_df = pivoted_df[mask]
+    if pivoted_df.empty:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"{analysis_data.region_level} 단위의 분석 대상 지역이 없습니다.")
+
+    module = SpatialAutocorrelationModule(analysis_data.k_neighbors,
+                                          permutations=analysis_data.permutations,
+                                          random_state=analysis_data.random_state,
+                                          significance=analysis_data.significance)
+    global_df_list, local_df_list = [], []
+    for (yr, variable), section in pivoted_df.groupby(['yr', 'variable'], observed=True, sort=True):
+        section = section.sort_values('stdg_cd')
+
+        # 값이 없는 지역은 변수마다 빼고, 남은 지역이 같은 변수끼리 묶어 한 번에 계산한다
+        notna = section[value_columns].notna().to_numpy()
+        column_groups = {}
+        for i, column in enumerate(value_columns):
+            column_groups.setdefault(notna[:, i].tobytes(), (notna[:, i], []))[1].append(column)
+
+        for found, columns in column_groups.values():
+            subset = section[found]
+            # 지역 수보다 이웃이 많을 수 없으므로 k는 n-1까지만 쓴다
+            k = min(analysis_data.k_neighbors, len(subset) - 1)
+            if k < 1:
+                continue
+            weights = get_knn_weights(tuple(subset['stdg_cd']), k)
+            with stage_timer("fit"):
+                global_df, local_df = module.run(subset, columns, weights)
+            for df in (global_df, local_df):
+                df.insert(0, 'variable', variable)
+                df.insert(0, 'yr', yr)
+            global_df_list.append(global_df)
+            local_df_list.append(local_df)
+
+    if not global_df_list:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="값이 있는 지역이 2개 이상이어야 합니다.")
+    global_df = pd.concat(global_df_list, ignore_index=True)
+    local_df = pd.concat(local_df_list, ignore_index=True)
+
+    autocorrelation_result = ShowAnalysis(data=[])
+    autocorrelation_result.data.append(
+        AnalysisResult(title="Moran's I Table",
+                       result=SpatialAutocorrelationModule.get_global_result_table(global_df, dat_no_dat_nm_dict),
+                       format="base64"))
+    autocorrelation_result.data.append(
+        AnalysisResult(title="Moran's I", result=_replace_nan(global_df).to_dict(orient="records"), format="json"))
+    autocorrelation_result.data.append(
+        AnalysisResult(title="LISA", result=_replace_nan(local_df).to_dict(orient="list"), format="json"))
+
+    return autocorrelation_result
@@ -8,15 +8,29 @@ from typing import Literal, List
 from numpy import select
 from sqlalchemy.orm import Session, aliased
 from sqlalchemy import create_engine, text, func, and_, Integer, or_, bindparam, distinct
+import numpy as np
 import pandas as pd
 from starlette import status
 
+from core.config import settings
 from core.hashing import Hasher
+from core.metrics import stage_timer
+from db.repository.fetch import fetch_arrays
+from db.repository.snapshot import get_snapshot_tables, get_snapshot_arrays, get_snapshot_chart_data, \
+    count_snapshot_rows
+from core.crs_converter import ALLOWED_CRS, TARGET_CRS, convert_coordinates_array
+from core.region_geometry import get_region_geometry_index, RegionGeometryIndex
 
 from db.models.data import GgsStatis, GgsCmmn, GgsDataInfo
 from db.session import get_db
 from schemas.data import ShowVariableDetail, EChartBarOption, EChartPieOption, EChartXAxisOption, EChartYAxisOption, \
-    EChartSeriesOption, TitleEChartOption
+    EChartSeriesOption, TitleEChartOption, FindRegionByPoint, FindNearestRegion, FindRegionWithin, ShowNearbyRegion
+
+
+# check_pivoted_df_size에서 쓰는 원자료 한 행(키 문자열), 기간 값 하나(값, 코드 배열, groupby 임시 배열)당
+# 대략적인 메모리 사용량(byte)
+ROW_OBJECT_BYTES = 300
+PERIOD_CELL_BYTES = 48
 
 
 def get_period_unit_list(period_unit):
@@ -276,6 +290,13 @@ def retrieve_stdg_data(db: Session):
 def retrieve_chart_data(id: str, year: str, period_unit: str, detail_period: str, stdg_cd: str, limit, db: Session):
     column = get_detail_period_by_param(period_unit, detail_period)
 
+    # 시도 필터가 없는 조회는 snapshot에서 읽는다
+    chart_data = None if stdg_cd else get_snapshot_chart_data(id, column, year, limit, db)
+    if chart_data is not None:
+        if not chart_data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="해당 조건의 데이터가 없습니다.")
+        return chart_data
+
     if stdg_cd:
         additional_condition_statg = " and stat.stdg_cd in (select stdg_cd from ggs_stdg where stdg_ctpv_up_cd = '{}' and stdg_sgg_up_cd is null) ".format(
             stdg_cd)
@@ -287,7 +308,7 @@ def retrieve_chart_data(id: str, year: str, period_unit: str, detail_period: str
 
     query_template = """
         select 
-            stat.{column}::integer,
+            stat.{column}::integer as {column},
             stdg.stdg_nm 
         from 
             ggs_statis stat
@@ -308,7 +329,7 @@ def retrieve_chart_data(id: str, year: str, period_unit: str, detail_period: str
         union all
         
         select 
-            ustat.yr_vl::integer,
+            ustat.yr_vl::integer as {column},
             stdg.stdg_nm 
         from 
             ggs_user_statis ustat 
@@ -339,11 +360,11 @@ def retrieve_chart_data(id: str, year: str, period_unit: str, detail_period: str
         params["limit"] = limit
 
     query = text(query_template)
-    db_result = db.execute(query, params).fetchall()
+    keys, values = fetch_arrays(query, params, ['stdg_nm'], [column], db, value_dtype=np.int64)
 
-    if len(db_result) == 0:
+    if len(values) == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="해당 조건의 데이터가 없습니다.")
-    return db_result
+    return list(zip(values[:, 0].tolist(), keys['stdg_nm'].tolist()))
 
 
 def get_dat_nm_by_dat_no(id: str, db: Session):
@@ -566,93 +587,241 @@ def retrieve_filter_detail_list(id: str, db: Session):
     }
 
 
+def get_data_versions(variable_list: List[str], db: Session) -> dict:
+    """
+    변수별 데이터 버전(변수 메타정보의 최종 수정일시) {dat_no: 버전 문자열}
+    """
+    query = text("""
+        select dat_no, last_mdfcn_dt from ggs_data_info where dat_no in :variable_list
+        union all
+        select dat_no, last_mdfcn_dt from ggs_user_data_info where dat_no in :variable_list
+    """).bindparams(bindparam('variable_list', expanding=True))
+
+    db_result = db.execute(query, {"variable_list": list(variable_list)}).fetchall()
+    return {ele[0]: str(ele[1]) for ele in db_result}
+
+
+def get_data_version_stamp(variable_list: List[str], db: Session) -> str:
+    """
+    분석에 쓰이는 변수들의 데이터 버전 문자열을 반환한다.
+    변수 메타정보의 최종 수정일시를 dat_no 순으로 이어 붙인 값이라 데이터가 갱신되면 바뀐다.
+    """
+    versions = sorted("{}:{}".format(dat_no, version) for dat_no, version in get_data_versions(variable_list, db).items())
+    return "|".join(versions)
+
+
 def get_pivoted_df(variable_list: List[str],
                    period_unit: Literal["year", "month", "quarter", "half"],
-                   db: Session
+                   db: Session,
+                   with_region_code: bool = False,
+                   year_from: str = None,
+                   year_to: str = None
                    ):
+    """
+    변수들을 (yr, stdg_nm, variable) x dat_no 형태로 pivot한 DataFrame을 반환한다.
+    with_region_code가 True면 index에 stdg_cd를 추가해 (yr, stdg_cd, stdg_nm, variable) 순서가 된다.
+    year_from, year_to를 주면 해당 연도 범위만 읽는다.
+    """
     if len(variable_list) > 10:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="variable list의 최대 개수는 10개입니다.")
 
     value_period_list = get_value_period_list(period_unit)
 
+    with stage_timer("snapshot"):
+        snapshot = get_snapshot_tables(variable_list, db)
+    if snapshot is not None:
+        tables, versions = snapshot
+        dat_no_dat_nm_dict = {dat_no: versions[dat_no]["dat_nm"] for dat_no in variable_list}
+        check_pivoted_df_size(variable_list, period_unit, db, n_rows=count_snapshot_rows(tables, year_from, year_to))
+        with stage_timer("snapshot"):
+            keys, values = get_snapshot_arrays(tables, value_period_list, year_from, year_to)
+        with stage_timer("pivot"):
+            pivoted_df = build_pivoted_df(keys, values, value_period_list, with_region_code)
+        return pivoted_df, dat_no_dat_nm_dict
+
+    with stage_timer("sql"):
+        n_rows = check_pivoted_df_size(variable_list, period_unit, db, year_from=year_from, year_to=year_to)
+
+    # 필요한 기간 컬럼만 float8로 받아서 Decimal 객체를 만들지 않는다
+    stat_columns = ",\n            ".join("stat.{}::float8 as {}".format(column, column) for column in value_period_list)
+    ustat_columns = ",\n            ".join("ustat.{}::float8 as {}".format(column, column) for column in value_period_list)
     query_template = """
         SELECT
             stat.stdg_cd,
             stat.yr,
             stat.dat_no,
-            info.dat_nm,
             stdg.stdg_nm,
-            stat.jan,
-            stat.feb,
-            stat.mar,
-            stat.apr,
-            stat.may,
-            stat.jun,
-            stat.july,
-            stat.aug,
-            stat.sep,
-            stat.oct,
-            stat.nov,
-            stat.dec,
-            stat.qu_1,
-            stat.qu_2,
-            stat.qu_3,
-            stat.qu_4,
-            stat.ht_1,
-            stat.ht_2,
-            stat.yr_vl
+            {stat_columns}
         FROM ggs_statis stat
         JOIN ggs_data_info info ON stat.dat_no = info.dat_no
         JOIN ggs_stdg stdg ON stat.stdg_cd = stdg.stdg_cd 
-        WHERE stat.dat_no IN ({lst})
+        WHERE stat.dat_no IN :variable_list {stat_year_condition}
             union all
         SELECT
             ustat.stdg_cd,
             ustat.yr,
             ustat.dat_no,
-            uinfo.dat_nm,
             stdg.stdg_nm,
-            ustat.jan,
-            ustat.feb,
-            ustat.mar,
-            ustat.apr,
-            ustat.may,
-            ustat.jun,
-            ustat.july,
-            ustat.aug,
-            ustat.sep,
-            ustat.oct,
-            ustat.nov,
-            ustat.dec,
-            ustat.qu_1,
-            ustat.qu_2,
-            ustat.qu_3,
-            ustat.qu_4,
-            ustat.ht_1,
-            ustat.ht_2,
-            ustat.yr_vl
+            {ustat_columns}
         FROM ggs_user_statis ustat
         JOIN ggs_user_data_info uinfo ON ustat.dat_no = uinfo.dat_no
         JOIN ggs_stdg stdg ON ustat.stdg_cd = stdg.stdg_cd 
-        WHERE ustat.dat_no IN ({lst})
+        WHERE ustat.dat_no IN :variable_list {ustat_year_condition}
+    """
+    params = {"variable_list": list(variable_list)}
+    stat_year_condition, ustat_year_condition = "", ""
+    if year_from is not None:
+        stat_year_condition += " AND stat.yr >= :year_from"
+        ustat_year_condition += " AND ustat.yr >= :year_from"
+        params["year_from"] = str(year_from)
+    if year_to is not None:
+        stat_year_condition += " AND stat.yr <= :year_to"
+        ustat_year_condition += " AND ustat.yr <= :year_to"
+        params["year_to"] = str(year_to)
+
+    query = text(query_template.format(stat_columns=stat_columns, ustat_columns=ustat_columns,
+                                       stat_year_condition=stat_year_condition,
+                                       ustat_year_condition=ustat_year_condition)) \
+        .bindparams(bindparam('variable_list', expanding=True))
+
+    with stage_timer("sql"):
+        keys, values = fetch_arrays(query, params,
+                                    ['yr', 'stdg_cd', 'stdg_nm', 'dat_no'], value_period_list, db, capacity=n_rows)
+        dat_no_dat_nm_dict = get_dat_nm_dict(variable_list, db)
+    with stage_timer("pivot"):
+        pivoted_df = build_pivoted_df(keys, values, value_period_list, with_region_code)
+
+    return pivoted_df, dat_no_dat_nm_dict
+
+
+def get_dat_nm_dict(variable_list: List[str], db: Session) -> dict:
+    query = text("""
+        select dat_no, dat_nm from ggs_data_info where dat_no in :variable_list
+        union all
+        select dat_no, dat_nm from ggs_user_data_info where dat_no in :variable_list
+    """).bindparams(bindparam('variable_list', expanding=True))
+    return {ele[0]: ele[1] for ele in db.execute(query, {"variable_list": list(variable_list)}).fetchall()}
+
+
+def build_pivoted_df(keys: dict, values: np.ndarray, value_period_list: List[str],
+                     with_region_code: bool = False, index_columns: List[str] = None) -> pd.DataFrame:
+    """
+    키 컬럼 배열(yr, stdg_cd, stdg_nm, dat_no)과 (행 x 기간) 값 배열을
+    (yr, [stdg_cd], stdg_nm, variable) x dat_no 형태로 만든다. index_columns를 주면 variable 앞의 컬럼을 바꾼다.
+    index 컬럼은 categorical, 값은 settings.ANALYSIS_FRAME_DTYPE의 한 블록이며
+    melt 대신 categorical 코드와 값 배열을 직접 펼쳐서 문자열 사본을 만들지 않는다.
+    pivot_table과 같이 같은 키가 여러 번 있으면 평균, 값이 전부 없는 행은 제외한다.
+    """
+    if index_columns is None:
+        index_columns = ['yr', 'stdg_cd', 'stdg_nm'] if with_region_code else ['yr', 'stdg_nm']
+    n_period = len(value_period_list)
+    n_rows = len(values)
+
+    values = np.asarray(values, dtype=float).ravel()
+    found = ~np.isnan(values)
+
+    long_df = pd.DataFrame({'value': values[found]})
+    for column in index_columns + ['dat_no']:
+        categorical = pd.Categorical(np.asarray(keys[column]).astype(str))
+        long_df[column] = pd.Categorical.from_codes(np.repeat(categorical.codes, n_period)[found],
+                                                    categorical.categories)
+    # 기존 pivot_table과 같이 기간 이름의 알파벳 순으로 정렬되도록 categories를 정렬하고 코드를 순위로 준다
+    long_df['variable'] = pd.Categorical.from_codes(
+        np.tile(np.argsort(np.argsort(value_period_list)), n_rows)[found], sorted(value_period_list))
+
+    pivoted_df = long_df.groupby(index_columns + ['variable', 'dat_no'], observed=True, sort=True)['value'] \
+        .mean().unstack('dat_no')
+    pivoted_df = pivoted_df.astype(settings.ANALYSIS_FRAME_DTYPE).reset_index()
+    pivoted_df.columns = list(pivoted_df.columns)
+    return pivoted_df
+
+
+def check_pivoted_df_size(variable_list: List[str], period_unit: str, db: Session, n_rows: int = None,
+                          year_from: str = None, year_to: str = None) -> int:
+    """
+    원자료 행 수로 분석용 DataFrame을 만드는 동안의 메모리를 추정해 settings.ANALYSIS_MAX_FRAME_BYTES를 넘으면
+    데이터를 읽기 전에 413 에러를 낸다. 원자료 행 수를 반환한다.
+    n_rows를 주면(snapshot 행 수) count 쿼리를 하지 않고, 아니면 year_from, year_to 범위의 행만 센다.
+    """
+    if n_rows is None:
+        n_rows = _count_statis_rows(variable_list, db, year_from, year_to)
+
+    # 조회 결과의 행 객체, 펼친 값/코드 배열, 최종 블록을 합한 대략적인 크기
+    n_period = len(get_value_period_list(period_unit))
+    itemsize = np.dtype(settings.ANALYSIS_FRAME_DTYPE).itemsize
+    estimated_bytes = n_rows * (ROW_OBJECT_BYTES + n_period * (PERIOD_CELL_BYTES + itemsize))
+
+    if estimated_bytes > settings.ANALYSIS_MAX_FRAME_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="요청한 데이터가 너무 큽니다. 변수 수나 기간 단위를 줄여주세요. "
+                                   f"(예상 {estimated_bytes // 2 ** 20}MB, 최대 {settings.ANALYSIS_MAX_FRAME_BYTES // 2 ** 20}MB)")
+    return n_rows
+
+
+def _count_statis_rows(variable_list: List[str], db: Session, year_from: str = None, year_to: str = None) -> int:
+    params = {"variable_list": list(variable_list)}
+    year_condition = ""
+    if year_from is not None:
+        year_condition += " and yr >= :year_from"
+        params["year_from"] = str(year_from)
+    if year_to is not None:
+        year_condition += " and yr <= :year_to"
+        params["year_to"] = str(year_to)
+
+    query = text("""
+        select count(*) from ggs_statis where dat_no in :variable_list {year_condition}
+        union all
+        select count(*) from ggs_user_statis where dat_no in :variable_list {year_condition}
+    """.format(year_condition=year_condition)).bindparams(bindparam('variable_list', expanding=True))
+    return sum(row[0] for row in db.execute(query, params).fetchall())
+
+
+def _get_region_index() -> RegionGeometryIndex:
+    region_index = get_region_geometry_index()
+    if region_index is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="지역 경계 데이터가 준비되지 않았습니다.")
+    return region_index
+
+
+def _get_target_crs_points(find_data: FindRegionByPoint):
+    """
+    요청 좌표들을 한 번에 TARGET_CRS로 변환한 (n x 2) 배열
+    """
+    if find_data.crs not in ALLOWED_CRS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"지원하지 않는 좌표계입니다 : {find_data.crs}")
+    if any(len(point) != 2 for point in find_data.points):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="points는 [x, y] 형태여야 합니다.")
+
+    points = pd.DataFrame(find_data.points, columns=["x", "y"], dtype=float).to_numpy()
+    if find_data.crs != TARGET_CRS and len(points):
+        points[:, 0], points[:, 1] = convert_coordinates_array(points[:, 0], points[:, 1], find_data.crs)
+    return points
+
+
+def retrieve_nearest_region(stdg_cd: str, k: int) -> ShowNearbyRegion:
+    """
+    지역과 같은 행정 단위에서 중심점이 가장 가까운 지역 k개를 반환한다. (자기 자신 제외)
     """
-    lst = ""
-    for variable in variable_list:
-        lst += "'{}', ".format(variable)
-    lst = lst[:-2]
-    query = text(query_template.format(lst=lst))
+    region_index = _get_region_index()
+    centroid = region_index.get_centroids([stdg_cd])
+    if pd.isna(centroid).any():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"region with ID {stdg_cd} does not exist")
 
-    result = db.execute(query)
+    region_level = region_index.levels[region_index.codes.get_loc(stdg_cd)]
+    codes, distances = region_index.query_nearest(centroid, k, region_level=region_level, exclude_self=True)
+    return ShowNearbyRegion(stdg_cd=codes[0].tolist(), distance=distances[0].tolist())
 
-    df = pd.DataFrame(result.fetchall(), columns=result.keys())
-    melted_df = pd.melt(df, id_vars=['yr', 'stdg_nm', 'dat_no', 'dat_nm'], value_vars=value_period_list)
-    pivoted_df = pd.pivot_table(melted_df, values='value', index=['yr', 'stdg_nm', 'variable'], columns='dat_no')
-    dat_no_dat_nm_dict = df.set_index('dat_no')['dat_nm'].to_dict()
 
-    _uuid = uuid.uuid4()
+def retrieve_nearest_region_by_point(find_data: FindNearestRegion) -> List[ShowNearbyRegion]:
+    region_index = _get_region_index()
+    codes, distances = region_index.query_nearest(_get_target_crs_points(find_data), find_data.k,
+                                                  region_level=find_data.region_level)
+    return [ShowNearbyRegion(stdg_cd=code_row.tolist(), distance=distance_row.tolist())
+            for code_row, distance_row in zip(codes, distances)]
 
-    pivoted_df.to_csv("./data{}.csv".format(_uuid), encoding="utf-8-sig")
-    pivoted_df = pd.read_csv("./data{}.csv".format(_uuid))
-    os.remove("./data{}.csv".format(_uuid))
 
-    return pivoted_df, dat_no_dat_nm_dict
\ No newline at end of file
+def retrieve_region_within(find_data: FindRegionWithin) -> List[ShowNearbyRegion]:
+    region_index = _get_region_index()
+    result = region_index.query_radius(_get_target_crs_points(find_data), find_data.radius_km * 1000,
+                                       region_level=find_data.region_level)
+    return [ShowNearbyRegion(stdg_cd=codes.tolist(), distance=distances.tolist()) for codes, distances in result]
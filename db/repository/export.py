@@ -0,0 +1,102 @@
+from typing import List, Literal, Iterator
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette import status
+
+from core.region_geometry import get_region_level
+from db.repository.data import get_pivoted_df
+
+EXPORT_BATCH_ROWS = 65536
+EXPORT_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+
+class _ChunkSink:
+    """
+    pyarrow writer가 쓴 바이트를 모아 두었다가 batch마다 꺼내 가는 file-like 객체
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def get_export_table(variable_list: List[str],
+                     period_unit: Literal["year", "month", "quarter", "half"],
+                     db: Session,
+                     year_from: str = None,
+                     year_to: str = None,
+                     region_level: Literal["sido", "sgg", "emd"] = None):
+    """
+    분석과 같은 get_pivoted_df 경로로 wide 데이터를 만들어 Arrow Table로 바꾼다.
+    categorical인 yr, stdg_cd, stdg_nm, variable 컬럼은 dictionary 인코딩으로 들어간다.
+    """
+    import pyarrow as pa
+
+    pivoted_df, _ = get_pivoted_df(variable_list, period_unit, db, with_region_code=True,
+                                   year_from=year_from, year_to=year_to)
+    if region_level is not None:
+        pivoted_df = pivoted_df[get_region_level(pivoted_df['stdg_cd']) == region_level]
+    if pivoted_df.empty:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="해당 조건의 데이터가 없습니다.")
+
+    return pa.Table.from_pandas(pivoted_df, preserve_index=False)
+
+
+def iter_export_bytes(table, export_format: Literal["parquet", "arrow"]) -> Iterator[bytes]:
+    """
+    Table을 EXPORT_BATCH_ROWS 행씩 zstd로 압축해 쓰고, 쓸 때마다 만들어진 바이트를 반환한다.
+    parquet은 batch마다 row group 하나, arrow는 IPC stream의 record batch 하나가 된다.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    stream = pa.PythonFile(sink, mode="w")
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(stream, table.schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(stream, table.schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+
+    try:
+        for batch in table.to_batches(max_chunksize=EXPORT_BATCH_ROWS):
+            if export_format == "parquet":
+                writer.write_table(pa.Table.from_batches([batch], schema=table.schema))
+            else:
+                writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def get_export_file_name(variable_list: List[str], period_unit: str, export_format: str) -> str:
+    extension = "parquet" if export_format == "parquet" else "arrows"
+    return "{}_{}.{}".format("_".join(np.unique(variable_list)), period_unit, extension)
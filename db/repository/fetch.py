@@ -0,0 +1,50 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import TextClause
+from sqlalchemy.orm import Session
+
+from core.config import settings
+
+
+def fetch_arrays(query: TextClause,
+                 params: dict,
+                 key_columns: List[str],
+                 value_columns: List[str],
+                 db: Session,
+                 capacity: int = 0,
+                 value_dtype=np.float64,
+                 chunk_size: int = None) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    server-side cursor(yield_per)로 chunk_size 행씩 읽어 미리 할당한 NumPy 배열을 채운다.
+    key_columns는 컬럼별 object 배열, value_columns는 (행 x 컬럼) value_dtype 배열 하나로 반환한다.
+    SELECT 절의 value_columns는 서로 붙어 있어야 하며, 결측(NULL)은 nan이 된다.
+    capacity(예상 행 수)보다 많이 읽히면 두 배씩 늘린다.
+    """
+    chunk_size = chunk_size or settings.DB_FETCH_CHUNK_SIZE
+    result = db.execute(query, params, execution_options={"yield_per": chunk_size})
+
+    names = list(result.keys())
+    key_positions = [names.index(column) for column in key_columns]
+    value_start = names.index(value_columns[0])
+    value_end = value_start + len(value_columns)
+
+    capacity = max(capacity, chunk_size)
+    keys = {column: np.empty(capacity, dtype=object) for column in key_columns}
+    values = np.empty((capacity, len(value_columns)), dtype=value_dtype)
+
+    n_rows = 0
+    for partition in result.partitions():
+        size = len(partition)
+        if n_rows + size > capacity:
+            capacity = max(capacity * 2, n_rows + size)
+            for column in key_columns:
+                keys[column] = np.resize(keys[column], capacity)
+            values = np.resize(values, (capacity, len(value_columns)))
+
+        for column, position in zip(key_columns, key_positions):
+            keys[column][n_rows:n_rows + size] = [row[position] for row in partition]
+        values[n_rows:n_rows + size] = np.array([row[value_start:value_end] for row in partition], dtype=value_dtype)
+        n_rows += size
+
+    return {column: array[:n_rows] for column, array in keys.items()}, values[:n_rows]
@@ -0,0 +1,171 @@
+import argparse
+import io
+import os
+import time
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+from starlette import status
+
+from db.repository.moment import update_loaded_years
+from schemas.data import ShowUserStatisIngest
+from utils.logging_module import logger
+
+KEY_COLUMNS = ["yr", "stdg_cd", "dat_no"]
+PERIOD_COLUMNS = ["jan", "feb", "mar", "apr", "may", "jun", "july", "aug", "sep", "oct", "nov", "dec",
+                  "qu_1", "qu_2", "qu_3", "qu_4", "ht_1", "ht_2", "yr_vl"]
+COPY_CHUNK_SIZE = 100000
+
+
+def read_user_statis_file(file: BinaryIO, filename: str) -> pd.DataFrame:
+    """
+    CSV, Excel(xlsx, xls), Parquet 파일을 DataFrame으로 읽는다. 키 컬럼은 문자열로 읽는다.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    key_dtype = {column: str for column in KEY_COLUMNS}
+
+    if extension == ".csv":
+        return pd.read_csv(file, dtype=key_dtype, encoding="utf-8-sig")
+    if extension in (".xlsx", ".xls"):
+        return pd.read_excel(file, dtype=key_dtype)
+    if extension == ".parquet":
+        return pd.read_parquet(file)
+
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"지원하지 않는 파일 형식입니다 : {extension} (csv, xlsx, xls, parquet)")
+
+
+def validate_user_statis(df: pd.DataFrame, db: Session) -> pd.DataFrame:
+    """
+    컬럼명을 정리하고 키 컬럼과 기간 컬럼을 컬럼 단위로 한 번에 검사, 변환한다.
+    없는 기간 컬럼은 빈 값으로 채우고 숫자가 아닌 값이 있으면 행 번호와 함께 400 에러를 낸다.
+    """
+    df = df.rename(columns=lambda column: str(column).strip().lower())
+
+    missing_columns = [column for column in KEY_COLUMNS if column not in df.columns]
+    if missing_columns:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"필수 컬럼이 없습니다 : {missing_columns}")
+    if df.empty:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="적재할 데이터가 없습니다.")
+
+    result = pd.DataFrame(index=df.index)
+    for column in KEY_COLUMNS:
+        # 엑셀에서 숫자로 읽힌 코드(2021.0)도 문자열로 맞춘다
+        result[column] = df[column].astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+
+    errors = []
+    invalid_yr = ~result["yr"].str.fullmatch(r"\d{4}")
+    invalid_stdg_cd = ~result["stdg_cd"].str.fullmatch(r"\d{10}")
+    for column, invalid in (("yr", invalid_yr), ("stdg_cd", invalid_stdg_cd)):
+        if invalid.any():
+            errors.append(f"{column} 형식 오류 행 : {(np.flatnonzero(invalid) + 2)[:10].tolist()}")
+
+    for column in PERIOD_COLUMNS:
+        if column not in df.columns:
+            result[column] = np.nan
+            continue
+        raw = df[column]
+        if raw.dtype == object:
+            raw = raw.astype(str).str.replace(",", "", regex=False).str.strip().replace({"": None, "nan": None,
+                                                                                          "None": None})
+        values = pd.to_numeric(raw, errors="coerce")
+        invalid = values.isna() & raw.notna()
+        if invalid.any():
+            errors.append(f"{column} 숫자 변환 오류 행 : {(np.flatnonzero(invalid) + 2)[:10].tolist()}")
+        result[column] = values.round()
+
+    duplicated = result.duplicated(subset=KEY_COLUMNS, keep=False)
+    if duplicated.any():
+        errors.append(f"(yr, stdg_cd, dat_no) 중복 행 : {(np.flatnonzero(duplicated) + 2)[:10].tolist()}")
+
+    dat_no_list = result["dat_no"].unique().tolist()
+    query = text("select dat_no from ggs_user_data_info where dat_no in :dat_no_list") \
+        .bindparams(bindparam("dat_no_list", expanding=True))
+    registered = {row[0] for row in db.execute(query, {"dat_no_list": dat_no_list}).fetchall()}
+    unregistered = sorted(set(dat_no_list) - registered)
+    if unregistered:
+        errors.append(f"ggs_user_data_info에 없는 dat_no : {unregistered[:10]}")
+
+    if errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
+    return result
+
+
+def copy_user_statis(df: pd.DataFrame, db: Session) -> None:
+    """
+    한 트랜잭션 안에서 업로드된 (dat_no, yr)의 기존 행을 지우고 COPY FROM STDIN으로 적재한 뒤
+    해당 변수의 데이터 버전(last_mdfcn_dt, dat_last_reg_ymd)을 올린다.
+    COPY 버퍼는 COPY_CHUNK_SIZE 행씩 만들어 메모리를 제한한다.
+    """
+    columns = KEY_COLUMNS + PERIOD_COLUMNS + ["frst_reg_dt", "last_mdfcn_dt"]
+    copy_query = "COPY ggs_user_statis ({}) FROM STDIN WITH (FORMAT csv, NULL '')".format(", ".join(columns))
+    now = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    keys = df.loc[:, ["dat_no", "yr"]].drop_duplicates()
+    try:
+        db.execute(
+            text("delete from ggs_user_statis where (dat_no, yr) in (select * from unnest(:dat_no_list, :yr_list))"),
+            {"dat_no_list": keys["dat_no"].tolist(), "yr_list": keys["yr"].tolist()}
+        )
+
+        cursor = db.connection().connection.cursor()
+        for start in range(0, len(df), COPY_CHUNK_SIZE):
+            chunk = df.iloc[start:start + COPY_CHUNK_SIZE].assign(frst_reg_dt=now, last_mdfcn_dt=now)
+            buffer = io.StringIO()
+            chunk.loc[:, columns].to_csv(buffer, index=False, header=False, float_format="%.0f")
+            buffer.seek(0)
+            cursor.copy_expert(copy_query, buffer)
+
+        db.execute(
+            text("""
+                update ggs_user_data_info
+                set last_mdfcn_dt = now(), dat_last_reg_ymd = to_char(now(), 'YYYYMMDD')
+                where dat_no in :dat_no_list
+            """).bindparams(bindparam("dat_no_list", expanding=True)),
+            {"dat_no_list": keys["dat_no"].unique().tolist()}
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def ingest_user_statis(file: BinaryIO, filename: str, db: Session) -> ShowUserStatisIngest:
+    """
+    사용자 통계 파일을 검증해 ggs_user_statis에 적재하고, 적재된 연도만 충분통계량/기술통계 저장소에 반영한다.
+    """
+    start = time.perf_counter()
+    df = validate_user_statis(read_user_statis_file(file, filename), db)
+    copy_user_statis(df, db)
+    seconds = time.perf_counter() - start
+
+    dat_no_list = sorted(df["dat_no"].unique().tolist())
+    year_list = sorted(df["yr"].unique().tolist())
+    update_loaded_years(dat_no_list, year_list, db)
+
+    logger.info(f"user statis ingested : {len(df)} rows in {seconds:.2f}s ({filename})")
+    return ShowUserStatisIngest(rows=len(df), dat_no_list=dat_no_list, year_list=year_list,
+                                seconds=seconds, rows_per_second=len(df) / seconds if seconds else None)
+
+
+if __name__ == '__main__':
+    from db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="ggs_user_statis 적재 (csv, xlsx, xls, parquet)")
+    parser.add_argument("path", nargs="+")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        for path in args.path:
+            with open(path, "rb") as fr:
+                try:
+                    print(ingest_user_statis(fr, path, session).model_dump_json())
+                except HTTPException as e:
+                    print(f"{path} : {e.detail}")
+    finally:
+        session.close()
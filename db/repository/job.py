@@ -0,0 +1,192 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.job_store import analysis_job_store
+from db.session import SessionLocal, engine
+from db.repository.analysis import create_correlation_analysis, create_regression_analysis, \
+    create_clustering_analysis, create_spatial_clustering_analysis, create_spatial_autocorrelation_analysis
+from schemas.analysis import BaseAnalysisInput, CreateCorrelation, CreateRegression, CreateClustering, \
+    CreateSpatialClustering, CreateSpatialAutocorrelation, ShowAnalysis, ShowAnalysisJob, ShowAnalysisJobQueue
+from utils.logging_module import logger
+
+ANALYSIS_JOB_TYPES = {
+    "correlation": (CreateCorrelation, create_correlation_analysis),
+    "regression": (CreateRegression, create_regression_analysis),
+    "clustering": (CreateClustering, create_clustering_analysis),
+    "spatial_clustering": (CreateSpatialClustering, create_spatial_clustering_analysis),
+    "spatial_autocorrelation": (CreateSpatialAutocorrelation, create_spatial_autocorrelation_analysis),
+}
+
+_executor: ProcessPoolExecutor = None
+
+
+def _init_job_worker():
+    # forkserver가 미리 불러온 모듈에 만들어진 커넥션 풀을 쓰지 않도록 비운다
+    engine.dispose(close=False)
+
+    # 작업 하나가 CPU 하나를 쓰도록 BLAS/OpenMP 스레드를 1개로 제한한다
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+
+def get_job_pool_size() -> int:
+    """
+    서버 worker(gunicorn이 SERVER_WORKER_COUNT로 알려준다)마다 ANALYSIS_JOB_WORKERS를 나눠 가진다.
+    호스트 전체에서 동시에 실행되는 작업 수는 analysis_job_store.acquire_slot으로 다시 제한한다.
+    """
+    server_workers = max(1, int(os.getenv("SERVER_WORKER_COUNT", 1)))
+    return max(1, math.ceil(settings.ANALYSIS_JOB_WORKERS / server_workers))
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        pool_size = get_job_pool_size()
+        # 여러 스레드(event loop, threadpool, rss-watch)가 도는 서버 worker를 그대로 fork하지 않고
+        # 분석 모듈을 미리 불러 둔 forkserver에서 작업 프로세스를 만든다
+        mp_context = multiprocessing.get_context("forkserver")
+        mp_context.set_forkserver_preload(["db.repository.job"])
+        _executor = ProcessPoolExecutor(max_workers=pool_size, mp_context=mp_context, initializer=_init_job_worker)
+        logger.info("analysis job pool started with " + str(pool_size) + " workers")
+    return _executor
+
+
+def _on_job_finished(job_id: str, future: Future) -> None:
+    # 작업 프로세스가 죽거나(BrokenProcessPool) 서버 종료로 취소된 작업은 queued/running으로 남지 않게 한다
+    if future.cancelled():
+        analysis_job_store.set_failed_if_unfinished(job_id, "서버가 재시작되어 작업이 취소되었습니다. 다시 제출해주세요.")
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(f"analysis job process failed : {job_id} - {error!r}")
+        analysis_job_store.set_failed_if_unfinished(job_id, f"{type(error).__name__}: {error}")
+
+
+def _submit(job_id: str, analysis_type: str, analysis_data: dict) -> Future:
+    global _executor
+    try:
+        future = _get_executor().submit(run_analysis_job, job_id, analysis_type, analysis_data)
+    except BrokenProcessPool:
+        # 작업 프로세스 하나가 비정상 종료되면 pool 전체를 다시 만든다
+        logger.warning("analysis job pool is broken, restarting")
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        future = _get_executor().submit(run_analysis_job, job_id, analysis_type, analysis_data)
+    future.add_done_callback(lambda finished: _on_job_finished(job_id, finished))
+    return future
+
+
+def shutdown_job_executor():
+    """
+    대기 중인 작업은 취소되고 _on_job_finished에서 실패로 기록된다. 실행 중인 작업은 끝까지 실행한다.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def run_analysis_job(job_id: str, analysis_type: str, analysis_data: dict) -> None:
+    """
+    worker 프로세스에서 분석을 실행하고 결과를 job store에 기록한다.
+    """
+    from joblib import parallel_backend
+
+    schema, create_analysis = ANALYSIS_JOB_TYPES[analysis_type]
+
+    with analysis_job_store.acquire_slot(settings.ANALYSIS_JOB_WORKERS):
+        analysis_job_store.set_running(job_id)
+        db = SessionLocal()
+        try:
+            # 군집분석의 n_jobs=-1 병렬 학습도 작업 프로세스 안에서는 순차로 실행한다
+            with parallel_backend("sequential"):
+                result = create_analysis(analysis_data=schema.model_validate(analysis_data), db=db)
+            analysis_job_store.set_done(job_id, result.model_dump_json())
+        except HTTPException as e:
+            analysis_job_store.set_failed(job_id, str(e.detail))
+        except Exception as e:
+            logger.exception("analysis job failed : " + job_id)
+            analysis_job_store.set_failed(job_id, f"{type(e).__name__}: {e}")
+        finally:
+            db.close()
+
+
+def submit_analysis_job(analysis_type: str, analysis_data: BaseAnalysisInput) -> ShowAnalysisJob:
+    analysis_job_store.delete_expired(settings.ANALYSIS_JOB_TTL_SECONDS)
+
+    counts = analysis_job_store.count_by_status()
+    if counts.get("queued", 0) >= settings.ANALYSIS_JOB_MAX_QUEUE:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="분석 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.")
+
+    job_id = analysis_job_store.create(analysis_type)
+    try:
+        _submit(job_id, analysis_type, analysis_data.model_dump(mode="json"))
+    except Exception as e:
+        analysis_job_store.set_failed(job_id, f"{type(e).__name__}: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="분석 작업을 시작할 수 없습니다. 잠시 후 다시 시도해주세요.")
+    return retrieve_analysis_job(job_id)
+
+
+async def wait_analysis_job(job_id: str, wait: float) -> None:
+    """
+    작업이 끝나거나 wait초가 지날 때까지 기다린다. 기다리는 동안 threadpool 스레드를 잡지 않고
+    sqlite 조회만 threadpool에서 실행한다.
+    """
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if await run_in_threadpool(analysis_job_store.get_status, job_id) in (None, "done", "failed"):
+            return
+        await asyncio.sleep(0.2)
+
+
+def retrieve_analysis_job(job_id: str) -> ShowAnalysisJob:
+    """
+    작업 상태를 반환한다.
+    """
+    row = analysis_job_store.get(job_id)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"job with ID {job_id} does not exist")
+
+    queue_seconds = None
+    if row["started_at"] is not None:
+        queue_seconds = row["started_at"] - row["submitted_at"]
+    run_seconds = None
+    if row["finished_at"] is not None and row["started_at"] is not None:
+        run_seconds = row["finished_at"] - row["started_at"]
+
+    return ShowAnalysisJob(
+        job_id=row["job_id"],
+        analysis_type=row["analysis_type"],
+        status=row["status"],
+        submitted_at=row["submitted_at"],
+        started_at=row["started_at"],
+        finished_at=row["finished_at"],
+        queue_seconds=queue_seconds,
+        run_seconds=run_seconds,
+        error=row["error"],
+        result=ShowAnalysis.model_validate_json(row["result"]) if row["result"] else None
+    )
+
+
+def retrieve_analysis_job_queue() -> ShowAnalysisJobQueue:
+    counts = analysis_job_store.count_by_status()
+    return ShowAnalysisJobQueue(
+        workers=settings.ANALYSIS_JOB_WORKERS,
+        max_queue=settings.ANALYSIS_JOB_MAX_QUEUE,
+        queued=counts.get("queued", 0),
+        running=counts.get("running", 0),
+        done=counts.get("done", 0),
+        failed=counts.get("failed", 0)
+    )
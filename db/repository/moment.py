@@ -0,0 +1,122 @@
+from typing import List, Literal
+
+import pandas as pd
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from core.moment_store import pair_moment_store, get_pair_moments
+from db.repository.data import get_data_versions, get_value_period_list, build_pivoted_df
+from db.repository.fetch import fetch_arrays
+from utils.logging_module import logger
+
+
+def get_available_years(variable_list: List[str], db: Session) -> List[str]:
+    query = text("""
+        select distinct yr from ggs_statis where dat_no in :variable_list
+        union
+        select distinct yr from ggs_user_statis where dat_no in :variable_list
+    """).bindparams(bindparam('variable_list', expanding=True))
+    return sorted(str(ele[0]) for ele in db.execute(query, {"variable_list": list(variable_list)}).fetchall())
+
+
+def get_yearly_values(variable_list: List[str],
+                      period_unit: Literal["year", "month", "quarter", "half"],
+                      year_list: List[str],
+                      db: Session) -> pd.DataFrame:
+    """
+    해당 연도들의 값만 읽어 (yr, stdg_cd, variable) x dat_no 형태로 반환한다. year_list가 None이면 전체 연도
+    """
+    value_period_list = get_value_period_list(period_unit)
+    columns = ", ".join("{0}::float8 as {0}".format(column) for column in value_period_list)
+    year_condition = "and yr in :year_list" if year_list is not None else ""
+    query = text(f"""
+        select stdg_cd, yr, dat_no, {columns} from ggs_statis
+        where dat_no in :variable_list {year_condition}
+        union all
+        select stdg_cd, yr, dat_no, {columns} from ggs_user_statis
+        where dat_no in :variable_list {year_condition}
+    """).bindparams(bindparam('variable_list', expanding=True))
+    params = {"variable_list": list(variable_list)}
+    if year_list is not None:
+        query = query.bindparams(bindparam('year_list', expanding=True))
+        params["year_list"] = list(year_list)
+
+    keys, values = fetch_arrays(query, params, ['yr', 'stdg_cd', 'dat_no'], value_period_list, db)
+    pivoted_df = build_pivoted_df(keys, values, value_period_list, index_columns=['yr', 'stdg_cd'])
+    return pivoted_df.set_index(['yr', 'stdg_cd', 'variable'])
+
+
+def refresh_pair_moments(variable_list: List[str],
+                         period_unit: Literal["year", "month", "quarter", "half"],
+                         db: Session,
+                         reload_year_list: List[str] = None) -> None:
+    """
+    변수 쌍 충분통계량 저장소를 최신으로 맞춘다.
+    데이터 버전이 바뀐 변수가 있으면 그 변수의 행을 모두 다시 계산하고,
+    아니면 저장소에 없는 연도와 reload_year_list의 연도만 읽어서 더한다.
+    """
+    variable_list = sorted(set(variable_list))
+    versions = get_data_versions(variable_list, db)
+    stored_versions = pair_moment_store.get_versions(variable_list, period_unit)
+    stale_list = [dat_no for dat_no in variable_list if stored_versions.get(dat_no) != versions.get(dat_no)]
+
+    available_years = get_available_years(variable_list, db)
+    if stale_list:
+        year_list = available_years
+    else:
+        stored_years = pair_moment_store.get_years(variable_list, period_unit)
+        pair_list = [(a, b) for i, a in enumerate(variable_list) for b in variable_list[i:]]
+        year_list = [yr for yr in available_years
+                     if any(yr not in stored_years.get(pair, ()) for pair in pair_list)
+                     or yr in (reload_year_list or [])]
+
+    if not year_list:
+        return
+
+    values = get_yearly_values(variable_list, period_unit, year_list, db)
+    moment_list = []
+    for yr, year_values in values.groupby(level='yr', observed=True):
+        moments = get_pair_moments(year_values.reindex(columns=variable_list))
+        moments.insert(2, 'yr', yr)
+        moment_list.append(moments)
+
+    pair_moment_store.put(period_unit,
+                          pd.concat(moment_list, ignore_index=True) if moment_list else pd.DataFrame(),
+                          versions={dat_no: versions[dat_no] for dat_no in variable_list if dat_no in versions},
+                          replace_dat_no_list=stale_list)
+    logger.info(f"pair moments refreshed : {len(variable_list)} variables, {len(year_list)} years, {period_unit}")
+
+
+def update_loaded_years(variable_list: List[str], year_list: List[str], db: Session) -> None:
+    """
+    variable_list 변수의 year_list 연도가 새로 적재되었을 때 저장소를 증분 갱신한다.
+    이미 쌍으로 저장된 변수들과의 해당 연도 행만 다시 계산하고 적재된 변수의 버전을 새 버전으로 맞춘다.
+    """
+    versions = get_data_versions(variable_list, db)
+    for period_unit in ("year", "month", "quarter", "half"):
+        partner_list = pair_moment_store.get_partners(variable_list, period_unit)
+        if partner_list:
+            values = get_yearly_values(partner_list, period_unit, year_list, db)
+            moment_list = []
+            for yr, year_values in values.groupby(level='yr', observed=True):
+                moments = get_pair_moments(year_values.reindex(columns=partner_list))
+                moments.insert(2, 'yr', yr)
+                moment_list.append(moments)
+            if moment_list:
+                pair_moment_store.put(period_unit, pd.concat(moment_list, ignore_index=True),
+                                      versions={dat_no: versions[dat_no] for dat_no in variable_list if dat_no in versions})
+
+    logger.info(f"moment store updated for loaded years : {variable_list}, {year_list}")
+
+
+def get_range_pair_moments(variable_list: List[str],
+                           period_unit: Literal["year", "month", "quarter", "half"],
+                           db: Session,
+                           year_from: str = None,
+                           year_to: str = None) -> pd.DataFrame:
+    """
+    연도 범위의 변수 쌍별 충분통계량 합계 (dat_no_a, dat_no_b, n, sum_a, sum_b, sum_aa, sum_bb, sum_ab)
+    """
+    refresh_pair_moments(variable_list, period_unit, db)
+    return pair_moment_store.get_moments(sorted(set(variable_list)), period_unit, year_from, year_to)
+
@@ -0,0 +1,158 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.snapshot_store import snapshot_store
+from db.repository.fetch import fetch_arrays
+from utils.logging_module import logger
+
+SNAPSHOT_PERIOD_COLUMNS = ["jan", "feb", "mar", "apr", "may", "jun", "july", "aug", "sep", "oct", "nov", "dec",
+                           "qu_1", "qu_2", "qu_3", "qu_4", "ht_1", "ht_2", "yr_vl"]
+
+
+def get_snapshot_versions(variable_list: List[str], db: Session) -> Dict[str, dict]:
+    """
+    변수별 데이터 버전(dat_last_reg_ymd, last_mdfcn_dt), 원본 테이블(statis/user), 변수명
+    결과 캐시 키(get_data_version_stamp)와 같은 시점의 버전을 쓰도록 캐시하지 않고 매번 읽는다.
+    """
+    query = text("""
+        select dat_no, dat_nm, dat_last_reg_ymd, last_mdfcn_dt, 'statis' from ggs_data_info
+        where dat_no in :variable_list
+        union all
+        select dat_no, dat_nm, dat_last_reg_ymd, last_mdfcn_dt, 'user' from ggs_user_data_info
+        where dat_no in :variable_list
+    """).bindparams(bindparam('variable_list', expanding=True))
+    rows = db.execute(query, {"variable_list": list(variable_list)}).fetchall()
+    return {dat_no: {"version": f"{dat_last_reg_ymd}|{last_mdfcn_dt}", "source": source, "dat_nm": dat_nm}
+            for dat_no, dat_nm, dat_last_reg_ymd, last_mdfcn_dt, source in rows}
+
+
+def export_snapshot(dat_no: str, info: dict, db: Session):
+    """
+    변수 하나의 원자료를 get_pivoted_df와 같은 조인 조건으로 읽어 snapshot 파일로 저장한다.
+    stdg_cd, stdg_nm은 dictionary 인코딩, 기간 컬럼은 float64
+    """
+    import pyarrow as pa
+
+    table_name = "ggs_statis" if info["source"] == "statis" else "ggs_user_statis"
+    info_table_name = "ggs_data_info" if info["source"] == "statis" else "ggs_user_data_info"
+    columns = ", ".join("stat.{0}::float8 as {0}".format(column) for column in SNAPSHOT_PERIOD_COLUMNS)
+    query = text(f"""
+        select stat.stdg_cd, stat.yr, stdg.stdg_nm, {columns}
+        from {table_name} stat
+        join {info_table_name} info on stat.dat_no = info.dat_no
+        join ggs_stdg stdg on stat.stdg_cd = stdg.stdg_cd
+        where stat.dat_no = :dat_no
+    """)
+    keys, values = fetch_arrays(query, {"dat_no": dat_no}, ["stdg_cd", "yr", "stdg_nm"], SNAPSHOT_PERIOD_COLUMNS, db)
+
+    arrays = {
+        "stdg_cd": pa.array(keys["stdg_cd"].astype(str)).dictionary_encode(),
+        "yr": pa.array(keys["yr"].astype(str)),
+        "stdg_nm": pa.array(keys["stdg_nm"].astype(str)).dictionary_encode()
+    }
+    for i, column in enumerate(SNAPSHOT_PERIOD_COLUMNS):
+        arrays[column] = pa.array(values[:, i], from_pandas=True)
+
+    table = pa.table(arrays)
+    snapshot_store.write(dat_no, info["version"], table)
+    return snapshot_store.open(dat_no, info["version"])
+
+
+def get_snapshot_tables(variable_list: List[str], db: Session) -> Optional[Tuple[dict, Dict[str, dict]]]:
+    """
+    변수별 최신 snapshot Table과 get_snapshot_versions의 버전 정보를 반환한다. 버전이 바뀐 변수는 다시 저장한다.
+    snapshot을 쓸 수 없으면(비활성화, 없는 변수, 에러) None을 반환하고 호출한 쪽은 DB에서 읽는다.
+    """
+    if not settings.SNAPSHOT_ENABLED:
+        return None
+
+    try:
+        versions = get_snapshot_versions(list(variable_list), db)
+        if any(dat_no not in versions for dat_no in variable_list):
+            return None
+
+        tables = {}
+        for dat_no in variable_list:
+            table = snapshot_store.open(dat_no, versions[dat_no]["version"])
+            if table is None:
+                table = export_snapshot(dat_no, versions[dat_no], db)
+            tables[dat_no] = table
+        return tables, versions
+    except Exception:
+        logger.exception("snapshot read failed, falling back to database")
+        return None
+
+
+def _column_to_numpy(table, column: str) -> np.ndarray:
+    # dictionary 컬럼은 문자열 object 배열로, 값 컬럼의 null은 nan으로 바꾼다
+    return table.column(column).to_pandas().to_numpy()
+
+
+def _year_mask(yr: np.ndarray, year_from: str = None, year_to: str = None) -> np.ndarray:
+    mask = np.ones(len(yr), dtype=bool)
+    if year_from is not None:
+        mask &= yr >= str(year_from)
+    if year_to is not None:
+        mask &= yr <= str(year_to)
+    return mask
+
+
+def count_snapshot_rows(tables: dict, year_from: str = None, year_to: str = None) -> int:
+    """
+    snapshot Table들에서 연도 범위에 드는 행 수
+    """
+    if year_from is None and year_to is None:
+        return sum(table.num_rows for table in tables.values())
+    return sum(int(_year_mask(_column_to_numpy(table, "yr"), year_from, year_to).sum()) for table in tables.values())
+
+
+def get_snapshot_arrays(tables: dict, value_period_list: List[str], year_from: str = None, year_to: str = None):
+    """
+    snapshot Table들을 fetch_arrays와 같은 (키 컬럼 배열 dict, (행 x 기간) 값 배열) 형태로 합친다.
+    memory map된 컬럼에서 필요한 기간 컬럼만 꺼낸다.
+    """
+    key_list = {"yr": [], "stdg_cd": [], "stdg_nm": [], "dat_no": []}
+    value_list = []
+    for dat_no, table in tables.items():
+        yr = _column_to_numpy(table, "yr")
+        mask = _year_mask(yr, year_from, year_to)
+
+        key_list["yr"].append(yr[mask])
+        key_list["stdg_cd"].append(_column_to_numpy(table, "stdg_cd")[mask])
+        key_list["stdg_nm"].append(_column_to_numpy(table, "stdg_nm")[mask])
+        key_list["dat_no"].append(np.full(mask.sum(), dat_no, dtype=object))
+        value_list.append(np.column_stack([_column_to_numpy(table, column)[mask]
+                                           for column in value_period_list]))
+
+    keys = {column: np.concatenate(arrays) if arrays else np.empty(0, dtype=object)
+            for column, arrays in key_list.items()}
+    values = np.vstack(value_list) if value_list else np.empty((0, len(value_period_list)))
+    return keys, values
+
+
+def get_snapshot_chart_data(dat_no: str, column: str, year: str, limit, db: Session) -> Optional[list]:
+    """
+    retrieve_chart_data와 같은 (값, stdg_nm) 목록을 snapshot에서 만든다. snapshot을 쓸 수 없으면 None
+    사용자 통계는 DB 조회와 같이 yr_vl 값을 쓴다.
+    """
+    snapshot = get_snapshot_tables([dat_no], db)
+    if snapshot is None:
+        return None
+    tables, versions = snapshot
+    table = tables[dat_no]
+    if versions[dat_no]["source"] == "user":
+        column = "yr_vl"
+
+    values = _column_to_numpy(table, column)
+    names = _column_to_numpy(table, "stdg_nm")
+    mask = (_column_to_numpy(table, "yr") == str(year)) & ~np.isnan(values)
+
+    values = np.round(values[mask]).astype(np.int64)
+    names = names[mask]
+    if limit is not None:
+        values, names = values[:limit], names[:limit]
+    return list(zip(values.tolist(), names.tolist()))
@@ -10,11 +10,13 @@ from sqlalchemy.exc import SQLAlchemyError, ArgumentError, DBAPIError, InvalidRe
     NoReferenceError
 
 from core.config import settings
+from db.query_stats import install_query_hooks
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 print("Database URL is ", SQLALCHEMY_DATABASE_URL)
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
+install_query_hooks(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
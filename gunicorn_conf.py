@@ -0,0 +1,126 @@
+"""
+운영 서버 설정 (gunicorn + uvicorn worker)
+
+    gunicorn -c gunicorn_conf.py main:app
+
+worker 수, preload, 재시작 조건은 모두 core.config.settings에서 읽는다.
+"""
+import math
+import os
+import shutil
+import signal
+import threading
+import time
+
+from core.config import settings
+
+# prometheus_client를 불러오기 전에 설정해야 worker들의 metric이 파일로 모인다
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from utils.logging_module import logger
+
+
+def get_available_cpu_count() -> int:
+    """
+    이 프로세스가 쓸 수 있는 CPU 수. 컨테이너의 cgroup CPU 제한(quota/period)이 있으면 그 값을 따른다.
+    """
+    try:
+        cpu_count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpu_count = os.cpu_count() or 1
+
+    try:
+        # cgroup v2
+        with open("/sys/fs/cgroup/cpu.max") as fr:
+            quota, period = fr.read().split()
+        if quota != "max":
+            cpu_count = min(cpu_count, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as fr:
+                quota = int(fr.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as fr:
+                period = int(fr.read())
+            if quota > 0:
+                cpu_count = min(cpu_count, math.ceil(quota / period))
+        except (OSError, ValueError):
+            pass
+    return max(cpu_count, 1)
+
+
+def get_worker_count() -> int:
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    # 분석은 CPU를 쓰는 동기 작업이므로 CPU당 worker 하나
+    return max(1, min(get_available_cpu_count(), settings.SERVER_MAX_WORKERS))
+
+
+def get_rss_mb() -> float:
+    """
+    현재 프로세스의 RSS(MB). /proc이 없으면 0
+    """
+    try:
+        with open("/proc/self/statm") as fr:
+            pages = int(fr.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0.0
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def _watch_rss(worker):
+    # uvicorn worker는 SIGTERM을 받으면 처리 중인 요청을 마치고 종료하고, master가 새 worker를 띄운다
+    while True:
+        time.sleep(settings.WORKER_RSS_CHECK_SECONDS)
+        rss_mb = get_rss_mb()
+        if rss_mb > settings.WORKER_MAX_RSS_MB:
+            logger.warning(f"worker {worker.pid} rss {rss_mb:.0f}MB > {settings.WORKER_MAX_RSS_MB}MB, restarting")
+            os.kill(worker.pid, signal.SIGTERM)
+            return
+
+
+bind = settings.SERVER_BIND
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = get_worker_count()
+# worker마다 만드는 분석 작업 pool이 호스트 전체 ANALYSIS_JOB_WORKERS를 나눠 갖도록 알려준다
+os.environ["SERVER_WORKER_COUNT"] = str(workers)
+preload_app = settings.SERVER_PRELOAD
+
+# matplotlib, Chromium(dataframe_image)이 남기는 메모리를 회수하기 위해 worker를 주기적으로 바꾼다.
+# jitter로 worker들이 한꺼번에 재시작하지 않게 한다
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WORKER_MAX_REQUESTS_JITTER
+
+timeout = settings.SERVER_TIMEOUT_SECONDS
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+keepalive = settings.SERVER_KEEPALIVE_SECONDS
+
+# 컨테이너의 /tmp가 디스크인 경우 heartbeat 파일 쓰기가 막히지 않도록 메모리 파일시스템을 쓴다
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+forwarded_allow_ips = "*"
+
+
+def on_starting(server):
+    multiproc_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+    # fork 전에 master에서 불러온 모듈은 worker들이 copy-on-write로 공유한다
+    if settings.SERVER_PRELOAD and settings.WARMUP_ENABLED:
+        from core.warmup import import_analysis_modules
+
+        start = time.perf_counter()
+        import_analysis_modules()
+        logger.info(f"analysis modules preloaded : {time.perf_counter() - start:.3f}s")
+    logger.info(f"starting {workers} workers (cpu {get_available_cpu_count()}), preload {preload_app}")
+
+
+def post_worker_init(worker):
+    if settings.WORKER_MAX_RSS_MB > 0:
+        threading.Thread(target=_watch_rss, args=(worker,), name="rss-watch", daemon=True).start()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
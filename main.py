@@ -4,7 +4,10 @@ from starlette.middleware.cors import CORSMiddleware
 from db.base import Base
 from db.session import engine
 from core.config import settings
+from core.metrics import setup_metrics
 from apis.base import api_router
+from db.repository.job import shutdown_job_executor
+from core.warmup import warm_up
 
 
 def include_router(app):
@@ -22,7 +25,12 @@ def start_application():
         allow_headers=["*"],
     )
 
+    # 요청별 처리 시간(Server-Timing 헤더)과 /metrics
+    setup_metrics(app)
     include_router(app)
+    # 지역 중심점, 좌표 변환기, DB 연결, 분석 모듈을 worker마다 첫 요청 전에 준비한다
+    app.add_event_handler("startup", warm_up)
+    app.add_event_handler("shutdown", shutdown_job_executor)
     return app
 
 
@@ -1,8 +1,7 @@
-from datetime import date
-from typing import Optional, List, Union, Any, Literal
+from datetime import date, datetime
+from typing import Optional, List, Union, Any, Literal, Dict, Annotated
 
-from pydantic import BaseModel, Field, root_validator
-from pydantic.v1 import validator
+from pydantic import BaseModel, ConfigDict, Field, root_validator, field_validator
 
 
 class AnalysisResult(BaseModel):
@@ -15,13 +14,84 @@ class ShowAnalysis(BaseModel):
     """
     상관분석 결과를 반환하는 dto
     모든 필드는 base64형 image
+    cache는 결과 캐시 적중 여부 (hit, miss)
     """
     data: List[AnalysisResult]
+    cache: Optional[Literal["hit", "miss"]] = None
+
+
+class ShowAnalysisJob(BaseModel):
+    """
+    비동기 분석 작업 상태를 반환하는 dto
+    status가 done이면 result에 분석 결과가 들어간다.
+    """
+    job_id: str
+    analysis_type: str
+    status: Literal["queued", "running", "done", "failed"]
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    queue_seconds: Optional[float] = None  # 대기열에서 기다린 시간
+    run_seconds: Optional[float] = None  # 분석에 걸린 시간
+    error: Optional[str] = None
+    result: Optional[ShowAnalysis] = None
+
+
+class ShowAnalysisJobQueue(BaseModel):
+    """
+    비동기 분석 작업 대기열 현황 dto
+    """
+    workers: int
+    max_queue: int
+    queued: int
+    running: int
+    done: int
+    failed: int
+
+
+class ShowModel(BaseModel):
+    """
+    모델 저장소에 저장된 모델 정보 dto
+    """
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_id: str
+    model_type: Literal["clustering", "regression"]
+    feature_columns: List[str]
+    target_columns: List[str]
+    created_at: datetime
+
+
+class PredictModel(BaseModel):
+    """
+    저장된 모델로 예측하기 위한 parameter dto
+    rows의 각 행은 {dat_no: 값} 형태이며 없는 변수는 0으로 본다. 모델에 없는 변수를 주면 400
+
+    {
+        "rows": [{"M026006": 1200, "M026002": 35}, {"M026006": 800, "M026002": 12}]
+    }
+    """
+    rows: List[Dict[str, Optional[float]]]
+
+
+class ShowPrediction(BaseModel):
+    """
+    예측 결과 dto
+    군집 모델은 {"labels": [...]}, 회귀 모델은 {종속변수 dat_no: [...]} 형태
+    """
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_id: str
+    predictions: Dict[str, List[Any]]
 
 
 class BaseAnalysisInput(BaseModel):
     period_unit: Literal["year", "month", "quarter", "half"]
 
+    @property
+    def involved_variable_list(self) -> List[str]:
+        return self.variable_list
+
 
 class CreateCorrelation(BaseAnalysisInput):
     """
@@ -40,28 +110,88 @@ class CreateCorrelation(BaseAnalysisInput):
     valid_pvalue_accent: bool
 
 
+class CreateCorrelationSummary(BaseAnalysisInput):
+    """
+    연도 범위의 상관계수, 공분산을 원자료 대신 연도별 충분통계량으로 계산하기 위한 parameter dto
+    year_from, year_to를 생략하면 전체 연도를 쓴다.
+    """
+    variable_list: List[str]
+    test_side: Literal["two-sided", "greater"] = "two-sided"
+    year_from: Optional[str] = None
+    year_to: Optional[str] = None
+
+
 class CreateRegression(BaseAnalysisInput):
     """
     회귀분석 시행하기 위한 parameter dto
+    dependent_variable에 리스트를 주면 같은 독립변수로 여러 종속변수를 한 번에 추정한다.
     """
-    dependent_variable: str
+    dependent_variable: Union[str, Annotated[List[str], Field(min_length=1)]]
     independent_variable_list: List[str]
 
+    @property
+    def dependent_variable_list(self) -> List[str]:
+        if isinstance(self.dependent_variable, str):
+            return [self.dependent_variable]
+        return self.dependent_variable
+
+    @property
+    def involved_variable_list(self) -> List[str]:
+        return self.independent_variable_list + self.dependent_variable_list
+
 
 class CreateClustering(BaseAnalysisInput):
     """
     군집분석 시행하기 위한 parameter dto
+    algorithm은 gmm(기본), kmeans 중 선택하며 kmeans는 데이터가 크면 MiniBatchKMeans로 학습한다.
+    (minibatch로 직접 지정 가능)
+    n_point를 "auto"로 주면 2 ~ max_n_point(최대 30) 범위에서 k_method 기준으로 군집 수를 정한다.
+    k_method는 gmm이면 BIC/AIC(기본 BIC), kmeans면 silhouette/wcss(기본 silhouette)
+    random_state가 같으면 같은 입력에 대해 같은 모델이 학습된다.
     """
     variable_list: List[str]
-    n_point: int
-
-    @validator('n_point')
+    n_point: Union[int, Literal["auto"]]
+    algorithm: Literal["gmm", "kmeans"] = "gmm"
+    minibatch: Optional[bool] = None
+    k_method: Optional[Literal["BIC", "AIC", "silhouette", "wcss"]] = None
+    max_n_point: int = Field(10, ge=2, le=30)
+    random_state: int = 0
+
+    @field_validator('n_point')
+    @classmethod
     def check_min_n_point(cls, v):
-        if v < 2:
+        if v != "auto" and v < 2:
             raise ValueError("n은 최소 2 이상입니다.")
         return v
 
 
 class CreateSpatialClustering(CreateClustering):
-    crs: str
+    """
+    공간 군집분석 시행하기 위한 parameter dto
+    좌표는 지역(stdg_cd) 중심점이며 TARGET_CRS(EPSG:5179) 기준으로 반환된다.
+    지역 중심점 파일이 없는 서버에서는 예전처럼 첫 두 변수를 crs 좌표로 보고 변환한다.
+    spatial_weight > 0이면 중심점 좌표를 해당 가중치로 군집 변수에 함께 넣는다.
+    output_format은 records(기본), columnar, geojson, arrow(base64 인코딩된 Arrow IPC stream) 중 선택
+    coordinate_precision을 주면 좌표를 소수점 해당 자리까지 반올림한다.
+    """
+    crs: Optional[str] = None
+    spatial_weight: float = Field(0, ge=0)
+    output_format: Literal["records", "columnar", "geojson", "arrow"] = "records"
+    coordinate_precision: Optional[int] = Field(None, ge=0, le=10)
+
 
+class CreateSpatialAutocorrelation(BaseAnalysisInput):
+    """
+    공간 자기상관(Moran's I, LISA) 분석 시행하기 위한 parameter dto
+    region_level(sido, sgg, emd) 지역만 골라 연도/기간별로 k_neighbors-최근접 이웃 가중치로 계산한다.
+    지역 수가 k_neighbors 이하이면 k를 지역 수 - 1로 줄이고, 값이 없는 지역은 변수마다 뺀다.
+    permutations번 순열 검정으로 p값을 구하고, p값이 significance 미만인 지역만 LISA 군집 유형을 붙인다.
+    year_list를 주면 해당 연도만 분석한다.
+    """
+    variable_list: List[str] = Field(min_length=1, max_length=5)
+    region_level: Literal["sido", "sgg", "emd"] = "sgg"
+    k_neighbors: int = Field(8, ge=1, le=20)
+    permutations: int = Field(99, ge=19, le=9999)
+    significance: float = Field(0.05, gt=0, lt=1)
+    year_list: Optional[List[str]] = None
+    random_state: int = 0
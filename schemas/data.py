@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import List, Dict, Union, Literal, Any
+from typing import List, Dict, Union, Literal, Any, Optional
 
 from pydantic import EmailStr, BaseModel, Field
 
@@ -68,3 +68,56 @@ class EChartBarOption(EChartOption):
 
 class EChartPieOption(EChartOption):
     pass
+
+
+class FindRegionByPoint(BaseModel):
+    """
+    좌표로 지역을 찾기 위한 parameter dto
+    points는 [[x, y], ...] 형태이며 crs 좌표계 기준이다. (여러 좌표를 한 번에 변환한다)
+    region_level(sido, sgg, emd)을 주면 해당 행정 단위의 지역만 찾는다.
+    """
+    points: List[List[float]]
+    crs: str = "EPSG:5179"
+    region_level: Optional[Literal["sido", "sgg", "emd"]] = None
+
+
+class FindNearestRegion(FindRegionByPoint):
+    k: int = Field(5, ge=1, le=100)
+
+
+class FindRegionWithin(FindRegionByPoint):
+    radius_km: float = Field(..., gt=0, le=500)
+
+
+class ShowNearbyRegion(BaseModel):
+    """
+    좌표 또는 지역별 주변 지역 목록 dto (거리는 EPSG:5179 기준 m)
+    """
+    stdg_cd: List[str]
+    distance: List[float]
+
+
+class ShowUserStatisIngest(BaseModel):
+    """
+    사용자 통계 적재 결과 dto
+    """
+    rows: int
+    dat_no_list: List[str]
+    year_list: List[str]
+    seconds: float
+    rows_per_second: Optional[float] = None
+
+
+class ShowQueryStatistic(BaseModel):
+    """
+    SQL 문(fingerprint)별 실행 통계 dto (응답한 worker 프로세스 기준, worker 간 합산하지 않음)
+    """
+    fingerprint_id: str
+    statement: str
+    calls: int
+    total_seconds: float
+    mean_seconds: float
+    max_seconds: float
+    rows: int
+    slow_calls: int
+    last_slow_plan: Optional[str] = None